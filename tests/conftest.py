@@ -103,3 +103,90 @@ def zenodo_access_token():
     into ``TestDatabaseCreator.test_create_deposit.yaml`` and committed.
     """
     return "fake-token-for-tests"
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Point unimpeded's on-disk caches at a fresh directory for every test.
+
+    Otherwise a catalog cached by one test (or by the developer's own use of the
+    package) would be served to the next, and the cassettes would no longer see
+    the requests they were recorded for.
+    """
+    cache_dir = tmp_path / "unimpeded-cache"
+    monkeypatch.setattr("unimpeded.database.DEFAULT_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def isolated_rate_limiter(monkeypatch):
+    """Give every test a fresh process-wide rate limiter.
+
+    Rate-limit headers replayed by one test (or a 429 mocked by it) would
+    otherwise hold back the requests of the next.
+    """
+    monkeypatch.setattr("unimpeded.http._default_rate_limiter", None)
+
+
+@pytest.fixture(autouse=True)
+def unverified_cassette_downloads(request, monkeypatch):
+    """Skip checksum verification of files replayed from a cassette.
+
+    ``strip_csv_response_body`` truncates large chains when they are recorded,
+    so they can no longer match the size and checksum Zenodo published.
+    """
+    if request.node.get_closest_marker("vcr") is not None:
+        monkeypatch.setattr(
+            "unimpeded.database.DatabaseExplorer.verify_checksums", False
+        )
+
+
+@pytest.fixture
+def chain_explorer():
+    """Build a DatabaseExplorer that finds and downloads one published chain.
+
+    Call the returned function with the patched ``Session.get``, the CSV
+    bytes of the chain, and any keyword arguments for ``DatabaseExplorer``.
+    The records search finds ``ns_lcdm_planck_2018_plik.csv`` in deposit 11,
+    with the size and checksum of ``content``, and the next three requests
+    download it.
+    """
+    import hashlib
+    from unittest.mock import MagicMock
+
+    from unimpeded.database import DatabaseExplorer
+
+    def response(status_code=200, **attributes):
+        r = MagicMock(status_code=status_code, **attributes)
+        r.raise_for_status = MagicMock()
+        return r
+
+    def explorer(mock_get, content, **kwargs):
+        key = "ns_lcdm_planck_2018_plik.csv"
+        hit = {
+            "id": 11,
+            "metadata": {
+                "title": "unimpeded: lcdm planck_2018_plik",
+                "relations": {"version": [{"index": 0}]},
+            },
+            "links": {"archive": "https://zenodo.org/api/records/11/files-archive"},
+            "files": [
+                {
+                    "key": key,
+                    "size": len(content),
+                    "checksum": f"md5:{hashlib.md5(content).hexdigest()}",
+                    "links": {
+                        "self": f"https://zenodo.org/api/records/11/files/{key}/content"
+                    },
+                }
+            ],
+        }
+        search = response()
+        search.json.return_value = {"hits": {"hits": [hit], "total": 1}}
+        downloads = [
+            response(**{"iter_content.return_value": [content]}) for _ in range(3)
+        ]
+        mock_get.side_effect = [search, *downloads]
+        return DatabaseExplorer(**kwargs)
+
+    return explorer
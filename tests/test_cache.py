@@ -0,0 +1,315 @@
+"""Tests for the unimpeded cache module."""
+
+import os
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from anesthetic import MCMCSamples, NestedSamples, read_csv
+
+import unimpeded.cache
+from unimpeded.cache import FileCache, SamplesCache, StatsCache
+
+
+def _store(cache, checksum, content):
+    """Put ``content`` into ``cache`` through its partial download file."""
+    with cache.open_partial(checksum) as fp:
+        fp.write(content)
+    return cache.put(checksum, fp.name)
+
+
+class TestFileCache:
+    """Test the checksum-keyed LRU file cache."""
+
+    def test_miss_then_hit(self, tmp_path):
+        """A file is found under its checksum once it has been put."""
+        cache = FileCache(str(tmp_path))
+        assert cache.get("md5:0123abcd") is None
+
+        path = _store(cache, "md5:0123abcd", b"chain")
+        assert cache.get("md5:0123abcd") == path
+        with open(path, "rb") as f:
+            assert f.read() == b"chain"
+        assert cache.get("md5:0123abce") is None
+
+    def test_path_layout(self, tmp_path):
+        """Files are sharded by algorithm and digest prefix."""
+        cache = FileCache(str(tmp_path))
+        assert cache.path("md5:0123abcd") == os.path.join(
+            str(tmp_path), "md5", "01", "0123abcd"
+        )
+        assert cache.path("sha256:ff00") == os.path.join(
+            str(tmp_path), "sha256", "ff", "ff00"
+        )
+
+    def test_checksum_cannot_escape_directory(self, tmp_path):
+        """Path separators in a checksum are not followed."""
+        cache = FileCache(str(tmp_path))
+        assert cache.path("md5:../../etc").startswith(str(tmp_path))
+        with pytest.raises(ValueError):
+            cache.path("md5:")
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        """Beyond the budget the least recently used files go first."""
+        cache = FileCache(str(tmp_path), max_bytes=10)
+        old = _store(cache, "md5:aa", b"1234")
+        used = _store(cache, "md5:bb", b"1234")
+        os.utime(old, (1, 1))
+        os.utime(used, (2, 2))
+        cache.get("md5:bb")
+
+        _store(cache, "md5:cc", b"1234")
+        assert cache.get("md5:aa") is None
+        assert cache.get("md5:bb") is not None
+        assert cache.get("md5:cc") is not None
+
+    def test_new_file_is_kept_even_if_too_large(self, tmp_path):
+        """The file just stored survives eviction so it can be read."""
+        cache = FileCache(str(tmp_path), max_bytes=2)
+        _store(cache, "md5:aa", b"1")
+        assert cache.get("md5:bb") is None
+        path = _store(cache, "md5:bb", b"12345")
+        assert os.path.exists(path)
+        assert cache.get("md5:aa") is None
+
+    def test_temporary_files_are_not_counted(self, tmp_path):
+        """Downloads in progress are neither counted nor evicted."""
+        cache = FileCache(str(tmp_path), max_bytes=4)
+        with cache.open_partial("md5:bb") as fp:
+            fp.write(b"123456789")
+        _store(cache, "md5:aa", b"1234")
+        assert os.path.exists(fp.name)
+        assert cache.get("md5:aa") is not None
+
+    def test_open_survives_eviction(self, tmp_path):
+        """An open file stays readable after another process evicts it."""
+        cache = FileCache(str(tmp_path))
+        assert cache.open("md5:0123abcd") is None
+        _store(cache, "md5:0123abcd", b"chain")
+        with cache.open("md5:0123abcd") as fp:
+            os.remove(cache.path("md5:0123abcd"))
+            assert fp.read() == b"chain"
+        assert cache.open("md5:0123abcd") is None
+
+    def test_partial_download_persists(self, tmp_path):
+        """A partial download is appended to until it is put."""
+        cache = FileCache(str(tmp_path))
+        with cache.open_partial("md5:aa") as fp:
+            fp.write(b"12")
+        with cache.open_partial("md5:aa") as fp:
+            fp.write(b"34")
+            fp.seek(0)
+            assert fp.read() == b"1234"
+        assert cache.get("md5:aa") is None
+        with open(cache.put("md5:aa", fp.name), "rb") as f:
+            assert f.read() == b"1234"
+
+
+class TestSamplesCache:
+    """Test the columnar cache of parsed samples."""
+
+    @staticmethod
+    def _nested(n=40):
+        rng = np.random.default_rng(1)
+        return NestedSamples(
+            data=rng.random((n, 2)),
+            columns=["a", "b"],
+            logL=np.sort(rng.random(n)),
+            logL_birth=-np.inf,
+            labels={"a": r"$a$", "b": r"$b$"},
+        )
+
+    @staticmethod
+    def _parsed(samples):
+        """Round-trip ``samples`` through CSV, as they arrive from Zenodo."""
+        buffer = StringIO()
+        samples.to_csv(buffer)
+        return read_csv(BytesIO(buffer.getvalue().encode()))
+
+    def test_budget_is_separate_from_file_cache(self, tmp_path):
+        """Parsed samples have their own size budget, not the CSV files'."""
+        assert (
+            SamplesCache(str(tmp_path)).max_bytes == unimpeded.cache.SAMPLES_CACHE_SIZE
+        )
+        assert FileCache(str(tmp_path)).max_bytes == unimpeded.cache.FILE_CACHE_SIZE
+
+    def test_load_selected_columns(self, tmp_path):
+        """Only the columns asked for are loaded, in their original order."""
+        cache = SamplesCache(str(tmp_path))
+        samples = self._parsed(self._nested())
+        cache.save("md5:aa", samples)
+        loaded = cache.load("md5:aa", columns={"nlive", "logL", "b"})
+        assert isinstance(loaded, NestedSamples)
+        assert list(loaded.columns.get_level_values(0)) == ["b", "logL", "nlive"]
+        pd.testing.assert_frame_equal(loaded, samples[["b", "logL", "nlive"]])
+
+    def test_load_maps_columns_without_copying(self, tmp_path):
+        """Loaded columns are views of the memory-mapped arrays, not copies."""
+        cache = SamplesCache(str(tmp_path))
+        cache.save("md5:aa", self._parsed(self._nested()))
+        mapped = {}
+        real_map = unimpeded.cache._map
+
+        def _map(path):
+            mapped[os.path.basename(path)] = real_map(path)
+            return mapped[os.path.basename(path)]
+
+        with patch("unimpeded.cache._map", _map):
+            loaded = cache.load("md5:aa")
+        # anesthetic's ``__getitem__`` copies the frame, so go through iloc.
+        for i in range(loaded.shape[1]):
+            memmap = mapped[f"column{i}.npy"]
+            assert np.shares_memory(loaded.iloc[:, i].to_numpy(), memmap)
+
+    def test_partial_entry_serves_only_its_columns(self, tmp_path):
+        """An entry of some columns is a miss for others, until replaced."""
+        cache = SamplesCache(str(tmp_path))
+        samples = self._parsed(self._nested())
+        names = list(samples.columns.get_level_values(0))
+        cache.save("md5:aa", samples[["b", "logL", "nlive"]], names=names)
+
+        assert cache.load("md5:aa", columns={"b", "missing"}) is not None
+        assert cache.load("md5:aa", columns={"a", "b"}) is None
+        assert cache.load("md5:aa") is None
+
+        cache.save("md5:aa", samples)
+        pd.testing.assert_frame_equal(cache.load("md5:aa"), samples)
+        cache.save("md5:aa", samples[["b", "logL", "nlive"]], names=names)
+        pd.testing.assert_frame_equal(cache.load("md5:aa"), samples)
+
+    def test_variants_are_separate_entries(self, tmp_path):
+        """Samples derived from the same CSV are stored alongside it."""
+        cache = SamplesCache(str(tmp_path))
+        samples = self._parsed(self._nested())
+        reduced = samples.astype({("a", "$a$"): np.float32})
+        cache.save("md5:aa", samples)
+        cache.save("md5:aa", reduced, "float32")
+
+        assert cache.path("md5:aa", "float32") == cache.path("md5:aa") + "-float32"
+        assert cache.load("md5:aa")["a"].dtype == np.float64
+        assert cache.load("md5:aa", variant="float32")["a"].dtype == np.float32
+        assert cache.load("md5:bb", variant="float32") is None
+
+    def test_nested_samples_round_trip(self, tmp_path):
+        """Nested samples come back equal, with labels and dtypes."""
+        cache = SamplesCache(str(tmp_path))
+        samples = self._parsed(self._nested())
+        assert cache.load("md5:aa") is None
+
+        cache.save("md5:aa", samples)
+        loaded = cache.load("md5:aa")
+        assert isinstance(loaded, NestedSamples)
+        pd.testing.assert_frame_equal(loaded, samples, check_frame_type=False)
+        assert loaded.get_labels().tolist() == samples.get_labels().tolist()
+        assert loaded.logZ() == samples.logZ()
+
+    def test_mcmc_samples_round_trip(self, tmp_path):
+        """MCMC samples keep their class and integer weights."""
+        rng = np.random.default_rng(2)
+        samples = self._parsed(
+            MCMCSamples(
+                data=rng.random((30, 2)),
+                columns=["a", "b"],
+                weights=rng.integers(1, 4, 30),
+                labels={"a": r"$a$", "b": r"$b$"},
+            )
+        )
+        cache = SamplesCache(str(tmp_path))
+        cache.save("md5:bb", samples)
+        loaded = cache.load("md5:bb")
+        assert isinstance(loaded, MCMCSamples)
+        assert loaded.get_weights().dtype == samples.get_weights().dtype
+        pd.testing.assert_frame_equal(loaded, samples, check_frame_type=False)
+
+    def test_loaded_samples_can_be_changed(self, tmp_path):
+        """Changing loaded samples does not touch the cached copy."""
+        cache = SamplesCache(str(tmp_path))
+        cache.save("md5:aa", self._parsed(self._nested()))
+        loaded = cache.load("md5:aa")
+        loaded.iloc[0, 0] = -1.0
+        assert cache.load("md5:aa").iloc[0, 0] != -1.0
+
+    def test_incomplete_entry_is_a_miss(self, tmp_path):
+        """An entry missing a column is ignored rather than half loaded."""
+        cache = SamplesCache(str(tmp_path))
+        cache.save("md5:aa", self._parsed(self._nested()))
+        os.remove(os.path.join(cache.path("md5:aa"), "column1.npy"))
+        assert cache.load("md5:aa") is None
+
+    def test_entry_evicted_while_loading_is_a_miss(self, tmp_path):
+        """An entry removed by another process as it loads is not an error."""
+        cache = SamplesCache(str(tmp_path))
+        cache.save("md5:aa", self._parsed(self._nested()))
+        with patch("unimpeded.cache.os.utime", side_effect=FileNotFoundError):
+            assert cache.load("md5:aa") is None
+
+    def test_least_recently_loaded_is_evicted(self, tmp_path):
+        """Beyond the budget whole entries are evicted, oldest first."""
+        samples = self._parsed(self._nested())
+        cache = SamplesCache(str(tmp_path))
+        cache.save("md5:aa", samples)
+        entry = sum(
+            os.path.getsize(os.path.join(cache.path("md5:aa"), name))
+            for name in os.listdir(cache.path("md5:aa"))
+        )
+        cache.max_bytes = entry * 2
+        os.utime(os.path.join(cache.path("md5:aa"), "meta.json"), (1, 1))
+        cache.save("md5:bb", samples)
+        cache.save("md5:cc", samples)
+        assert cache.load("md5:aa") is None
+        assert cache.load("md5:bb") is not None
+        assert cache.load("md5:cc") is not None
+
+
+class TestStatsCache:
+    """Test the two-tier cache of chain statistics."""
+
+    @staticmethod
+    def _stats(nsamples=None):
+        """Return the statistics of a small nested sampling run."""
+        from anesthetic.examples.perfect_ns import gaussian
+
+        np.random.seed(0)
+        return gaussian(30, 2, 1.0, 0.5).stats(nsamples=nsamples)
+
+    def test_miss_then_hit(self):
+        """A result is found under its key once it has been put."""
+        cache = StatsCache()
+        key = ("sha1:aa", 10, None, 1)
+        assert cache.get(key) is None
+        stats = self._stats(10)
+        cache.put(key, stats)
+        assert cache.get(key) is stats
+        assert cache.get(("sha1:aa", 10, None, 2)) is None
+
+    def test_least_recently_used_is_dropped(self):
+        """Beyond ``maxsize`` the least recently used result is dropped."""
+        cache = StatsCache(maxsize=2)
+        stats = self._stats()
+        cache.put(("sha1:aa",), stats)
+        cache.put(("sha1:bb",), stats)
+        cache.get(("sha1:aa",))
+        cache.put(("sha1:cc",), stats)
+        assert cache.get(("sha1:bb",)) is None
+        assert cache.get(("sha1:aa",)) is not None
+
+    @pytest.mark.parametrize("nsamples", [None, 10])
+    def test_disk_tier_outlives_memory(self, tmp_path, nsamples):
+        """Results on disk are found by another cache using the directory."""
+        stats = self._stats(nsamples)
+        key = ("sha1:aa", nsamples, None, 1)
+        StatsCache(directory=str(tmp_path)).put(key, stats)
+        loaded = StatsCache(directory=str(tmp_path)).get(key)
+        assert type(loaded) is type(stats)
+        np.testing.assert_array_equal(np.asarray(loaded), np.asarray(stats))
+        assert loaded.get_labels().tolist() == stats.get_labels().tolist()
+
+    def test_clear_keeps_disk_tier(self, tmp_path):
+        """Clearing forgets results in memory only."""
+        cache = StatsCache(directory=str(tmp_path))
+        cache.put(("sha1:aa",), self._stats())
+        cache.clear()
+        assert cache.get(("sha1:aa",)) is not None
+        assert StatsCache().get(("sha1:aa",)) is None
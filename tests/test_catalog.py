@@ -0,0 +1,106 @@
+"""Tests for the unimpeded catalog module."""
+
+from unittest.mock import patch
+
+import pytest
+
+from unimpeded.catalog import Catalog, components
+from unimpeded.database import Database
+
+COMBINATIONS = {
+    ("lcdm", "planck_2018_CamSpec"),
+    ("lcdm", "bao.desi_dr2"),
+    ("lcdm", "sn.pantheonplus"),
+    ("lcdm", "bao.desi_dr2+planck_2018_CamSpec"),
+    ("lcdm", "bao.desi_dr2+sn.pantheonplus"),
+    ("lcdm", "bao.desi_dr2+planck_2018_CamSpec+sn.pantheonplus"),
+    ("lcdm", "des_y1.joint+planck_2018_CamSpec"),
+    ("klcdm", "bao.desi_dr2"),
+    ("klcdm", "bao.desi_dr2+planck_2018_CamSpec"),
+}
+
+
+@pytest.fixture
+def catalog():
+    """Catalog over a small grid of separate and joint datasets."""
+    return Catalog(COMBINATIONS)
+
+
+class TestCatalog:
+    """Test the Catalog indexes."""
+
+    def test_components(self):
+        """Joint names split on '+', separate names are their own component."""
+        assert components("bao.desi_dr2+planck_2018_CamSpec") == (
+            "bao.desi_dr2",
+            "planck_2018_CamSpec",
+        )
+        assert components("des_y1.joint") == ("des_y1.joint",)
+
+    def test_models_and_datasets(self, catalog):
+        """Model and dataset lists are sorted and unique."""
+        assert catalog.models == ["klcdm", "lcdm"]
+        assert catalog.datasets == sorted({d for _, d in COMBINATIONS})
+        assert catalog.datasets_for("klcdm") == [
+            "bao.desi_dr2",
+            "bao.desi_dr2+planck_2018_CamSpec",
+        ]
+        assert catalog.models_for("bao.desi_dr2") == ["klcdm", "lcdm"]
+        assert catalog.datasets_for("wcdm") == []
+        assert catalog.models_for("unknown") == []
+
+    def test_results_are_copies(self, catalog):
+        """Mutating a query result does not corrupt the index."""
+        catalog.datasets_for("lcdm").clear()
+        assert catalog.datasets_for("lcdm")
+
+    def test_joints_containing(self, catalog):
+        """Every joint holding a component is found, for that model only."""
+        assert catalog.joints_containing("lcdm", "bao.desi_dr2") == [
+            "bao.desi_dr2+planck_2018_CamSpec",
+            "bao.desi_dr2+planck_2018_CamSpec+sn.pantheonplus",
+            "bao.desi_dr2+sn.pantheonplus",
+        ]
+        assert catalog.joints_containing("klcdm", "sn.pantheonplus") == []
+
+    def test_joint_name(self, catalog):
+        """The published joint name is found whatever the component order."""
+        assert (
+            catalog.joint_name("lcdm", ["planck_2018_CamSpec", "bao.desi_dr2"])
+            == "bao.desi_dr2+planck_2018_CamSpec"
+        )
+        missing = ["planck_2018_CamSpec", "sn.pantheonplus"]
+        assert catalog.joint_name("lcdm", missing) is None
+
+    def test_complete_groups(self, catalog):
+        """Only groups with the joint and every separate dataset count."""
+        assert catalog.complete_groups("lcdm") == [
+            ("bao.desi_dr2", "planck_2018_CamSpec"),
+            ("bao.desi_dr2", "sn.pantheonplus"),
+        ]
+        assert catalog.complete_groups("lcdm", size=3) == [
+            ("bao.desi_dr2", "planck_2018_CamSpec", "sn.pantheonplus")
+        ]
+        # planck_2018_CamSpec is missing for klcdm, des_y1.joint for lcdm
+        assert catalog.complete_groups("klcdm") == []
+
+    def test_membership(self, catalog):
+        """The catalog behaves as a container of (model, dataset) pairs."""
+        assert ("klcdm", "bao.desi_dr2") in catalog
+        assert ("klcdm", "planck_2018_CamSpec") not in catalog
+        assert len(catalog) == len(COMBINATIONS)
+
+
+class TestDatabaseCatalog:
+    """Test that Database queries are served by its catalog."""
+
+    @patch.object(Database, "_load_manifest")
+    def test_catalog_follows_manifest(self, mock_load):
+        """The catalog is built from the manifest once it is discovered."""
+        mock_load.return_value = {c: {} for c in COMBINATIONS}
+        db = Database()
+
+        assert db.catalog.complete_groups("lcdm", size=3)
+        assert db.datasets_for("lcdm") == db.catalog.datasets_for("lcdm")
+        assert db.models_for("bao.desi_dr2") == ["klcdm", "lcdm"]
+        assert mock_load.call_count == 1
@@ -1,11 +1,17 @@
 """Tests for the unimpeded database module."""
 
+import hashlib
+import os
 from unittest.mock import MagicMock, patch
 
+import pandas as pd
 import pytest
 
 from unimpeded.database import (
     DEFAULT_GRID_ROOT,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_RESUMES,
+    ChecksumError,
     Database,
     DatabaseCreator,
     DatabaseExplorer,
@@ -102,7 +108,7 @@ class TestDatabase:
 
     def test_combinations_empty(self):
         """Test handling when no unimpeded deposits exist."""
-        with patch("requests.get") as mock_get:
+        with patch("unimpeded.http.Session.get") as mock_get:
             # Mock empty response
             mock_response = MagicMock()
             mock_response.json.return_value = {"hits": {"hits": [], "total": 0}}
@@ -116,33 +122,22 @@ class TestDatabase:
             assert db.datasets == []
 
     def test_fetch_combinations_handles_errors(self):
-        """Test error handling in _fetch_combinations."""
+        """A failed crawl raises, and the next access crawls again."""
         import requests
 
-        with patch("requests.get") as mock_get:
-            # Mock request exception
+        with patch("unimpeded.http.Session.get") as mock_get:
             mock_get.side_effect = requests.RequestException("Network error")
-
-            # Capture printed output
-            import io
-            import sys
-
-            captured_output = io.StringIO()
-            sys.stdout = captured_output
-
             db = Database(sandbox=True)
+            # Discovery is lazy, so the error surfaces on first use
+            with pytest.raises(requests.RequestException):
+                db.combinations
+            assert db._manifest is None
 
-            # Restore stdout
-            sys.stdout = sys.__stdout__
-
-            # Should return empty set on error
+            mock_response = MagicMock()
+            mock_response.json.return_value = {"hits": {"hits": [], "total": 0}}
+            mock_get.side_effect = None
+            mock_get.return_value = mock_response
             assert db.combinations == set()
-            assert db.models == []
-            assert db.datasets == []
-
-            # Verify error was printed
-            output = captured_output.getvalue()
-            assert "Error fetching deposits" in output
 
     @pytest.mark.vcr
     def test_get_filename_samples(self):
@@ -353,9 +348,7 @@ def test_filename_generation_parametrized(sampler, model, dataset, file_type):
 @pytest.fixture
 def mock_creator(monkeypatch):
     """DatabaseCreator with HTTP-free __init__ for mock-based tests."""
-    monkeypatch.setattr(
-        "unimpeded.database.Database._fetch_combinations", lambda self: set()
-    )
+    monkeypatch.setattr("unimpeded.database.Database._fetch_manifest", lambda self: {})
     return DatabaseCreator(sandbox=False, ACCESS_TOKEN="fake-token")
 
 
@@ -493,7 +486,7 @@ class TestGetDepositIdsByTitlePagination:
         r.json = MagicMock(return_value=items)
         return r
 
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.get")
     def test_paginates_until_empty_page(self, mock_get, mock_creator):
         """Two full pages of 25 followed by an empty page should stop after 3 calls."""
         page1 = [{"id": i, "submitted": True} for i in range(1, 26)]
@@ -513,7 +506,7 @@ class TestGetDepositIdsByTitlePagination:
         pages_used = [call.kwargs["params"]["page"] for call in mock_get.call_args_list]
         assert pages_used == [1, 2, 3]
 
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.get")
     def test_stops_on_partial_page(self, mock_get, mock_creator):
         """A short final page ends iteration without a further request."""
         page1 = [{"id": i, "submitted": True} for i in range(1, 26)]
@@ -529,14 +522,14 @@ class TestGetDepositIdsByTitlePagination:
         assert len(ids["unpublished"]) == 10
         assert mock_get.call_count == 2
 
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.get")
     def test_default_size_is_25(self, mock_get, mock_creator):
         """Default page size should be 25 (Zenodo's deposit API cap)."""
         mock_get.side_effect = [self._make_resp([])]
         mock_creator.get_deposit_ids_by_title("unimpeded")
         assert mock_get.call_args.kwargs["params"]["size"] == 25
 
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.get")
     def test_dict_shaped_response(self, mock_get, mock_creator):
         """Should also accept dict {'hits': {'hits': [...]}} responses."""
         hits = [{"id": i, "submitted": True} for i in range(1, 6)]
@@ -555,7 +548,7 @@ class TestGetDepositIdsByTitlePagination:
 class TestPublishReturnValue:
     """Tests for the success/failure bool now returned by publish()."""
 
-    @patch("unimpeded.database.requests.post")
+    @patch("unimpeded.http.Session.post")
     def test_publish_returns_true_on_success(self, mock_post, mock_creator):
         """publish() returns True on a 2xx response."""
         ok_resp = MagicMock()
@@ -567,7 +560,7 @@ class TestPublishReturnValue:
         result = mock_creator.publish(12345, {"title": "unimpeded: lcdm bao.sdss_dr16"})
         assert result is True
 
-    @patch("unimpeded.database.requests.post")
+    @patch("unimpeded.http.Session.post")
     def test_publish_returns_false_on_http_error(self, mock_post, mock_creator):
         """publish() returns False on a 4xx/5xx response."""
         import requests as _requests
@@ -581,7 +574,7 @@ class TestPublishReturnValue:
         result = mock_creator.publish(12345, {"title": "unimpeded: lcdm bao.sdss_dr16"})
         assert result is False
 
-    @patch("unimpeded.database.requests.post")
+    @patch("unimpeded.http.Session.post")
     def test_publish_returns_false_on_generic_error(self, mock_post, mock_creator):
         """publish() returns False on any non-HTTP exception (e.g. connection)."""
         mock_post.side_effect = RuntimeError("connection exploded")
@@ -595,8 +588,8 @@ class TestUploadMethodsForwardGrid:
 
     @patch("unimpeded.database.os.remove")
     @patch("unimpeded.database.read_chains")
-    @patch("unimpeded.database.requests.put")
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.put")
+    @patch("unimpeded.http.Session.get")
     def test_upload_samples_uses_grid_in_path(
         self,
         mock_get,
@@ -635,8 +628,8 @@ class TestUploadMethodsForwardGrid:
         called_path = mock_read.call_args[0][0]
         assert "/new_grid/ns/lcdm/bao.sdss_dr16/" in called_path
 
-    @patch("unimpeded.database.requests.put")
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.put")
+    @patch("unimpeded.http.Session.get")
     def test_upload_yaml_uses_grid_in_path(
         self, mock_get, mock_put, mock_creator, tmp_path, monkeypatch
     ):
@@ -671,8 +664,8 @@ class TestUploadMethodsForwardGrid:
         assert captured["grid"] == "grid"
         assert "/grid/ns/" in captured["path"]
 
-    @patch("unimpeded.database.requests.put")
-    @patch("unimpeded.database.requests.get")
+    @patch("unimpeded.http.Session.put")
+    @patch("unimpeded.http.Session.get")
     def test_upload_prior_info_uses_grid_in_path(
         self, mock_get, mock_put, mock_creator, tmp_path, monkeypatch
     ):
@@ -706,3 +699,1450 @@ class TestUploadMethodsForwardGrid:
 
         assert captured["grid"] == "new_grid"
         assert "/new_grid/ns/" in captured["path"]
+
+
+class TestCatalogCache:
+    """Tests for the on-disk catalog cache used by Database construction."""
+
+    @staticmethod
+    def _page(*titles):
+        r = MagicMock()
+        r.raise_for_status = MagicMock()
+        hits = [{"metadata": {"title": f"unimpeded: {t}"}} for t in titles]
+        r.json = MagicMock(return_value={"hits": {"hits": hits, "total": len(hits)}})
+        return r
+
+    @patch("unimpeded.http.Session.get")
+    def test_fetch_writes_cache_and_second_instance_reuses_it(
+        self, mock_get, isolated_cache_dir
+    ):
+        """A fresh catalog is persisted, and later instances make no requests."""
+        mock_get.return_value = self._page("lcdm planck_2018_plik")
+
+        first = Database()
+        assert first.combinations == {("lcdm", "planck_2018_plik")}
+        assert (isolated_cache_dir / "catalog.json").exists()
+
+        mock_get.reset_mock()
+        second = Database()
+        mock_get.assert_not_called()
+        assert second.combinations == {("lcdm", "planck_2018_plik")}
+        assert second._refresh_thread is None
+
+    @patch("unimpeded.http.Session.get")
+    def test_sandbox_has_its_own_cache(self, mock_get, isolated_cache_dir):
+        """The sandbox and production catalogs are cached separately."""
+        mock_get.return_value = self._page("lcdm bao.sdss_dr16")
+        Database(sandbox=True).combinations
+        assert (isolated_cache_dir / "catalog-sandbox.json").exists()
+        assert not (isolated_cache_dir / "catalog.json").exists()
+
+    @patch("unimpeded.http.Session.get")
+    def test_stale_cache_is_served_then_refreshed(self, mock_get, monkeypatch):
+        """A stale catalog is returned immediately and replaced in the background."""
+        mock_get.return_value = self._page("lcdm planck_2018_plik")
+        Database().combinations
+
+        monkeypatch.setattr("unimpeded.database.CATALOG_TTL", -1)
+        mock_get.return_value = self._page(
+            "lcdm planck_2018_plik", "wlcdm des_y1.joint"
+        )
+        db = Database()
+        db.combinations
+        db._refresh_thread.join(timeout=10)
+
+        assert db.combinations == {
+            ("lcdm", "planck_2018_plik"),
+            ("wlcdm", "des_y1.joint"),
+        }
+        monkeypatch.setattr("unimpeded.database.CATALOG_TTL", 3600)
+        mock_get.reset_mock()
+        assert ("wlcdm", "des_y1.joint") in Database().combinations
+        mock_get.assert_not_called()
+
+    @patch("unimpeded.http.Session.get")
+    def test_refresh_installs_catalog_under_lock(self, mock_get):
+        """A refresh waits for readers before swapping in the new catalog."""
+        import threading
+
+        mock_get.return_value = self._page("lcdm planck_2018_plik")
+        db = Database()
+        db.combinations
+        mock_get.return_value = self._page(
+            "lcdm planck_2018_plik", "wlcdm des_y1.joint"
+        )
+        refresh = threading.Thread(target=db._refresh_manifest)
+        with db._catalog_lock:
+            refresh.start()
+            refresh.join(timeout=0.5)
+            assert refresh.is_alive()
+            assert db.combinations == {("lcdm", "planck_2018_plik")}
+        refresh.join(timeout=10)
+        assert db.catalog.datasets_for("wlcdm") == ["des_y1.joint"]
+
+    @patch("unimpeded.http.Session.get")
+    def test_failed_refresh_keeps_cached_catalog(self, mock_get, monkeypatch):
+        """A background refresh that fails leaves the cached copy in place."""
+        import requests
+
+        mock_get.return_value = self._page("lcdm planck_2018_plik")
+        Database().combinations
+
+        monkeypatch.setattr("unimpeded.database.CATALOG_TTL", -1)
+        mock_get.side_effect = requests.RequestException("Network error")
+        db = Database()
+        db.combinations
+        db._refresh_thread.join(timeout=10)
+        assert db.combinations == {("lcdm", "planck_2018_plik")}
+
+        mock_get.side_effect = None
+        mock_get.reset_mock()
+        monkeypatch.setattr("unimpeded.database.CATALOG_TTL", 3600)
+        assert Database().combinations == {("lcdm", "planck_2018_plik")}
+        mock_get.assert_not_called()
+
+    @patch("unimpeded.http.Session.get")
+    def test_refresh_forces_a_fetch(self, mock_get):
+        """refresh=True bypasses a fresh cache and rewrites it."""
+        mock_get.return_value = self._page("lcdm planck_2018_plik")
+        Database().combinations
+
+        mock_get.return_value = self._page("klcdm sn.pantheon")
+        assert DatabaseExplorer(refresh=True).combinations == {("klcdm", "sn.pantheon")}
+        assert Database().combinations == {("klcdm", "sn.pantheon")}
+
+    @patch("unimpeded.http.Session.get")
+    def test_failed_fetch_is_not_cached(self, mock_get, isolated_cache_dir):
+        """An incomplete catalog from a failed crawl is never persisted."""
+        import requests
+
+        mock_get.side_effect = requests.RequestException("Network error")
+        with pytest.raises(requests.RequestException):
+            Database().combinations
+        assert not (isolated_cache_dir / "catalog.json").exists()
+
+    def test_corrupt_cache_is_refetched(self, isolated_cache_dir):
+        """An unreadable cache file is treated as missing."""
+        isolated_cache_dir.mkdir()
+        (isolated_cache_dir / "catalog.json").write_text("{not json")
+        with patch("unimpeded.http.Session.get") as mock_get:
+            mock_get.return_value = self._page("lcdm planck_2018_plik")
+            assert Database().combinations == {("lcdm", "planck_2018_plik")}
+
+
+class TestLazyDiscovery:
+    """Tests that the catalog is only discovered when something needs it."""
+
+    @patch("unimpeded.http.Session.get")
+    def test_construction_makes_no_requests(self, mock_get):
+        """No class contacts Zenodo until the catalog is used."""
+        Database()
+        DatabaseExplorer()
+        DatabaseCreator(sandbox=False, ACCESS_TOKEN="fake-token")
+        mock_get.assert_not_called()
+
+    @patch("unimpeded.http.Session.get")
+    def test_every_query_triggers_discovery(self, mock_get):
+        """Each catalog query discovers the catalog on first use."""
+        mock_get.return_value = TestCatalogCache._page("lcdm planck_2018_plik")
+        queries = [
+            lambda db: db.combinations,
+            lambda db: db.models,
+            lambda db: db.datasets,
+            lambda db: db.datasets_for("lcdm"),
+            lambda db: db.models_for("planck_2018_plik"),
+            lambda db: db.is_available("lcdm", "planck_2018_plik"),
+        ]
+        for query in queries:
+            mock_get.reset_mock()
+            query(Database(refresh=True))
+            assert mock_get.call_count == 1
+
+    @patch("unimpeded.database.Database._load_manifest")
+    def test_discovery_runs_once_per_instance(self, mock_load):
+        """Concurrent and repeated queries share a single discovery."""
+        import threading
+
+        mock_load.return_value = {("lcdm", "planck_2018_plik"): {}}
+        db = Database()
+        threads = [threading.Thread(target=lambda: db.models) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        db.datasets_for("lcdm")
+        db.is_available("lcdm", "planck_2018_plik")
+        assert mock_load.call_count == 1
+
+
+def _hit(model, dataset, record_id, version=0, keys=()):
+    """Build a records-search hit for a deposit holding ``keys``.
+
+    ``keys`` maps each file key to its content, from which its published size
+    and checksum are derived; a plain sequence of keys gives every file the
+    content of a prior_info file.
+    """
+    if not isinstance(keys, dict):
+        keys = {key: PRIOR_INFO_CONTENT for key in keys}
+    url = f"https://zenodo.org/api/records/{record_id}/files"
+    return {
+        "id": record_id,
+        "metadata": {
+            "title": f"unimpeded: {model} {dataset}",
+            "relations": {"version": [{"index": version}]},
+        },
+        "links": {
+            "archive": f"https://zenodo.org/api/records/{record_id}/files-archive"
+        },
+        "files": [
+            {
+                "key": key,
+                "size": len(content),
+                "checksum": f"md5:{hashlib.md5(content).hexdigest()}",
+                "links": {"self": f"{url}/{key}/content"},
+            }
+            for key, content in keys.items()
+        ],
+    }
+
+
+PRIOR_INFO_CONTENT = b"nprior = 10\nndiscarded = 20\n"
+
+
+def _search_response(*hits):
+    r = MagicMock()
+    r.raise_for_status = MagicMock()
+    r.status_code = 200
+    r.json = MagicMock(return_value={"hits": {"hits": list(hits), "total": len(hits)}})
+    return r
+
+
+def _file_response(content, chunk_size=4):
+    r = MagicMock()
+    r.raise_for_status = MagicMock()
+    r.status_code = 200
+    r.iter_content.return_value = [
+        content[i : i + chunk_size] for i in range(0, len(content), chunk_size)
+    ]
+    return r
+
+
+class TestManifest:
+    """Tests for the deposit manifest built from the catalog crawl."""
+
+    PRIOR_INFO = "ns_lcdm_planck_2018_plik.prior_info"
+
+    @patch("unimpeded.http.Session.get")
+    def test_crawl_records_ids_versions_and_files(self, mock_get):
+        """Every hit is indexed with its record id, version and file links."""
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "planck_2018_plik", 11, version=2, keys=[self.PRIOR_INFO])
+        )
+        entry = Database().manifest["lcdm", "planck_2018_plik"]
+        assert entry["id"] == 11
+        assert entry["version"] == 2
+        assert entry["archive"] == "https://zenodo.org/api/records/11/files-archive"
+        assert entry["files"][self.PRIOR_INFO] == {
+            "url": f"https://zenodo.org/api/records/11/files/{self.PRIOR_INFO}/content",
+            "size": len(PRIOR_INFO_CONTENT),
+            "checksum": "md5:7060ea4c7b80b4a9cb4c10a121950dd7",
+        }
+
+    @patch("unimpeded.http.Session.get")
+    def test_manifest_round_trips_through_cache(self, mock_get):
+        """The cached catalog restores the full manifest, not just the pairs."""
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "planck_2018_plik", 11, keys=[self.PRIOR_INFO]),
+            _hit("wlcdm", "bao.sdss_dr16", 12),
+        )
+        fetched = Database().manifest
+        mock_get.reset_mock()
+        cached = Database().manifest
+        mock_get.assert_not_called()
+        assert cached == fetched
+
+    @patch("unimpeded.http.Session.get")
+    def test_newest_version_wins(self, mock_get):
+        """If a title appears twice, the later version is kept."""
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "planck_2018_plik", 21, version=1),
+            _hit("lcdm", "planck_2018_plik", 11, version=0),
+        )
+        assert Database().manifest["lcdm", "planck_2018_plik"]["id"] == 21
+
+    @patch("unimpeded.http.Session.get")
+    def test_download_goes_straight_to_file_url(self, mock_get):
+        """With the catalog known, a download is a single request for the file."""
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "planck_2018_plik", 11, keys=[self.PRIOR_INFO])
+        )
+        explorer = DatabaseExplorer()
+        explorer.manifest
+
+        mock_get.reset_mock()
+        mock_get.return_value = _file_response(b"nprior = 10\nndiscarded = 20\n")
+        info = explorer.download_prior_info("lcdm", "planck_2018_plik")
+
+        assert info == {"nprior": 10, "ndiscarded": 20}
+        mock_get.assert_called_once()
+        assert mock_get.call_args.args[0].endswith(f"{self.PRIOR_INFO}/content")
+
+    @patch("unimpeded.http.Session.get")
+    def test_uncached_deposit_is_searched_once(self, mock_get):
+        """Without a catalog, each deposit costs one title search, not a crawl."""
+        samples_key = "ns_lcdm_planck_2018_plik.yaml"
+        keys = {self.PRIOR_INFO: PRIOR_INFO_CONTENT, samples_key: b"likelihood: {}\n"}
+        search = _search_response(_hit("lcdm", "planck_2018_plik", 11, keys=keys))
+        mock_get.side_effect = [
+            search,
+            _file_response(keys[self.PRIOR_INFO]),
+            _file_response(keys[samples_key]),
+        ]
+        explorer = DatabaseExplorer()
+        explorer.download_prior_info("lcdm", "planck_2018_plik")
+        assert explorer.download_info("ns", "lcdm", "planck_2018_plik") == {
+            "likelihood": {}
+        }
+        assert mock_get.call_count == 3
+        assert "q" in mock_get.call_args_list[0].kwargs["params"]
+        assert explorer._manifest is None
+
+    @patch("unimpeded.http.Session.get")
+    def test_missing_file_raises_lookup_error(self, mock_get, capsys):
+        """download raises for a file the deposit lacks; the wrappers say so."""
+        record = MagicMock(status_code=200)
+        record.json.return_value = {"files": []}
+        mock_get.side_effect = [
+            _search_response(_hit("lcdm", "planck_2018_plik", 11)),
+            record,
+        ]
+        explorer = DatabaseExplorer()
+        assert explorer.download_prior_info("lcdm", "planck_2018_plik") is None
+        assert f"Deposit 11 has no file {self.PRIOR_INFO}." in capsys.readouterr().out
+
+        mock_get.side_effect = None
+        mock_get.return_value = record
+        with pytest.raises(LookupError, match="has no file"):
+            explorer.download(11, self.PRIOR_INFO)
+
+    @patch("unimpeded.http.Session.get")
+    def test_search_requires_exact_title(self, mock_get):
+        """A joint deposit matching the phrase search is not mistaken for a part."""
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "bao.sdss_dr16+planck_2018_plik", 31)
+        )
+        explorer = DatabaseExplorer()
+        assert (
+            explorer.get_deposit_id_by_title_users("lcdm", "planck_2018_plik") is None
+        )
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "bao.sdss_dr16+planck_2018_plik", 31),
+            _hit("lcdm", "planck_2018_plik", 11),
+        )
+        assert explorer.get_deposit_id_by_title_users("lcdm", "planck_2018_plik") == 11
+
+    @patch("unimpeded.http.Session.get")
+    def test_failed_search_raises(self, mock_get, capsys):
+        """A lookup that cannot reach Zenodo raises, and is not remembered."""
+        import requests
+
+        mock_get.side_effect = requests.ConnectionError("no route to host")
+        explorer = DatabaseExplorer()
+        with pytest.raises(requests.ConnectionError):
+            explorer.download_prior_info("lcdm", "planck_2018_plik")
+        with pytest.raises(requests.ConnectionError):
+            explorer.get_deposit_id_by_title_users("lcdm", "planck_2018_plik")
+
+        mock_get.side_effect = [
+            _search_response(
+                _hit("lcdm", "planck_2018_plik", 11, keys=[self.PRIOR_INFO])
+            ),
+            _file_response(PRIOR_INFO_CONTENT),
+        ]
+        assert explorer.download_prior_info("lcdm", "planck_2018_plik") is not None
+
+
+class TestConcurrentCatalogPages:
+    """Tests for fetching catalog pages concurrently after the first."""
+
+    @staticmethod
+    def _pages(total, barrier=None, fail=None):
+        """Serve pages of 25 hits (one per model) out of ``total``."""
+        import requests
+
+        def get(url, params):
+            page = params["page"]
+            if page > 1 and barrier is not None:
+                barrier.wait()
+            if page == fail:
+                raise requests.ConnectionError(f"page {page} failed")
+            first = (page - 1) * 25
+            hits = [
+                _hit(f"m{i}", "planck_2018_plik", i)
+                for i in range(first, min(first + 25, total))
+            ]
+            r = _search_response(*hits)
+            r.json.return_value["hits"]["total"] = total
+            return r
+
+        return get
+
+    @patch("unimpeded.http.Session.get")
+    def test_remaining_pages_are_fetched_concurrently(self, mock_get):
+        """Pages 2 and 3 are in flight together once page 1 reports the total."""
+        import threading
+
+        mock_get.side_effect = self._pages(60, barrier=threading.Barrier(2, timeout=5))
+        manifest = Database().manifest
+
+        assert len(manifest) == 60
+        assert sorted(c.kwargs["params"]["page"] for c in mock_get.call_args_list) == [
+            1,
+            2,
+            3,
+        ]
+
+    @patch("unimpeded.http.Session.get")
+    def test_single_page_makes_one_request(self, mock_get):
+        """A catalog that fits in the first page needs no further requests."""
+        mock_get.side_effect = self._pages(20)
+        assert len(Database().combinations) == 20
+        assert mock_get.call_count == 1
+
+    @patch("unimpeded.http.Session.get")
+    def test_failed_page_raises(self, mock_get, isolated_cache_dir):
+        """A failing page discards the pages before it instead of a partial grid."""
+        import requests
+
+        mock_get.side_effect = self._pages(80, fail=3)
+        db = Database()
+        with pytest.raises(requests.RequestException, match="page 3 failed"):
+            db.manifest
+        assert db._manifest is None
+        assert not (isolated_cache_dir / "catalog.json").exists()
+
+
+def _chain_csv(n=50, seed=0):
+    """CSV bytes of a small nested sampling chain, as published on Zenodo."""
+    from io import StringIO
+
+    import numpy as np
+    from anesthetic import NestedSamples
+
+    rng = np.random.default_rng(seed)
+    samples = NestedSamples(
+        data=rng.random((n, 2)),
+        columns=["a", "b"],
+        logL=np.sort(rng.random(n)),
+        logL_birth=-np.inf,
+        labels={"a": r"$a$", "b": r"$b$"},
+    )
+    buffer = StringIO()
+    samples.to_csv(buffer)
+    return buffer.getvalue().encode()
+
+
+class TestStreamingDownload:
+    """Tests for streaming files to disk rather than buffering them."""
+
+    URL = "https://zenodo.org/api/records/11/files/ns_lcdm_planck_2018_plik.csv"
+
+    @patch("unimpeded.http.Session.get")
+    def test_chain_is_streamed_in_chunks(self, mock_get):
+        """A chain arrives in chunks and is parsed from the spooled file."""
+        from anesthetic.samples import NestedSamples
+
+        content = _chain_csv()
+        mock_get.return_value = _file_response(content, chunk_size=256)
+
+        samples = DatabaseExplorer()._download_file(
+            "ns_lcdm_planck_2018_plik.csv", self.URL
+        )
+
+        assert isinstance(samples, NestedSamples)
+        assert len(samples) == 50
+        assert mock_get.call_args.kwargs["stream"] is True
+        mock_get.return_value.iter_content.assert_called_once_with(
+            chunk_size=DOWNLOAD_CHUNK_SIZE
+        )
+        mock_get.return_value.close.assert_called_once()
+
+    @patch("unimpeded.http.Session.get")
+    def test_yaml_is_streamed(self, mock_get):
+        """YAML files are parsed from the spooled bytes too."""
+        mock_get.return_value = _file_response(b"likelihood:\n  bao: null\n")
+        info = DatabaseExplorer()._download_file("info.yaml", self.URL)
+        assert info == {"likelihood": {"bao": None}}
+
+    @patch("unimpeded.http.Session.get")
+    def test_connection_released_on_error(self, mock_get):
+        """The streamed connection is closed when the download fails."""
+        import requests
+
+        mock_get.return_value = _file_response(b"")
+        mock_get.return_value.raise_for_status.side_effect = requests.HTTPError()
+        with pytest.raises(requests.HTTPError):
+            DatabaseExplorer()._download_file("info.yaml", self.URL)
+        mock_get.return_value.close.assert_called_once()
+
+
+class TestFileCache:
+    """Tests for reusing downloaded files across DatabaseExplorer instances."""
+
+    FILENAME = "ns_lcdm_planck_2018_plik.prior_info"
+    CONTENT = PRIOR_INFO_CONTENT
+    CHECKSUM = "md5:7060ea4c7b80b4a9cb4c10a121950dd7"
+
+    def _download(self, checksum=CHECKSUM, **kwargs):
+        url = f"https://zenodo.org/api/records/11/files/{self.FILENAME}/content"
+        return DatabaseExplorer(**kwargs)._download_file(self.FILENAME, url, checksum)
+
+    @patch("unimpeded.http.Session.get")
+    def test_file_is_fetched_once(self, mock_get, isolated_cache_dir):
+        """A second instance loads the file from disk without any request."""
+        mock_get.return_value = _file_response(self.CONTENT)
+        assert self._download() == {"nprior": 10, "ndiscarded": 20}
+        assert self._download() == {"nprior": 10, "ndiscarded": 20}
+        assert mock_get.call_count == 1
+        digest = self.CHECKSUM[4:]
+        assert (isolated_cache_dir / "files" / "md5" / digest[:2] / digest).exists()
+
+    @patch("unimpeded.http.Session.get")
+    def test_new_checksum_misses(self, mock_get):
+        """A changed file, with a new checksum, is downloaded afresh."""
+        new_content = b"nprior = 10\nndiscarded = 30\n"
+        mock_get.side_effect = [
+            _file_response(self.CONTENT),
+            _file_response(new_content),
+        ]
+        self._download()
+        new_checksum = "md5:" + hashlib.md5(new_content).hexdigest()
+        assert self._download(new_checksum) == {"nprior": 10, "ndiscarded": 30}
+        assert mock_get.call_count == 2
+
+    @patch("unimpeded.http.Session.get")
+    def test_unchanged_file_hits_across_versions(self, mock_get):
+        """The same file in a new deposit version is not downloaded again."""
+        mock_get.return_value = _search_response(
+            _hit("lcdm", "planck_2018_plik", 11, keys=[self.FILENAME])
+        )
+        dbe = DatabaseExplorer()
+        dbe.manifest
+        checksum = dbe.manifest["lcdm", "planck_2018_plik"]["files"][self.FILENAME][
+            "checksum"
+        ]
+        mock_get.return_value = _file_response(self.CONTENT)
+        dbe.download_prior_info("lcdm", "planck_2018_plik")
+
+        mock_get.reset_mock()
+        new_version = _hit("lcdm", "planck_2018_plik", 12, 1, keys=[self.FILENAME])
+        assert new_version["files"][0]["checksum"] == checksum
+        mock_get.return_value = _search_response(new_version)
+        dbe = DatabaseExplorer(refresh=True)
+        assert dbe.download_prior_info("lcdm", "planck_2018_plik") == {
+            "nprior": 10,
+            "ndiscarded": 20,
+        }
+        assert mock_get.call_count == 1  # the catalog only
+
+    @patch("unimpeded.http.Session.get")
+    def test_cache_can_be_disabled(self, mock_get, isolated_cache_dir):
+        """With file_cache=False nothing is kept on disk."""
+        mock_get.side_effect = lambda *a, **k: _file_response(self.CONTENT)
+        self._download(file_cache=False)
+        self._download(file_cache=False)
+        assert mock_get.call_count == 2
+        assert not (isolated_cache_dir / "files").exists()
+
+    @patch("unimpeded.http.Session.get")
+    def test_failed_download_is_not_cached(self, mock_get):
+        """A download that fails for good never enters the cache."""
+        import requests
+
+        response = _file_response(self.CONTENT)
+        response.iter_content.side_effect = requests.ConnectionError("reset")
+        mock_get.return_value = response
+        with pytest.raises(requests.ConnectionError):
+            self._download()
+        assert DatabaseExplorer().file_cache.get(self.CHECKSUM) is None
+
+
+def _interrupted_response(content, status=200):
+    """A streamed response that drops the connection after ``content``."""
+    import requests
+
+    def chunks(chunk_size):
+        yield content
+        raise requests.exceptions.ChunkedEncodingError("connection broken")
+
+    r = _file_response(b"")
+    r.status_code = status
+    r.iter_content.side_effect = chunks
+    return r
+
+    @patch("unimpeded.http.Session.get")
+    def test_file_evicted_before_open_is_downloaded_again(self, mock_get):
+        """A file another process evicts before it is opened is a cache miss."""
+        from unimpeded.cache import FileCache
+
+        mock_get.side_effect = lambda *a, **k: _file_response(self.CONTENT)
+        self._download()
+        original = FileCache.open
+        evicted = []
+
+        def evict_then_open(cache, checksum):
+            if not evicted:
+                evicted.append(checksum)
+                os.remove(cache.path(checksum))
+            return original(cache, checksum)
+
+        with patch.object(FileCache, "open", evict_then_open):
+            assert self._download() == {"nprior": 10, "ndiscarded": 20}
+        assert evicted == [self.CHECKSUM]
+        assert mock_get.call_count == 2
+
+
+class TestResumableDownload:
+    """Tests for resuming interrupted downloads and verifying them."""
+
+    FILENAME = "ns_lcdm_planck_2018_plik.csv"
+    URL = f"https://zenodo.org/api/records/11/files/{FILENAME}/content"
+    CONTENT = _chain_csv()
+    CHECKSUM = "md5:" + hashlib.md5(CONTENT).hexdigest()
+
+    def _download(self, checksum=CHECKSUM, size=len(CONTENT), **kwargs):
+        return DatabaseExplorer(**kwargs)._download_file(
+            self.FILENAME, self.URL, checksum, size
+        )
+
+    @patch("unimpeded.http.Session.get")
+    def test_interrupted_download_resumes(self, mock_get):
+        """After a dropped connection only the missing bytes are requested."""
+        partial = _file_response(self.CONTENT[1000:])
+        partial.status_code = 206
+        mock_get.side_effect = [_interrupted_response(self.CONTENT[:1000]), partial]
+
+        assert len(self._download()) == 50
+        assert mock_get.call_args_list[0].kwargs["headers"] is None
+        assert mock_get.call_args_list[1].kwargs["headers"] == {"Range": "bytes=1000-"}
+
+    @patch("unimpeded.http.Session.get")
+    def test_short_response_resumes(self, mock_get):
+        """A body that ends early, without an error, is completed too."""
+        partial = _file_response(self.CONTENT[700:])
+        partial.status_code = 206
+        mock_get.side_effect = [_file_response(self.CONTENT[:700]), partial]
+        assert len(self._download()) == 50
+        assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=700-"}
+
+    @patch("unimpeded.http.Session.get")
+    def test_range_ignored_restarts(self, mock_get):
+        """A server answering a Range request with the whole file starts over."""
+        mock_get.side_effect = [
+            _interrupted_response(self.CONTENT[:1000]),
+            _file_response(self.CONTENT),
+        ]
+        assert len(self._download()) == 50
+
+    @patch("unimpeded.http.Session.get")
+    def test_partial_file_survives_the_process(self, mock_get):
+        """A download left unfinished is resumed by the next attempt."""
+        dbe = DatabaseExplorer()
+        with dbe.file_cache.open_partial(self.CHECKSUM) as fp:
+            fp.write(self.CONTENT[:1234])
+        partial = _file_response(self.CONTENT[1234:])
+        partial.status_code = 206
+        mock_get.return_value = partial
+
+        assert len(self._download()) == 50
+        assert mock_get.call_count == 1
+        assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=1234-"}
+
+    @patch("unimpeded.http.Session.get")
+    def test_gives_up_without_progress(self, mock_get):
+        """Repeated interruptions that bring no data eventually raise."""
+        import requests
+
+        mock_get.side_effect = lambda *a, **k: _interrupted_response(b"")
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            self._download()
+        assert mock_get.call_count == DOWNLOAD_RESUMES
+
+    @patch("unimpeded.http.Session.get")
+    def test_checksum_mismatch_raises(self, mock_get):
+        """Corrupt data is rejected, not cached, and not resumed from."""
+        corrupt = self.CONTENT.replace(b"0.", b"1.", 1)
+        mock_get.return_value = _file_response(corrupt)
+        with pytest.raises(ChecksumError, match="checksum"):
+            self._download()
+
+        dbe = DatabaseExplorer()
+        assert dbe.file_cache.get(self.CHECKSUM) is None
+        with dbe.file_cache.open_partial(self.CHECKSUM) as fp:
+            assert fp.read() == b""
+
+    @patch("unimpeded.http.Session.get")
+    def test_truncated_download_raises(self, mock_get):
+        """A file that never arrives in full is an error, not a short DataFrame."""
+        mock_get.side_effect = lambda *a, **k: _file_response(b"")
+        with pytest.raises(ChecksumError, match=f"0 of {len(self.CONTENT)} bytes"):
+            self._download(file_cache=False)
+
+    @patch("unimpeded.http.Session.get")
+    def test_verification_can_be_disabled(self, mock_get, monkeypatch):
+        """With verify_checksums off, whatever arrives is loaded."""
+        monkeypatch.setattr(DatabaseExplorer, "verify_checksums", False)
+        mock_get.return_value = _file_response(self.CONTENT)
+        assert len(self._download(checksum="md5:00ff", size=10)) == 50
+        assert mock_get.call_count == 1
+
+
+class TestSegmentedDownload:
+    """Tests for downloading large files as concurrent byte ranges."""
+
+    FILENAME = TestResumableDownload.FILENAME
+    URL = TestResumableDownload.URL
+    CONTENT = TestResumableDownload.CONTENT
+    CHECKSUM = TestResumableDownload.CHECKSUM
+
+    @pytest.fixture(autouse=True)
+    def small_segments(self, monkeypatch):
+        """Segment any file of at least 100 bytes."""
+        monkeypatch.setattr("unimpeded.database.SEGMENT_MIN_SIZE", 100)
+
+    def _serve(self, interrupt=None):
+        """Answer Range requests with 206 and the requested slice."""
+        import re
+
+        def get(url, stream, headers=None):
+            first, last = re.match(r"bytes=(\d+)-(\d*)", headers["Range"]).groups()
+            first = int(first)
+            last = int(last) + 1 if last else len(self.CONTENT)
+            if interrupt is not None and first == interrupt[0]:
+                r = _interrupted_response(self.CONTENT[first : interrupt[1]], 206)
+            else:
+                r = _file_response(self.CONTENT[first:last], chunk_size=97)
+                r.status_code = 206
+            return r
+
+        return get
+
+    def _download(self, **kwargs):
+        return DatabaseExplorer(**kwargs)._download_file(
+            self.FILENAME, self.URL, self.CHECKSUM, len(self.CONTENT)
+        )
+
+    @patch("unimpeded.http.Session.get")
+    def test_file_is_split_into_ranges(self, mock_get):
+        """Each segment is requested once and the file assembled in order."""
+        mock_get.side_effect = self._serve()
+        samples = self._download(download_segments=4)
+
+        assert len(samples) == 50
+        size = len(self.CONTENT)
+        bounds = [size * i // 4 for i in range(5)]
+        assert sorted(
+            c.kwargs["headers"]["Range"] for c in mock_get.call_args_list
+        ) == sorted(f"bytes={a}-{b - 1}" for a, b in zip(bounds[:-1], bounds[1:]))
+
+    @patch("unimpeded.http.Session.get")
+    def test_interrupted_segment_resumes(self, mock_get):
+        """A dropped segment resumes from where it stopped."""
+        size = len(self.CONTENT)
+        second = size // 3
+        mock_get.side_effect = self._serve(interrupt=(second, second + 50))
+        assert len(self._download(download_segments=3)) == 50
+        ranges = [c.kwargs["headers"]["Range"] for c in mock_get.call_args_list]
+        assert f"bytes={second + 50}-{2 * size // 3 - 1}" in ranges
+
+    @patch("unimpeded.http.Session.get")
+    def test_failed_segment_resumes_in_next_attempt(self, mock_get):
+        """Ranges left unfinished are resumed by a later call, not refetched."""
+        import re
+
+        import requests
+
+        size = len(self.CONTENT)
+        second, third = size // 3, 2 * size // 3
+        serve = self._serve()
+
+        def get(url, stream, headers=None):
+            first = int(re.match(r"bytes=(\d+)-", headers["Range"]).group(1))
+            if first == second:
+                return _interrupted_response(self.CONTENT[second : second + 50], 206)
+            if second < first < third:
+                return _interrupted_response(b"", 206)
+            return serve(url, stream, headers)
+
+        mock_get.side_effect = get
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            self._download(download_segments=3)
+        dbe = DatabaseExplorer()
+        assert dbe.file_cache.get(self.CHECKSUM) is None
+        partial = dbe.file_cache.path(self.CHECKSUM)
+        directory, name = os.path.split(partial)
+        assert os.path.exists(os.path.join(directory, f".{name}.part.segments"))
+
+        mock_get.reset_mock()
+        mock_get.side_effect = serve
+        assert len(self._download(download_segments=3)) == 50
+        assert [c.kwargs["headers"] for c in mock_get.call_args_list] == [
+            {"Range": f"bytes={second + 50}-{third - 1}"}
+        ]
+        assert dbe.file_cache.get(self.CHECKSUM) is not None
+        assert os.listdir(directory) == [name]
+
+    @patch("unimpeded.http.Session.get")
+    def test_range_ignored_falls_back_to_one_stream(self, mock_get):
+        """A server that sends the whole file is read as a single stream."""
+        mock_get.return_value = _file_response(self.CONTENT)
+        assert len(self._download(download_segments=4)) == 50
+        assert mock_get.call_count == 1
+
+    @patch("unimpeded.http.Session.get")
+    def test_small_files_use_one_stream(self, mock_get, monkeypatch):
+        """Files below SEGMENT_MIN_SIZE, or one segment, are not split."""
+        mock_get.side_effect = lambda *a, **k: _file_response(self.CONTENT)
+        self._download(download_segments=1)
+        monkeypatch.setattr("unimpeded.database.SEGMENT_MIN_SIZE", 10**9)
+        self._download(download_segments=4, file_cache=False, samples_cache=False)
+        assert [c.kwargs["headers"] for c in mock_get.call_args_list] == [None, None]
+
+
+class TestSamplesCache:
+    """Tests for reloading parsed chains from their columnar sidecars."""
+
+    FILENAME = TestResumableDownload.FILENAME
+    URL = TestResumableDownload.URL
+    CONTENT = TestResumableDownload.CONTENT
+    CHECKSUM = TestResumableDownload.CHECKSUM
+
+    def _download(self, **kwargs):
+        return DatabaseExplorer(**kwargs)._download_file(
+            self.FILENAME, self.URL, self.CHECKSUM
+        )
+
+    @patch("unimpeded.database.DatabaseExplorer._load_file")
+    @patch("unimpeded.http.Session.get")
+    def test_chain_is_parsed_once(self, mock_get, mock_load, isolated_cache_dir):
+        """A second instance rebuilds the chain without reading the CSV."""
+        from anesthetic import read_csv
+
+        mock_get.return_value = _file_response(self.CONTENT)
+        mock_load.side_effect = lambda filename, fp, *options: read_csv(fp)
+        first = self._download()
+        second = self._download()
+
+        assert mock_get.call_count == 1
+        assert mock_load.call_count == 1
+        assert type(second) is type(first)
+        pd.testing.assert_frame_equal(second, first)
+        digest = self.CHECKSUM[4:]
+        entry = isolated_cache_dir / "samples" / "md5" / digest[:2] / digest
+        assert (entry / "meta.json").exists()
+
+    @patch("unimpeded.http.Session.get")
+    def test_cache_can_be_disabled(self, mock_get, isolated_cache_dir):
+        """With samples_cache=False no sidecar is written."""
+        mock_get.return_value = _file_response(self.CONTENT)
+        self._download(samples_cache=False)
+        assert not (isolated_cache_dir / "samples").exists()
+
+
+class TestColumnProjection:
+    """Tests for parsing and keeping only some columns of a chain."""
+
+    CONTENT = _chain_csv()
+
+    @staticmethod
+    def _names(samples):
+        return list(samples.columns.get_level_values(0))
+
+    @patch("unimpeded.http.Session.get")
+    def test_only_requested_columns_are_parsed(self, mock_get, chain_explorer):
+        """Unwanted columns are skipped while parsing the CSV."""
+        from io import BytesIO
+
+        from anesthetic import NestedSamples, read_csv
+
+        dbe = chain_explorer(mock_get, self.CONTENT, samples_cache=False)
+        with patch("pandas.read_csv", wraps=pd.read_csv) as mock_read:
+            samples = dbe.download_samples(
+                "ns", "lcdm", "planck_2018_plik", columns=["b"]
+            )
+        assert mock_read.call_args.kwargs["usecols"] == [0, 1, 3, 4, 5, 6]
+        assert isinstance(samples, NestedSamples)
+        assert self._names(samples) == ["b", "logL", "logL_birth", "nlive"]
+        full = read_csv(BytesIO(self.CONTENT))
+        pd.testing.assert_frame_equal(
+            samples, full[["b", "logL", "logL_birth", "nlive"]]
+        )
+        assert samples.logZ() == pytest.approx(full.logZ())
+
+    @patch("unimpeded.http.Session.get")
+    def test_empty_selection_keeps_required_columns(self, mock_get, chain_explorer):
+        """columns=[] keeps what nested samples need and nothing else."""
+        dbe = chain_explorer(mock_get, self.CONTENT, samples_cache=False)
+        samples = dbe.download_samples("ns", "lcdm", "planck_2018_plik", columns=[])
+        assert self._names(samples) == ["logL", "logL_birth", "nlive"]
+
+    @patch("unimpeded.http.Session.get")
+    def test_selections_are_served_from_samples_cache(self, mock_get, chain_explorer):
+        """A selection is parsed alone and cached for any subset of it."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        parse = patch.object(
+            DatabaseExplorer, "_read_samples", wraps=DatabaseExplorer._read_samples
+        )
+        with parse as mock_parse:
+            ab = dbe.download_samples(
+                "ns", "lcdm", "planck_2018_plik", columns=["a", "b"]
+            )
+            b = dbe.download_samples("ns", "lcdm", "planck_2018_plik", columns=["b"])
+
+        assert mock_parse.call_count == 1
+        assert mock_parse.call_args.args[1] >= {"a", "b"}
+        assert self._names(ab) == ["a", "b", "logL", "logL_birth", "nlive"]
+        assert self._names(b) == ["b", "logL", "logL_birth", "nlive"]
+
+    @patch("unimpeded.http.Session.get")
+    def test_wider_selection_replaces_cached_one(self, mock_get, chain_explorer):
+        """Asking for more than was cached parses the chain in full once."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        parse = patch.object(
+            DatabaseExplorer, "_read_samples", wraps=DatabaseExplorer._read_samples
+        )
+        with parse as mock_parse:
+            a = dbe.download_samples("ns", "lcdm", "planck_2018_plik", columns=["a"])
+            full = dbe.download_samples("ns", "lcdm", "planck_2018_plik")
+            b = dbe.download_samples("ns", "lcdm", "planck_2018_plik", columns=["b"])
+
+        assert mock_get.call_count == 2  # the catalog and one download
+        assert mock_parse.call_count == 2
+        assert self._names(a) == ["a", "logL", "logL_birth", "nlive"]
+        assert self._names(full) == ["a", "b", "logL", "logL_birth", "nlive"]
+        assert self._names(b) == ["b", "logL", "logL_birth", "nlive"]
+
+    def test_other_layouts_are_parsed_in_full(self):
+        """A CSV without label and weight rows still has its columns selected."""
+        from io import BytesIO, StringIO
+
+        import numpy as np
+        from anesthetic import MCMCSamples
+
+        rng = np.random.default_rng(0)
+        samples = MCMCSamples(data=rng.random((10, 2)), columns=["a", "b"])
+        buffer = StringIO()
+        samples.to_csv(buffer)
+        fp = BytesIO(buffer.getvalue().encode())
+        with patch("unimpeded.database.read_csv", return_value=samples):
+            selected = DatabaseExplorer._read_samples(fp, {"b"})
+        assert list(selected.columns) == ["b"]
+
+
+class TestReducedPrecision:
+    """Tests for holding the parameters of a chain in float32."""
+
+    CONTENT = TestColumnProjection.CONTENT
+
+    @staticmethod
+    def _dtypes(samples):
+        return {name: samples[name].dtype.name for name in ["a", "logL", "nlive"]}
+
+    @patch("unimpeded.http.Session.get")
+    def test_parameters_are_parsed_as_float32(self, mock_get, chain_explorer):
+        """Parameters are float32; logL, nlive and weights keep their types."""
+        import numpy as np
+
+        dbe = chain_explorer(mock_get, self.CONTENT, samples_cache=False)
+        samples = dbe.download_samples(
+            "ns", "lcdm", "planck_2018_plik", dtype="float32"
+        )
+        full = dbe.download_samples("ns", "lcdm", "planck_2018_plik")
+
+        assert self._dtypes(samples) == {
+            "a": "float32",
+            "logL": "float64",
+            "nlive": "int64",
+        }
+        assert samples.get_weights().dtype == np.float64
+        assert samples.logZ() == full.logZ()
+        np.testing.assert_allclose(samples["a"], full["a"], rtol=1e-7)
+
+    @patch("unimpeded.http.Session.get")
+    def test_reduced_chain_is_cached_separately(
+        self, mock_get, isolated_cache_dir, chain_explorer
+    ):
+        """The float32 chain gets its own sidecar and reloads from it."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        dbe.download_samples("ns", "lcdm", "planck_2018_plik", dtype="float32")
+        samples = dbe.download_samples(
+            "ns", "lcdm", "planck_2018_plik", columns=["a"], dtype="float32"
+        )
+        full = dbe.download_samples("ns", "lcdm", "planck_2018_plik")
+
+        assert mock_get.call_count == 2  # the catalog and one download
+        assert self._dtypes(samples)["a"] == "float32"
+        assert self._dtypes(full)["a"] == "float64"
+        digest = hashlib.md5(self.CONTENT).hexdigest()
+        entries = isolated_cache_dir / "samples" / "md5" / digest[:2]
+        assert sorted(p.name for p in entries.iterdir()) == [
+            digest,
+            f"{digest}-float32",
+        ]
+        column = entries / f"{digest}-float32" / "column0.npy"
+        assert column.stat().st_size < (entries / digest / "column0.npy").stat().st_size
+
+
+class TestCompressedPosterior:
+    """Tests for downloading a compressed posterior instead of the full chain."""
+
+    CONTENT = _chain_csv(n=500)
+
+    @patch("unimpeded.http.Session.get")
+    def test_posterior_is_compressed_to_n_samples(
+        self, mock_get, capsys, chain_explorer
+    ):
+        """An int gives that many samples, and the effective size is reported."""
+        from anesthetic.samples import Samples
+
+        dbe = chain_explorer(mock_get, self.CONTENT, samples_cache=False)
+        samples = dbe.download_samples("ns", "lcdm", "planck_2018_plik", compress=100)
+
+        assert type(samples) is Samples
+        assert list(samples.columns.get_level_values(0)) == ["a", "b", "logL"]
+        assert samples.get_weights().sum() == 100
+        assert len(samples) <= 100
+        out = capsys.readouterr().out
+        assert f"compressed from 500 to {len(samples)} samples" in out
+        assert f"effective sample size of {samples.neff():.0f}" in out
+
+    @patch("unimpeded.http.Session.get")
+    def test_compressed_posterior_is_cached_separately(
+        self, mock_get, isolated_cache_dir, chain_explorer
+    ):
+        """The compressed posterior reloads from its own sidecar, unchanged."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        first = dbe.download_samples("ns", "lcdm", "planck_2018_plik", compress=True)
+        second = dbe.download_samples("ns", "lcdm", "planck_2018_plik", compress=True)
+        full = dbe.download_samples("ns", "lcdm", "planck_2018_plik")
+
+        assert mock_get.call_count == 2  # the catalog and one download
+        pd.testing.assert_frame_equal(second, first)
+        assert len(first) < len(full) == 500
+        digest = hashlib.md5(self.CONTENT).hexdigest()
+        entries = isolated_cache_dir / "samples" / "md5" / digest[:2]
+        assert (entries / f"{digest}-compressTrue" / "meta.json").exists()
+
+    @patch("unimpeded.http.Session.get")
+    def test_compression_combines_with_precision(
+        self, mock_get, isolated_cache_dir, chain_explorer
+    ):
+        """A float32 compressed posterior is one more separate entry."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        samples = dbe.download_samples(
+            "ns", "lcdm", "planck_2018_plik", dtype="float32", compress=50
+        )
+        assert samples["a"].dtype.name == "float32"
+        assert samples.get_weights().sum() == 50
+        digest = hashlib.md5(self.CONTENT).hexdigest()
+        entries = isolated_cache_dir / "samples" / "md5" / digest[:2]
+        assert (entries / f"{digest}-float32-compress50").is_dir()
+
+
+class TestIterSamples:
+    """Tests for iterating over a chain in blocks of rows."""
+
+    CONTENT = _chain_csv(n=500)
+
+    @patch("unimpeded.http.Session.get")
+    def test_blocks_reassemble_the_chain(self, mock_get, chain_explorer):
+        """Blocks of chunksize rows hold the chain's values and weights."""
+        from io import BytesIO
+
+        import numpy as np
+        from anesthetic import read_csv
+        from anesthetic.samples import Samples
+
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        blocks = list(dbe.iter_samples("ns", "lcdm", "planck_2018_plik", chunksize=120))
+        full = read_csv(BytesIO(self.CONTENT))
+
+        assert [len(b) for b in blocks] == [120, 120, 120, 120, 20]
+        assert all(type(b) is Samples for b in blocks)
+        np.testing.assert_array_equal(
+            np.concatenate([b.to_numpy() for b in blocks]), full.to_numpy()
+        )
+        np.testing.assert_allclose(
+            np.concatenate([b.get_weights() for b in blocks]), full.get_weights()
+        )
+        assert blocks[0].columns.equals(full.columns)
+
+    @patch("unimpeded.http.Session.get")
+    def test_blocks_parse_selected_columns(self, mock_get, chain_explorer):
+        """Blocks honour columns and dtype, read straight from the file cache."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        dbe.iter_samples("ns", "lcdm", "planck_2018_plik")  # lazy: no download
+        assert mock_get.call_count == 0
+        list(dbe.iter_samples("ns", "lcdm", "planck_2018_plik"))
+        block = next(
+            dbe.iter_samples(
+                "ns", "lcdm", "planck_2018_plik", columns=["a"], dtype="float32"
+            )
+        )
+        assert mock_get.call_count == 2  # the catalog and one download
+        assert list(block.columns.get_level_values(0)) == [
+            "a",
+            "logL",
+            "logL_birth",
+            "nlive",
+        ]
+        assert block["a"].dtype.name == "float32"
+
+    @patch("unimpeded.http.Session.get")
+    def test_reducers_summarise_the_chain(self, mock_get, chain_explorer):
+        """Streaming reducers over the blocks match the loaded chain."""
+        from io import BytesIO
+
+        import numpy as np
+        from anesthetic import read_csv
+
+        from unimpeded.streaming import QuantileSketch, WeightedMoments
+
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        moments = WeightedMoments()
+        quantiles = QuantileSketch()
+        for block in dbe.iter_samples(
+            "ns", "lcdm", "planck_2018_plik", chunksize=64, columns=[]
+        ):
+            block = block[["logL"]]
+            moments.update(block)
+            quantiles.update(block)
+        full = read_csv(BytesIO(self.CONTENT))[["logL"]]
+        np.testing.assert_allclose(moments.mean, full.mean())
+        np.testing.assert_allclose(moments.cov, full.cov())
+        np.testing.assert_allclose(quantiles.quantile(0.5), full.quantile(0.5))
+
+    @patch("unimpeded.http.Session.get")
+    def test_missing_chain(self, mock_get, capsys, chain_explorer):
+        """A chain that is not published yields nothing."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        assert list(dbe.iter_samples("mcmc", "lcdm", "planck_2018_plik")) == []
+        assert "No mcmc_lcdm_planck_2018_plik.csv found" in capsys.readouterr().out
+
+
+class TestPreview:
+    """Tests for peeking at the start of a chain with a Range request."""
+
+    CONTENT = _chain_csv(n=500)
+
+    def _serve(self, requests):
+        """Answer Range requests with 206 and the requested slice."""
+        import re
+
+        def get(url, params=None, stream=False, headers=None):
+            if params is not None:
+                return _search_response(
+                    _hit(
+                        "lcdm",
+                        "planck_2018_plik",
+                        11,
+                        keys={"ns_lcdm_planck_2018_plik.csv": self.CONTENT},
+                    )
+                )
+            first, last = re.match(r"bytes=(\d+)-(\d+)", headers["Range"]).groups()
+            requests.append((int(first), int(last)))
+            r = _file_response(self.CONTENT[int(first) : int(last) + 1], 1024)
+            r.status_code = 206
+            return r
+
+        return get
+
+    @patch("unimpeded.http.Session.get")
+    def test_preview_reads_only_the_start(self, mock_get):
+        """One small Range request gives the columns, labels and first rows."""
+        from io import BytesIO
+
+        import numpy as np
+        from anesthetic import read_csv
+        from anesthetic.samples import Samples
+
+        from unimpeded.database import PREVIEW_BYTES
+
+        requests = []
+        mock_get.side_effect = self._serve(requests)
+        preview = DatabaseExplorer().preview("ns", "lcdm", "planck_2018_plik", 3)
+
+        assert requests == [(0, PREVIEW_BYTES - 1)]
+        assert type(preview) is Samples
+        full = read_csv(BytesIO(self.CONTENT))
+        assert preview.columns.equals(full.columns)
+        np.testing.assert_array_equal(preview.to_numpy(), full.iloc[:3].to_numpy())
+        np.testing.assert_allclose(preview.get_weights(), full.get_weights()[:3])
+
+    @patch("unimpeded.http.Session.get")
+    def test_preview_grows_range_until_rows_fit(self, mock_get, monkeypatch):
+        """A range too short for the rows wanted is retried four times longer."""
+        monkeypatch.setattr("unimpeded.database.PREVIEW_BYTES", 100)
+        requests = []
+        mock_get.side_effect = self._serve(requests)
+        preview = DatabaseExplorer().preview("ns", "lcdm", "planck_2018_plik", 5)
+        assert len(preview) == 5
+        assert requests == [(0, 99), (0, 399), (0, 1599)]
+
+    @patch("unimpeded.http.Session.get")
+    def test_short_chain_is_previewed_whole(self, mock_get, monkeypatch):
+        """Asking for more rows than the chain has returns them all."""
+        monkeypatch.setattr(self, "CONTENT", _chain_csv(n=4))
+        mock_get.side_effect = self._serve([])
+        assert len(DatabaseExplorer().preview("ns", "lcdm", "planck_2018_plik")) == 4
+
+    @patch("unimpeded.http.Session.get")
+    def test_ignored_range_is_cut_off(self, mock_get, chain_explorer):
+        """A server sending the whole file is read only as far as needed."""
+        dbe = chain_explorer(mock_get, self.CONTENT, file_cache=False)
+        dbe.manifest
+        response = _file_response(self.CONTENT, 1024)
+        mock_get.side_effect = None
+        mock_get.return_value = response
+        preview = dbe.preview("ns", "lcdm", "planck_2018_plik")
+        assert len(preview) == 5
+        response.close.assert_called_once()
+
+    @patch("unimpeded.http.Session.get")
+    def test_cached_chain_needs_no_request(self, mock_get, chain_explorer):
+        """A chain in the file cache is previewed from disk."""
+        dbe = chain_explorer(mock_get, self.CONTENT)
+        list(dbe.iter_samples("ns", "lcdm", "planck_2018_plik"))
+        mock_get.reset_mock()
+        assert len(dbe.preview("ns", "lcdm", "planck_2018_plik", 2)) == 2
+        assert mock_get.call_count == 0
+
+
+class TestDownloadBatch:
+    """Tests for downloading several files at once in a pipeline."""
+
+    CHAINS = {
+        f"ns_lcdm_{dataset}.csv": _chain_csv(n=40 + i, seed=i)
+        for i, dataset in enumerate(["planck_2018_plik", "bao.sdss_dr16"])
+    }
+    PRIOR_INFO = b"nprior = 10\nndiscarded = 25\n"
+
+    def _serve(self, barrier=None):
+        """Serve one deposit per dataset, each holding a chain and prior_info."""
+        import re
+
+        hits = {
+            dataset: _hit(
+                "lcdm",
+                dataset,
+                11 + i,
+                keys={
+                    f"ns_lcdm_{dataset}.csv": self.CHAINS[f"ns_lcdm_{dataset}.csv"],
+                    f"ns_lcdm_{dataset}.prior_info": self.PRIOR_INFO,
+                },
+            )
+            for i, dataset in enumerate(["planck_2018_plik", "bao.sdss_dr16"])
+        }
+        contents = {**self.CHAINS}
+        contents.update({f"ns_lcdm_{d}.prior_info": self.PRIOR_INFO for d in hits})
+
+        def get(url, params=None, stream=False, headers=None):
+            if params is not None:
+                dataset = re.search(r"lcdm (\S+)\"", params["q"]).group(1)
+                return _search_response(hits[dataset])
+            if barrier is not None:
+                barrier.wait()
+            return _file_response(contents[url.split("/")[-2]], 1024)
+
+        return get
+
+    REQUESTS = [
+        ("ns", "lcdm", "bao.sdss_dr16", "samples"),
+        ("ns", "lcdm", "planck_2018_plik", "prior_info"),
+        ("ns", "lcdm", "planck_2018_plik", "samples"),
+    ]
+
+    @pytest.mark.parametrize("parse_workers", [0, 2])
+    @patch("unimpeded.http.Session.get")
+    def test_results_in_request_order(self, mock_get, parse_workers):
+        """Each result matches its request, whatever order they finish in."""
+        from io import BytesIO
+
+        from anesthetic import NestedSamples, read_csv
+
+        mock_get.side_effect = self._serve()
+        bao, prior_info, planck = DatabaseExplorer().download_batch(
+            self.REQUESTS, parse_workers=parse_workers
+        )
+        assert isinstance(bao, NestedSamples) and isinstance(planck, NestedSamples)
+        pd.testing.assert_frame_equal(
+            bao, read_csv(BytesIO(self.CHAINS["ns_lcdm_bao.sdss_dr16.csv"]))
+        )
+        assert len(planck) == 40
+        assert prior_info == {"nprior": 10, "ndiscarded": 25}
+
+    @patch("unimpeded.http.Session.get")
+    def test_files_download_concurrently(self, mock_get):
+        """All the files are in flight at once, not one after another."""
+        import threading
+
+        mock_get.side_effect = self._serve(threading.Barrier(3, timeout=10))
+        results = DatabaseExplorer().download_batch(self.REQUESTS, parse_workers=0)
+        assert all(result is not None for result in results)
+
+    @patch("unimpeded.http.Session.get")
+    def test_parsed_chains_reload_from_samples_cache(self, mock_get):
+        """Chains parsed by the workers are cached for next time."""
+        mock_get.side_effect = self._serve()
+        DatabaseExplorer().download_batch(self.REQUESTS, parse_workers=2)
+        mock_get.reset_mock()
+        with patch("unimpeded.database._parse_samples") as mock_parse:
+            bao, _, planck = DatabaseExplorer().download_batch(
+                self.REQUESTS, parse_workers=2
+            )
+        mock_parse.assert_not_called()
+        assert len(bao) == 41 and len(planck) == 40
+        # Only the title searches, as there is no cached catalog.
+        assert all("params" in c.kwargs for c in mock_get.call_args_list)
+
+    def test_evicted_chain_is_not_parsed(self, tmp_path):
+        """A worker finding its chain evicted reports a miss, not an error."""
+        from unimpeded.database import _parse_samples
+
+        assert _parse_samples(str(tmp_path / "evicted.csv")) is None
+
+    @patch("unimpeded.http.Session.get")
+    def test_evicted_chain_is_downloaded_again(self, mock_get):
+        """A chain evicted before its worker opened it is fetched once more."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        mock_get.side_effect = self._serve()
+        with (
+            patch(
+                "unimpeded.database._parse_pool", lambda workers: ThreadPoolExecutor()
+            ),
+            patch("unimpeded.database._parse_samples", return_value=None),
+        ):
+            bao, prior_info, planck = DatabaseExplorer(
+                samples_cache=False
+            ).download_batch(self.REQUESTS, parse_workers=2)
+        assert len(bao) == 41 and len(planck) == 40
+        assert prior_info == {"nprior": 10, "ndiscarded": 25}
+
+    @patch("unimpeded.http.Session.get")
+    def test_broken_pool_is_replaced(self, mock_get):
+        """A pool whose worker died is shut down and started afresh."""
+        from concurrent.futures import ThreadPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+
+        from unimpeded.database import _shutdown_parse_pools
+
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool()
+        pools = iter([broken, ThreadPoolExecutor()])
+        mock_get.side_effect = self._serve()
+        with patch("unimpeded.database.process_pool", lambda workers: next(pools)):
+            try:
+                bao, _, planck = DatabaseExplorer(samples_cache=False).download_batch(
+                    self.REQUESTS, parse_workers=3
+                )
+            finally:
+                _shutdown_parse_pools()
+        assert len(bao) == 41 and len(planck) == 40
+        broken.shutdown.assert_called_once()
+
+
+class TestDownloadDeposit:
+    """Tests for downloading every file of a deposit together."""
+
+    FILES = {
+        "ns_lcdm_planck_2018_plik.csv": _chain_csv(n=30),
+        "ns_lcdm_planck_2018_plik.yaml": b"sampler:\n  polychord: {}\n",
+        "ns_lcdm_planck_2018_plik.prior_info": PRIOR_INFO_CONTENT,
+        "mcmc_lcdm_planck_2018_plik.csv": _chain_csv(n=20, seed=1),
+        "mcmc_lcdm_planck_2018_plik.yaml": b"sampler:\n  mcmc: {}\n",
+    }
+
+    def _serve(self, files=None):
+        """Serve the deposit, its files, and a zip archive of ``files``."""
+        import zipfile
+        from io import BytesIO
+
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for key, content in (files or self.FILES).items():
+                zf.writestr(key, content)
+        hit = _hit("lcdm", "planck_2018_plik", 11, keys=self.FILES)
+
+        def get(url, params=None, stream=False, headers=None):
+            if params is not None:
+                return _search_response(hit)
+            if url.endswith("/files-archive"):
+                return _file_response(archive.getvalue(), 4096)
+            return _file_response(self.FILES[url.split("/")[-2]], 1024)
+
+        return get
+
+    @staticmethod
+    def _downloads(mock_get):
+        return [c.args[0].split("/")[-2:] for c in mock_get.call_args_list[1:]]
+
+    @patch("unimpeded.http.Session.get")
+    def test_files_are_fetched_together(self, mock_get):
+        """The deposit is looked up once and each of its files fetched once."""
+        mock_get.side_effect = self._serve()
+        deposit = DatabaseExplorer().download_deposit("lcdm", "planck_2018_plik")
+
+        assert len(deposit["samples"]) == 30
+        assert deposit["info"] == {"sampler": {"polychord": {}}}
+        assert deposit["prior_info"] == {"nprior": 10, "ndiscarded": 20}
+        assert mock_get.call_count == 4
+
+    @patch("unimpeded.http.Session.get")
+    def test_missing_files_are_not_requested(self, mock_get):
+        """MCMC deposits have no prior_info, so none is asked for."""
+        mock_get.side_effect = self._serve()
+        deposit = DatabaseExplorer().download_deposit(
+            "lcdm", "planck_2018_plik", method="mcmc"
+        )
+        assert deposit["prior_info"] is None
+        assert len(deposit["samples"]) == 20
+        assert sorted(self._downloads(mock_get)) == [
+            ["mcmc_lcdm_planck_2018_plik.csv", "content"],
+            ["mcmc_lcdm_planck_2018_plik.yaml", "content"],
+        ]
+
+    @patch("unimpeded.http.Session.get")
+    def test_archive_is_one_request(self, mock_get):
+        """With archive=True one download fills the file cache for both methods."""
+        mock_get.side_effect = self._serve()
+        dbe = DatabaseExplorer()
+        deposit = dbe.download_deposit("lcdm", "planck_2018_plik", archive=True)
+
+        assert self._downloads(mock_get) == [["11", "files-archive"]]
+        assert len(deposit["samples"]) == 30
+        assert deposit["prior_info"] == {"nprior": 10, "ndiscarded": 20}
+
+        mock_get.reset_mock()
+        mcmc = dbe.download_deposit(
+            "lcdm", "planck_2018_plik", method="mcmc", archive=True
+        )
+        assert len(mcmc["samples"]) == 20
+        mock_get.assert_not_called()
+
+    @patch("unimpeded.http.Session.get")
+    def test_corrupt_archive_member_raises(self, mock_get):
+        """A file in the archive is checked against its published checksum."""
+        corrupt = {**self.FILES, "ns_lcdm_planck_2018_plik.prior_info": b"nprior = 1"}
+        mock_get.side_effect = self._serve(corrupt)
+        with pytest.raises(ChecksumError, match="prior_info is corrupt"):
+            DatabaseExplorer().download_deposit(
+                "lcdm", "planck_2018_plik", archive=True
+            )
+
+    @patch("unimpeded.http.Session.get")
+    def test_unknown_deposit(self, mock_get, capsys):
+        """A deposit that does not exist gives None."""
+        mock_get.return_value = _search_response()
+        assert DatabaseExplorer().download_deposit("lcdm", "nonexistent") is None
+        assert "No deposit found" in capsys.readouterr().out
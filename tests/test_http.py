@@ -0,0 +1,342 @@
+"""Tests for the unimpeded http module."""
+
+import threading
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from unimpeded.database import Database, DatabaseCreator, DatabaseExplorer
+from unimpeded.http import (
+    TIMEOUT,
+    RateLimiter,
+    Session,
+    default_rate_limiter,
+    default_session,
+)
+
+
+class TestSession:
+    """Test the pooled Session."""
+
+    @patch.object(requests.Session, "request")
+    def test_default_timeout(self, mock_request):
+        """Requests without a timeout get the session default."""
+        Session(timeout=(1, 2)).get("https://zenodo.org/api/records")
+        assert mock_request.call_args.kwargs["timeout"] == (1, 2)
+
+    @patch.object(requests.Session, "request")
+    def test_explicit_timeout(self, mock_request):
+        """A timeout passed with the request wins over the default."""
+        Session().get("https://zenodo.org/api/records", timeout=5)
+        assert mock_request.call_args.kwargs["timeout"] == 5
+
+    def test_pool_size(self):
+        """Both schemes are served by one adapter with the requested pool."""
+        session = Session(pool_size=4)
+        adapter = session.get_adapter("https://zenodo.org")
+        assert adapter is session.get_adapter("http://zenodo.org")
+        assert adapter._pool_maxsize == 4
+        assert adapter._pool_connections == 4
+
+    def test_keep_alive(self):
+        """Connections are reused unless keep-alive is turned off."""
+        assert Session().headers["Connection"] == "keep-alive"
+        assert Session(keep_alive=False).headers["Connection"] == "close"
+
+    def test_default_session_is_shared(self):
+        """Every Database class uses the same default session."""
+        session = default_session()
+        assert isinstance(session, Session)
+        assert session.timeout == TIMEOUT
+        assert Database().session is session
+        assert DatabaseExplorer().session is session
+        assert DatabaseCreator(ACCESS_TOKEN="token").session is session
+
+
+class TestInjectedSession:
+    """Test that requests go through an injected session."""
+
+    def test_explorer_downloads_through_session(self):
+        """File downloads use the session given to the explorer."""
+        session = MagicMock()
+        record = MagicMock(status_code=200)
+        record.json.return_value = {
+            "files": [{"key": "info.yaml", "links": {"self": "https://f/info"}}]
+        }
+        file_r = MagicMock(status_code=200)
+        file_r.iter_content.return_value = [b"a: 1\n"]
+        session.get.side_effect = [record, file_r]
+
+        dbe = DatabaseExplorer(session=session)
+        assert dbe.download(123, "info.yaml") == {"a": 1}
+        assert session.get.call_args_list[0].args == (
+            "https://zenodo.org/api/records/123",
+        )
+
+    def test_creator_uploads_through_session(self):
+        """Deposit creation uses the session given to the creator."""
+        session = MagicMock()
+        session.post.return_value.json.return_value = {"id": 42}
+
+        dbc = DatabaseCreator(ACCESS_TOKEN="token", session=session)
+        assert dbc.create_deposit() == 42
+        session.post.assert_called_once()
+
+
+def _response(status, headers=None):
+    """A mock response with the given status code and headers."""
+    return MagicMock(status_code=status, headers=headers or {})
+
+
+@patch("unimpeded.http.time.sleep")
+@patch.object(requests.Session, "request")
+class TestRetry:
+    """Test retrying of transient failures."""
+
+    def test_server_error_is_retried(self, mock_request, mock_sleep):
+        """A 503 is retried and the eventual success returned."""
+        mock_request.side_effect = [_response(503), _response(200)]
+        assert Session().get("https://zenodo.org").status_code == 200
+        assert mock_request.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_retry_after_is_honoured(self, mock_request, mock_sleep):
+        """Retry-After sets the delay, capped at max_backoff."""
+        mock_request.side_effect = [
+            _response(429, {"Retry-After": "7"}),
+            _response(429, {"Retry-After": "120"}),
+            _response(200),
+        ]
+        Session(max_backoff=30).get("https://zenodo.org")
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [7, 30]
+
+    def test_retry_after_http_date(self, mock_request, mock_sleep):
+        """Retry-After may also be given as an HTTP date."""
+        mock_request.side_effect = [
+            _response(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}),
+            _response(200),
+        ]
+        Session().get("https://zenodo.org")
+        mock_sleep.assert_called_once_with(0.0)
+
+    def test_backoff_grows_with_jitter(self, mock_request, mock_sleep):
+        """Delays are drawn below a cap that doubles with each retry."""
+        mock_request.side_effect = [_response(502)] * 4 + [_response(200)]
+        with patch("unimpeded.http.random.uniform", side_effect=lambda a, b: b):
+            Session(retries=4, backoff=1, max_backoff=5).get("https://zenodo.org")
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2, 4, 5]
+
+    def test_last_response_returned_when_exhausted(self, mock_request, mock_sleep):
+        """Once out of retries the failing response is handed back."""
+        mock_request.return_value = _response(500)
+        assert Session(retries=2).get("https://zenodo.org").status_code == 500
+        assert mock_request.call_count == 3
+
+    def test_client_errors_are_not_retried(self, mock_request, mock_sleep):
+        """A 404 is an answer, not a transient failure."""
+        mock_request.return_value = _response(404)
+        assert Session().get("https://zenodo.org").status_code == 404
+        assert mock_request.call_count == 1
+
+    def test_connection_errors_are_retried(self, mock_request, mock_sleep):
+        """Dropped connections and read timeouts are retried for GETs."""
+        mock_request.side_effect = [
+            requests.ConnectionError("reset"),
+            requests.ReadTimeout("slow"),
+            _response(200),
+        ]
+        assert Session().get("https://zenodo.org").status_code == 200
+
+    def test_exception_raised_when_exhausted(self, mock_request, mock_sleep):
+        """Once out of retries the last exception propagates."""
+        mock_request.side_effect = requests.ReadTimeout("slow")
+        with pytest.raises(requests.ReadTimeout):
+            Session(retries=1).get("https://zenodo.org")
+        assert mock_request.call_count == 2
+
+    def test_post_is_retried_only_when_safe(self, mock_request, mock_sleep):
+        """POSTs are retried if never sent or rate limited, but not otherwise."""
+        mock_request.side_effect = [
+            requests.ConnectTimeout("no route"),
+            _response(429),
+            _response(500),
+        ]
+        assert Session().post("https://zenodo.org").status_code == 500
+        assert mock_request.call_count == 3
+
+        mock_request.side_effect = [requests.ReadTimeout("slow"), _response(201)]
+        with pytest.raises(requests.ReadTimeout):
+            Session().post("https://zenodo.org")
+
+    def test_file_body_is_rewound(self, mock_request, mock_sleep):
+        """An upload is sent from the same position on every attempt."""
+        body = BytesIO(b"header,chain")
+        body.seek(7)
+        sent = []
+
+        def request(method, url, data, **kwargs):
+            sent.append(data.read())
+            return _response(503 if len(sent) == 1 else 200)
+
+        mock_request.side_effect = request
+        Session().put("https://zenodo.org", data=body)
+        assert sent == [b"chain", b"chain"]
+
+
+class TestHedging:
+    """Test hedged GETs."""
+
+    @patch.object(requests.Session, "request")
+    def test_slow_get_is_hedged(self, mock_request):
+        """A GET slower than the percentile is raced by a duplicate."""
+        release = threading.Event()
+        fast = _response(200)
+        slow = _response(200)
+
+        def request(method, url, **kwargs):
+            if mock_request.call_count == 1:
+                release.wait(5)
+                return slow
+            return fast
+
+        mock_request.side_effect = request
+        session = Session(hedge_percentile=50)
+        session._latencies.extend([0.01] * 20)
+
+        assert session.get("https://zenodo.org") is fast
+        assert mock_request.call_count == 2
+        release.set()
+
+    @patch.object(requests.Session, "request")
+    def test_no_hedging_until_latencies_known(self, mock_request):
+        """Nothing is hedged before enough latencies have been recorded."""
+        mock_request.return_value = _response(200)
+        session = Session(hedge_percentile=50)
+        session.get("https://zenodo.org")
+        assert mock_request.call_count == 1
+        assert len(session._latencies) == 1
+
+    @patch.object(requests.Session, "request")
+    def test_streams_and_writes_are_not_hedged(self, mock_request):
+        """Only buffered GETs are hedged."""
+        mock_request.return_value = _response(200)
+        session = Session(hedge_percentile=50)
+        session._latencies.extend([0.01] * 20)
+        session.get("https://zenodo.org", stream=True)
+        session.put("https://zenodo.org", data=b"")
+        assert mock_request.call_count == 2
+        assert len(session._latencies) == 20
+
+
+class _Clock:
+    """Fake time for the rate limiter: sleeping advances it."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _limits(limit, remaining, reset, status=200):
+    """A mock response carrying Zenodo's rate-limit headers."""
+    return _response(
+        status,
+        {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset),
+        },
+    )
+
+
+@pytest.fixture
+def clock():
+    """Fake clock installed in unimpeded.http."""
+    clock = _Clock()
+    with patch("unimpeded.http.time", clock):
+        yield clock
+
+
+class TestRateLimiter:
+    """Test the token-bucket rate limiter."""
+
+    def test_unknown_host_is_not_limited(self, clock):
+        """Requests are not held back before a limit has been reported."""
+        limiter = RateLimiter()
+        for _ in range(100):
+            limiter.acquire("zenodo.org")
+        assert clock.slept == []
+
+    def test_waits_once_remaining_is_spent(self, clock):
+        """The reported remaining requests go at once, then the bucket refills."""
+        limiter = RateLimiter(window=60)
+        limiter.update("zenodo.org", _limits(30, 2, clock.now + 60))
+        limiter.acquire("zenodo.org")
+        limiter.acquire("zenodo.org")
+        assert clock.slept == []
+
+        limiter.acquire("zenodo.org")
+        assert sum(clock.slept) == pytest.approx(2)
+
+    def test_bucket_is_full_after_reset(self, clock):
+        """At X-RateLimit-Reset the whole limit is available again."""
+        limiter = RateLimiter(window=600)
+        limiter.update("zenodo.org", _limits(30, 0, clock.now + 5))
+        limiter.acquire("zenodo.org")
+        assert sum(clock.slept) == pytest.approx(5)
+        clock.slept.clear()
+        for _ in range(29):
+            limiter.acquire("zenodo.org")
+        assert clock.slept == []
+
+    def test_stale_counts_are_ignored(self, clock):
+        """Counts for a window that is already over do not hold requests back."""
+        limiter = RateLimiter()
+        limiter.update("zenodo.org", _limits(30, 0, clock.now - 1))
+        limiter.acquire("zenodo.org")
+        assert clock.slept == []
+
+    def test_rate_limited_response_empties_bucket(self, clock):
+        """A 429 means no requests are left, whatever the headers say."""
+        limiter = RateLimiter(window=60)
+        limiter.update("zenodo.org", _limits(30, 10, clock.now + 60, status=429))
+        limiter.acquire("zenodo.org")
+        assert sum(clock.slept) == pytest.approx(2)
+
+    def test_hosts_are_limited_separately(self, clock):
+        """The deposit and sandbox hosts each have their own budget."""
+        limiter = RateLimiter()
+        limiter.update("zenodo.org", _limits(30, 0, clock.now + 60))
+        limiter.acquire("sandbox.zenodo.org")
+        assert clock.slept == []
+
+    def test_file_backed_state_is_shared(self, clock, tmp_path):
+        """Limiters using the same file draw on one budget."""
+        path = str(tmp_path / "limits" / "ratelimit.json")
+        RateLimiter(path).update("zenodo.org", _limits(30, 1, clock.now + 60))
+        RateLimiter(path).acquire("zenodo.org")
+        assert clock.slept == []
+        RateLimiter(path).acquire("zenodo.org")
+        assert clock.slept
+
+    def test_session_takes_tokens_per_request(self):
+        """Every attempt takes a token and reports its response."""
+        limiter = MagicMock()
+        response = _limits(30, 29, 0)
+        with patch.object(requests.Session, "request", return_value=response):
+            Session(rate_limiter=limiter).get("https://zenodo.org/api/records")
+        limiter.acquire.assert_called_once_with("zenodo.org")
+        limiter.update.assert_called_once_with("zenodo.org", response)
+
+    def test_default_limiter_is_shared(self):
+        """Sessions without their own limiter share the process-wide one."""
+        assert default_rate_limiter() is default_rate_limiter()
+        assert Session().rate_limiter is None
@@ -0,0 +1,82 @@
+"""Tests for the streaming reducers in unimpeded.streaming."""
+
+import numpy as np
+import pytest
+from anesthetic import MCMCSamples, NestedSamples
+
+from unimpeded.streaming import QuantileSketch, WeightedMoments
+
+
+def _nested(n=3000):
+    rng = np.random.default_rng(2)
+    return NestedSamples(
+        data=rng.normal(size=(n, 2)),
+        columns=["a", "b"],
+        logL=np.sort(rng.random(n)) * 10,
+        logL_birth=-np.inf,
+        labels={"a": r"$a$", "b": r"$b$"},
+    ).drop_labels()[["a", "b"]]
+
+
+def _mcmc(n=500):
+    rng = np.random.default_rng(3)
+    return MCMCSamples(
+        data=rng.normal(size=(n, 2)),
+        columns=["x", "y"],
+        weights=rng.integers(1, 4, n),
+    )
+
+
+def _blocks(samples, size):
+    return [samples.iloc[i : i + size] for i in range(0, len(samples), size)]
+
+
+class TestWeightedMoments:
+    """Test the streaming weighted mean and covariance."""
+
+    @pytest.mark.parametrize("samples", [_nested(), _mcmc()], ids=["ns", "mcmc"])
+    def test_matches_whole_chain(self, samples):
+        """Blocks combine to the mean and covariance of all the samples."""
+        moments = WeightedMoments()
+        for block in _blocks(samples, 77):
+            moments.update(block)
+        np.testing.assert_allclose(moments.mean, samples.mean(), atol=1e-12)
+        np.testing.assert_allclose(moments.cov, samples.cov(), atol=1e-12)
+        assert list(moments.cov.columns) == list(samples.columns)
+
+    def test_unweighted_blocks(self):
+        """Plain DataFrames count each row once."""
+        samples = _mcmc().drop_weights()
+        moments = WeightedMoments()
+        for block in _blocks(samples, 100):
+            moments.update(block)
+        np.testing.assert_allclose(moments.cov, samples.cov(), atol=1e-12)
+        assert moments.weight == len(samples)
+
+
+class TestQuantileSketch:
+    """Test the streaming weighted quantile sketch."""
+
+    def test_exact_while_small(self):
+        """With fewer samples than centroids the quantiles are exact."""
+        samples = _mcmc(300)
+        sketch = QuantileSketch(size=1000)
+        for block in _blocks(samples, 64):
+            sketch.update(block)
+        q = [0.025, 0.5, 0.975]
+        np.testing.assert_allclose(sketch.quantile(q), samples.quantile(q))
+        np.testing.assert_allclose(sketch.quantile(), samples.quantile())
+
+    def test_bounded_and_accurate(self):
+        """A long chain is held in ``size`` centroids, to about 1/size."""
+        samples = _nested()
+        sketch = QuantileSketch(size=200)
+        for block in _blocks(samples, 500):
+            sketch.update(block)
+        assert all(len(values) <= 200 for values in sketch._values)
+        q = np.array([0.05, 0.16, 0.5, 0.84, 0.95])
+        for column in samples:
+            estimate = sketch.quantile(q)[column].to_numpy()
+            weights = samples.get_weights() / samples.get_weights().sum()
+            achieved = [weights[samples[column] <= x].sum() for x in estimate]
+            np.testing.assert_allclose(achieved, q, atol=2 / 200)
@@ -1,8 +1,26 @@
 """Tests for the unimpeded tension module."""
 
-import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
 
-from unimpeded.tension import download_tension_inputs, tension_calculator, tension_stats
+import numpy as np
+import pandas as pd
+import pytest
+from anesthetic.samples import NestedSamples
+
+from unimpeded.cache import StatsCache
+from unimpeded.catalog import Catalog
+from unimpeded.tension import (
+    STATS_COLUMNS,
+    TENSION_STATISTICS,
+    batch_tension_stats,
+    chain_digest,
+    chain_stats,
+    download_tension_inputs,
+    tension_calculator,
+    tension_stats,
+    tension_sweep,
+)
 
 
 class TestTensionStats:
@@ -186,6 +204,28 @@ class TestDownloadTensionInputs:
         assert "joint" in result2
 
 
+class TestDownloadFailures:
+    """Test that failed downloads are reported rather than passed on."""
+
+    def test_missing_file_raises(self):
+        """A file that cannot be downloaded names itself in a LookupError."""
+        with patch(
+            "unimpeded.tension.DatabaseExplorer.download_batch",
+            side_effect=lambda files: [None if f[2] == "b" else {} for f in files],
+        ):
+            with pytest.raises(LookupError, match="b samples, b prior_info"):
+                download_tension_inputs("ns", "lcdm", "a", "b")
+
+    def test_network_error_propagates(self):
+        """A deposit that cannot be looked up raises the network error."""
+        import requests
+
+        with patch("unimpeded.http.Session.get") as mock_get:
+            mock_get.side_effect = requests.ConnectionError("no route to host")
+            with pytest.raises(requests.ConnectionError):
+                download_tension_inputs("ns", "lcdm", "a", "b")
+
+
 class TestTensionCalculator:
     """Test the tension_calculator function."""
 
@@ -319,3 +359,478 @@ class TestTensionIntegration:
 
         # Results should have same length
         assert len(result1) == len(result2)
+
+
+class TestChainStats:
+    """Test the memoization of per-chain statistics."""
+
+    @staticmethod
+    def _chain(seed=0, nlive=30):
+        """Return a small nested sampling run."""
+        from anesthetic.examples.perfect_ns import gaussian
+
+        np.random.seed(seed)
+        return gaussian(nlive, 2, 1.0, 0.5)
+
+    def test_digest_depends_on_content_only(self):
+        """Copies of a chain share a digest; other chains do not."""
+        chain = self._chain()
+        assert chain_digest(chain) == chain_digest(chain.copy())
+        assert chain_digest(chain) != chain_digest(self._chain(seed=1))
+
+    def test_seeded_draws_are_reproducible(self):
+        """The same seed gives the same draws, and leaves numpy's state."""
+        chain = self._chain()
+        state = np.random.get_state()[1].copy()
+        first = chain_stats(chain, 20, seed=1, stats_cache=False)
+        second = chain_stats(chain, 20, seed=1, stats_cache=False)
+        np.testing.assert_array_equal(first, second)
+        assert not np.allclose(first, chain_stats(chain, 20, 1.0, 2, False))
+        np.testing.assert_array_equal(np.random.get_state()[1], state)
+
+    def test_stats_computed_once_per_chain(self):
+        """A chain shared by several calls has its statistics computed once."""
+        a, b, c = self._chain(0), self._chain(1), self._chain(2)
+        cache = StatsCache()
+        original = NestedSamples.stats
+        with patch.object(NestedSamples, "stats", autospec=True) as stats:
+            stats.side_effect = original
+            for joint, *separate in [(a, b, c), (a, b), (a, c)]:
+                tension_stats(joint, *separate, nsamples=10, seed=0, stats_cache=cache)
+        assert stats.call_count == 3
+
+    def test_unseeded_draws_follow_numpy_seed(self):
+        """Without a seed, np.random.seed makes the draws reproducible."""
+        chains = [self._chain(i) for i in range(3)]
+        np.random.seed(7)
+        first = tension_stats(*chains, nsamples=10, stats_cache=False)
+        np.random.seed(7)
+        second = tension_stats(*chains, nsamples=10, stats_cache=False)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_unseeded_draws_are_not_cached(self):
+        """Random draws are made afresh on every call."""
+        chain = self._chain()
+        cache = StatsCache()
+        first = chain_stats(chain, 20, stats_cache=cache)
+        assert not np.allclose(first, chain_stats(chain, 20, stats_cache=cache))
+        assert chain_stats(chain, stats_cache=cache) is chain_stats(
+            chain, stats_cache=cache
+        )
+
+    def test_key_includes_chain_temperature(self):
+        """Changing samples.beta between calls is not served the old result."""
+        chain = self._chain()
+        cache = StatsCache()
+        mean = chain_stats(chain, stats_cache=cache)
+        draws = chain_stats(chain, 20, seed=1, stats_cache=cache)
+        chain.beta = 0.5
+        assert chain_stats(chain, stats_cache=cache)["logZ"] != mean["logZ"]
+        assert not np.allclose(chain_stats(chain, 20, seed=1, stats_cache=cache), draws)
+        np.testing.assert_allclose(
+            chain_stats(chain, 20, seed=1, stats_cache=cache),
+            chain_stats(chain, 20, 0.5, seed=1, stats_cache=False),
+        )
+
+
+class TestTemperatureLadder:
+    """Test tension statistics over an array of inverse temperatures."""
+
+    @staticmethod
+    def _chains():
+        """Return a joint and two separate nested sampling runs."""
+        from anesthetic.examples.perfect_ns import gaussian
+
+        np.random.seed(0)
+        return [gaussian(30, 2, 1.0, sigma) for sigma in (0.3, 0.35, 0.4)]
+
+    def test_indexed_by_beta(self):
+        """Each temperature matches a call with that temperature alone."""
+        chains = self._chains()
+        betas = [0.25, 0.5, 1.0]
+        ladder = tension_stats(*chains, nsamples=10, beta=betas, seed=0)
+        assert list(ladder.index.names) == ["beta", "samples"]
+        assert ladder.index.get_level_values("beta").unique().tolist() == betas
+        for beta in betas:
+            single = tension_stats(*chains, nsamples=10, beta=beta, seed=0)
+            np.testing.assert_allclose(
+                np.asarray(ladder.loc[beta]), np.asarray(single), rtol=1e-9
+            )
+
+    def test_mean_values_indexed_by_beta(self):
+        """Without draws there is one row per temperature."""
+        ladder = tension_stats(*self._chains(), beta=np.linspace(0.1, 1, 4))
+        assert ladder.index.name == "beta"
+        assert len(ladder) == 4
+
+    def test_one_stats_call_per_chain(self):
+        """A ladder of temperatures costs one stats call for each chain."""
+        original = NestedSamples.stats
+        with patch.object(NestedSamples, "stats", autospec=True) as stats:
+            stats.side_effect = original
+            tension_stats(
+                *self._chains(),
+                nsamples=10,
+                beta=np.linspace(0.01, 1, 100),
+                stats_cache=False,
+            )
+        assert stats.call_count == 3
+
+
+class TestChunkedDraws:
+    """Test drawing statistics in blocks of bounded size."""
+
+    @staticmethod
+    def _chain():
+        """Return a small nested sampling run."""
+        from anesthetic.examples.perfect_ns import gaussian
+
+        np.random.seed(0)
+        return gaussian(50, 2, 1.0, 0.3)
+
+    @pytest.mark.parametrize("beta", [None, 0.5, [0.0, 0.5, 1.0]])
+    @pytest.mark.parametrize("chunksize", [1, 3, 7])
+    def test_independent_of_block_size(self, beta, chunksize):
+        """Any size of block gives exactly the same draws."""
+        chain = self._chain()
+        halves = chain_stats(chain, 20, beta, 4, False, chunksize=10)
+        chunked = chain_stats(chain, 20, beta, 4, False, chunksize=chunksize)
+        pd.testing.assert_frame_equal(chunked, halves)
+        assert chunked.get_labels().tolist() == halves.get_labels().tolist()
+
+    @pytest.mark.parametrize("beta", [None, 0.5, [0.0, 0.5, 1.0]])
+    def test_one_block_is_anesthetics(self, beta):
+        """Draws that fit in one block are exactly anesthetic's own."""
+        chain = self._chain()
+        np.random.seed(3)
+        theirs = chain.stats(nsamples=20, beta=beta)
+        np.random.seed(3)
+        ours = chain_stats(chain, 20, beta, stats_cache=False)
+        pd.testing.assert_frame_equal(ours, theirs)
+        assert ours.get_labels().tolist() == theirs.get_labels().tolist()
+
+    def test_seeded_streams(self):
+        """Seeded draws in one block and in several are pinned."""
+        chain = self._chain()
+        whole = chain_stats(chain, 3, seed=4, stats_cache=False)
+        np.testing.assert_allclose(
+            whole["logZ"], [-0.054608044849965, -0.032266058859709, -0.033731401234295]
+        )
+        chunked = chain_stats(chain, 3, seed=4, stats_cache=False, chunksize=2)
+        np.testing.assert_allclose(
+            chunked["logZ"],
+            [-0.027155543121659, -0.050529365030834, -0.027580871146370],
+        )
+
+    def test_blocks_are_bounded(self, monkeypatch):
+        """Each block is sized to stay within STATS_CHUNK_BYTES."""
+        chain = self._chain()
+        monkeypatch.setattr("unimpeded.tension.STATS_CHUNK_BYTES", 8 * len(chain) * 4)
+        original = NestedSamples.stats
+        with patch.object(NestedSamples, "stats", autospec=True) as stats:
+            stats.side_effect = original
+            result = chain_stats(chain, 10, seed=0, stats_cache=False)
+        assert len(result) == 10
+        assert [c.kwargs["nsamples"].shape[1] for c in stats.call_args_list] == [
+            4,
+            4,
+            2,
+        ]
+
+    def test_agrees_with_anesthetic(self):
+        """The draws have the distribution anesthetic's own draws have."""
+        chain = self._chain()
+        ours = chain_stats(chain, 2000, seed=0, stats_cache=False, chunksize=300)
+        theirs = chain.stats(nsamples=2000)
+        np.testing.assert_allclose(
+            np.asarray(ours.mean()), np.asarray(theirs.mean()), rtol=0.05
+        )
+        np.testing.assert_allclose(
+            np.asarray(ours.std()), np.asarray(theirs.std()), rtol=0.1
+        )
+
+    @pytest.mark.parametrize("beta", [None, 0.5, [0.0, 0.5, 1.0]])
+    def test_logw_matches_anesthetic(self, beta):
+        """Log-weights equal anesthetic's own for the same uniform variates."""
+        from unimpeded.tension import _logw
+
+        chain = self._chain()
+        random = np.random.default_rng(0).random((6, len(chain)))
+        with patch("numpy.random.rand", return_value=random.T.copy()):
+            theirs = chain.logw(6, beta)
+        ours = _logw(chain, random, beta)
+        np.testing.assert_allclose(ours.to_numpy(), theirs.to_numpy(), rtol=1e-12)
+        assert ours.columns.equals(theirs.columns)
+
+    def test_tension_stats_chunksize(self):
+        """tension_stats gives the same result whatever the size of blocks."""
+        from anesthetic.examples.perfect_ns import gaussian
+
+        np.random.seed(1)
+        chains = [gaussian(30, 2, 1.0, sigma) for sigma in (0.3, 0.35, 0.4)]
+        first = tension_stats(
+            *chains, nsamples=12, seed=5, stats_cache=False, chunksize=7
+        )
+        second = tension_stats(
+            *chains, nsamples=12, seed=5, stats_cache=False, chunksize=5
+        )
+        pd.testing.assert_frame_equal(second, first)
+
+
+class TestBatchTensionStats:
+    """Test tension statistics computed for many groups at once."""
+
+    @staticmethod
+    def _stats(rng, ndraws=5):
+        """Return random statistics of a chain, as tension_stats takes them."""
+        from anesthetic.samples import Samples
+
+        values = rng.normal([-50, 3, -47, 2], 0.5, size=(ndraws, 4))
+        return Samples(values, columns=list(STATS_COLUMNS))
+
+    def test_matches_tension_stats(self):
+        """Each group's statistics match those of a call to tension_stats."""
+        rng = np.random.default_rng(0)
+        groups = [[self._stats(rng) for _ in range(3)] for _ in range(4)]
+        fs = rng.uniform(1, 3, size=(4, 3))
+        result = batch_tension_stats(
+            [np.asarray(joint) for joint, *_ in groups],
+            [[np.asarray(group[k]) for group in groups] for k in (1, 2)],
+            fs[:, 0, None],
+            fs[:, 1:].T[:, :, None],
+        )
+        assert result.shape == (4, 5, len(TENSION_STATISTICS))
+        for i, (joint, *separate) in enumerate(groups):
+            expected = tension_stats(
+                joint, *separate, joint_f=fs[i, 0], separate_fs=list(fs[i, 1:])
+            )
+            np.testing.assert_allclose(
+                result[i], np.asarray(expected[list(TENSION_STATISTICS)])
+            )
+
+    def test_padding_leaves_result_unchanged(self):
+        """A pair padded with zeros to a triplet gives the pair's statistics."""
+        rng = np.random.default_rng(1)
+        joint, a, b = (np.asarray(self._stats(rng)) for _ in range(3))
+        pair = batch_tension_stats(joint, [a, b], 2.0, [[1.5], [3.0]])
+        padded = batch_tension_stats(
+            joint, [a, b, np.zeros_like(a)], 2.0, [[1.5], [3.0], [1.0]]
+        )
+        np.testing.assert_array_equal(pair, padded)
+
+    def test_shape_mismatch(self):
+        """Separate statistics must match the shape of the joint's."""
+        with pytest.raises(ValueError, match="Expected 'joint'"):
+            batch_tension_stats(np.zeros((3, 4)), np.zeros((2, 4, 4)))
+
+
+class TestTensionSweep:
+    """Test sweeping tension statistics over the catalog."""
+
+    COMBINATIONS = {
+        ("lcdm", "a"),
+        ("lcdm", "b"),
+        ("lcdm", "c"),
+        ("lcdm", "a+b"),
+        ("lcdm", "a+c"),
+        ("lcdm", "a+b+c"),
+        ("klcdm", "a"),
+        ("klcdm", "b"),
+        ("klcdm", "a+b"),
+        ("klcdm", "a+c"),
+    }
+
+    @pytest.fixture
+    def dbe(self):
+        """Patch the explorer with a small catalog of synthetic chains."""
+        from anesthetic.examples.perfect_ns import gaussian
+
+        chains = {}
+        for i, key in enumerate(sorted(self.COMBINATIONS)):
+            np.random.seed(i)
+            chains[key] = gaussian(30, 2, 1.0, 0.3 + 0.05 * i)
+        dbe = MagicMock()
+        dbe.catalog = Catalog(self.COMBINATIONS)
+        dbe.download_samples.side_effect = lambda method, *key: chains[key]
+        dbe.download_prior_info.return_value = {"nprior": 100, "ndiscarded": 50}
+        with patch("unimpeded.tension.DatabaseExplorer", return_value=dbe):
+            yield dbe
+
+    def test_complete_pairs_of_every_model(self, dbe):
+        """By default every complete pair of every model is swept."""
+        result = tension_sweep("ns", nsamples=10, workers=0)
+        assert list(result.columns) == ["model", "datasets", "statistic", "mean", "std"]
+        assert sorted(set(zip(result.model, result.datasets))) == [
+            ("klcdm", "a+b"),
+            ("lcdm", "a+b"),
+            ("lcdm", "a+c"),
+        ]
+        assert len(result) == 3 * len(TENSION_STATISTICS)
+        assert result["mean"].notna().all()
+
+    def test_each_chain_loaded_once(self, dbe):
+        """A chain shared between groups is downloaded only once."""
+        tension_sweep("ns", "lcdm", nsamples=10, workers=0)
+        loaded = [c.args for c in dbe.download_samples.call_args_list]
+        assert sorted(loaded) == sorted(
+            ("ns", "lcdm", d) for d in ["a", "b", "c", "a+b", "a+c"]
+        )
+
+    def test_matches_tension_stats(self, dbe):
+        """Summaries agree with tension_stats called on the same draws."""
+        result = tension_sweep(
+            "ns", "lcdm", [("b", "a")], nsamples=10, seed=3, workers=0
+        )
+        chain = dbe.download_samples.side_effect
+        expected = tension_stats(
+            chain_stats(chain("ns", "lcdm", "a+b"), 10, seed=3),
+            chain_stats(chain("ns", "lcdm", "a"), 10, seed=3),
+            chain_stats(chain("ns", "lcdm", "b"), 10, seed=3),
+            joint_f=2.0,
+            separate_fs=[2.0, 2.0],
+        )
+        means = result.set_index("statistic")["mean"]
+        for statistic in TENSION_STATISTICS:
+            assert means[statistic] == pytest.approx(expected[statistic].mean())
+
+    def test_unpublished_groups_are_skipped(self, dbe, capsys):
+        """Groups without a joint chain, or a separate one, are skipped."""
+        result = tension_sweep(
+            "ns", ["lcdm", "klcdm"], [("a", "b"), ("a", "c")], nsamples=10, workers=0
+        )
+        assert sorted(set(zip(result.model, result.datasets))) == [
+            ("klcdm", "a+b"),
+            ("lcdm", "a+b"),
+            ("lcdm", "a+c"),
+        ]
+        assert "Skipping klcdm a+c" in capsys.readouterr().out
+
+    def test_failing_chain_skips_only_its_groups(self, dbe, capsys):
+        """An error loading one chain loses only the groups that need it."""
+        import requests
+
+        load = dbe.download_samples.side_effect
+
+        def download_samples(method, model, dataset):
+            if dataset == "c":
+                raise requests.ConnectionError("connection reset")
+            return load(method, model, dataset)
+
+        dbe.download_samples.side_effect = download_samples
+        result = tension_sweep("ns", "lcdm", nsamples=10, workers=0)
+        assert set(result.datasets) == {"a+b"}
+        out = capsys.readouterr().out
+        assert "Error loading lcdm c: ConnectionError: connection reset" in out
+        assert "Skipping lcdm a+c: a chain could not be loaded." in out
+
+    def test_incomplete_catalog_raises(self, dbe):
+        """A catalog that cannot be fetched in full stops the sweep."""
+        import requests
+
+        type(dbe).catalog = property(
+            MagicMock(side_effect=requests.ConnectionError("page 3 failed"))
+        )
+        with pytest.raises(requests.ConnectionError):
+            tension_sweep("ns", nsamples=10, workers=0)
+
+    def test_default_seed_is_reproducible(self, dbe):
+        """Unless told otherwise, a sweep gives the same table every run."""
+        first = tension_sweep("ns", "lcdm", nsamples=10, workers=0)
+        second = tension_sweep("ns", "lcdm", nsamples=10, workers=0)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_triplets(self, dbe):
+        """An integer selects complete groups of that size."""
+        result = tension_sweep("ns", "lcdm", 3, nsamples=10, workers=0)
+        assert set(result.datasets) == {"a+b+c"}
+
+    def test_mean_values(self, dbe):
+        """Without draws the mean values are used, and there is no spread."""
+        result = tension_sweep("ns", "lcdm", nsamples=None, workers=0)
+        assert result["mean"].notna().all()
+        assert result["std"].isna().all()
+
+    def test_temperature_ladder(self, dbe):
+        """An array of beta adds a row per temperature to each group."""
+        result = tension_sweep(
+            "ns", "lcdm", nsamples=10, beta=[0.5, 1.0], seed=2, workers=0
+        )
+        assert list(result.columns) == [
+            "model",
+            "datasets",
+            "beta",
+            "statistic",
+            "mean",
+            "std",
+        ]
+        assert len(result) == 2 * 2 * len(TENSION_STATISTICS)
+        single = tension_sweep("ns", "lcdm", nsamples=10, beta=1.0, seed=2, workers=0)
+        ladder = result[result.beta == 1.0].drop(columns="beta")
+        np.testing.assert_allclose(ladder["mean"], single["mean"], rtol=1e-12)
+
+    def test_workers(self, dbe):
+        """Chains are reduced by the worker pool, with the same result."""
+        serial = tension_sweep("ns", "lcdm", nsamples=10, seed=1, workers=0)
+        with (
+            patch(
+                "unimpeded.tension.process_pool",
+                lambda workers: ThreadPoolExecutor(workers),
+            ),
+            patch("unimpeded.tension._sweep_explorer", return_value=dbe),
+        ):
+            pooled = tension_sweep("ns", "lcdm", nsamples=10, seed=1, workers=2)
+        pd.testing.assert_frame_equal(serial, pooled)
+
+    def test_worker_processes(self, tmp_path, isolated_cache_dir, monkeypatch):
+        """Two worker processes, loading chains from the cache, agree too."""
+        import hashlib
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        from anesthetic.examples.perfect_ns import gaussian
+
+        from unimpeded.cache import FileCache
+        from unimpeded.database import DatabaseExplorer
+
+        # Publish the chains through the on-disk catalog and file cache, which
+        # are all a worker process can see.
+        file_cache = FileCache(str(isolated_cache_dir / "files"))
+        manifest = {}
+        for i, (model, dataset) in enumerate(sorted(self.COMBINATIONS)):
+            np.random.seed(i)
+            chain = gaussian(30, 2, 1.0, 0.3 + 0.05 * i)
+            chain = chain.set_labels([f"${c}$" for c in chain.columns])
+            name = f"ns_{model}_{dataset}"
+            contents = {
+                f"{name}.csv": chain.to_csv().encode(),
+                f"{name}.prior_info": b"nprior = 100\nndiscarded = 50\n",
+            }
+            entry = {"id": i, "version": 0, "files": {}}
+            for key, content in contents.items():
+                checksum = f"md5:{hashlib.md5(content).hexdigest()}"
+                source = tmp_path / key
+                source.write_bytes(content)
+                file_cache.put(checksum, str(source))
+                entry["files"][key] = {
+                    "url": f"https://zenodo.org/api/records/{i}/files/{key}/content",
+                    "size": len(content),
+                    "checksum": checksum,
+                }
+            manifest[model, dataset] = entry
+        DatabaseExplorer()._write_catalog(manifest)
+
+        # Spawned processes import unimpeded afresh, so find the cache through
+        # the environment; a forkserver started earlier would not.
+        monkeypatch.setenv("UNIMPEDED_CACHE_DIR", str(isolated_cache_dir))
+        spawn = multiprocessing.get_context("spawn")
+        with (
+            patch(
+                "unimpeded.tension.process_pool",
+                lambda workers: ProcessPoolExecutor(workers, mp_context=spawn),
+            ),
+            patch("unimpeded.http.Session.get", side_effect=AssertionError),
+        ):
+            serial = tension_sweep("ns", "lcdm", nsamples=10, seed=1, workers=0)
+            pooled = tension_sweep("ns", "lcdm", nsamples=10, seed=1, workers=2)
+        assert len(pooled) == 2 * len(TENSION_STATISTICS)
+        pd.testing.assert_frame_equal(serial, pooled)
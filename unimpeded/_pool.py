@@ -0,0 +1,28 @@
+"""Process pools for parsing chains and sweeping statistics in parallel."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def process_pool(workers):
+    """Start a pool of ``workers`` processes, safe to start from threads.
+
+    The processes are forked from a clean server process where the platform
+    supports it, and spawned otherwise, since a
+    :class:`~unimpeded.database.DatabaseExplorer` may have download threads
+    running in this one.
+
+    Parameters
+    ----------
+    workers : int
+        Number of processes.
+
+    Returns
+    -------
+    concurrent.futures.ProcessPoolExecutor
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+    return ProcessPoolExecutor(workers, mp_context=context)
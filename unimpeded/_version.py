@@ -1 +1 @@
-__version__ = "1.2.8"
+__version__ = "1.2.33"
@@ -0,0 +1,472 @@
+"""Content-addressed disk caches for files downloaded from Zenodo.
+
+Files are stored under the checksum Zenodo publishes for them, so a file is
+fetched once however many deposits or versions of a deposit it appears in,
+and a changed file is fetched afresh because its checksum has changed.
+Chains parsed from those files are kept the same way, in a binary columnar
+form that loads without parsing any text, as are the statistics computed
+from them.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from anesthetic.samples import MCMCSamples, NestedSamples, Samples
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+#: Largest total size in bytes of the files kept in the cache, beyond which
+#: the least recently used are evicted. Override with the
+#: ``UNIMPEDED_FILE_CACHE_SIZE`` environment variable.
+FILE_CACHE_SIZE = int(os.environ.get("UNIMPEDED_FILE_CACHE_SIZE", 20 * 1024**3))
+
+#: Largest total size in bytes of the parsed samples kept by a
+#: :class:`SamplesCache`, apart from the files in :data:`FILE_CACHE_SIZE`.
+#: Override with the ``UNIMPEDED_SAMPLES_CACHE_SIZE`` environment variable.
+SAMPLES_CACHE_SIZE = int(os.environ.get("UNIMPEDED_SAMPLES_CACHE_SIZE", 10 * 1024**3))
+
+#: Number of results a :class:`StatsCache` keeps in memory, beyond which the
+#: least recently used are dropped. Override with the
+#: ``UNIMPEDED_STATS_CACHE_SIZE`` environment variable.
+STATS_CACHE_SIZE = int(os.environ.get("UNIMPEDED_STATS_CACHE_SIZE", 1024))
+
+
+class FileCache:
+    """Size-bounded, least-recently-used store of files keyed by checksum.
+
+    Safe to share between threads and processes: files are downloaded under a
+    hidden, locked partial name and moved into place atomically.
+
+    Parameters
+    ----------
+    directory : str
+        Directory holding the cached files; created when first needed.
+    max_bytes : int, optional
+        Largest total size of the cached files. Defaults to
+        :data:`FILE_CACHE_SIZE`.
+    """
+
+    def __init__(self, directory, max_bytes=FILE_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, checksum):
+        """Return where the file with ``checksum`` is, or would be, cached.
+
+        Parameters
+        ----------
+        checksum : str
+            Checksum as published by Zenodo, e.g. ``"md5:9e107d9d..."``.
+        """
+        algorithm, _, digest = checksum.rpartition(":")
+        name = re.sub(r"[^0-9A-Za-z]", "", digest)
+        if not name:
+            raise ValueError(f"Invalid checksum: {checksum!r}")
+        return os.path.join(self.directory, algorithm or "md5", name[:2], name)
+
+    def get(self, checksum):
+        """Return the path of the cached file with ``checksum``, or None.
+
+        A hit marks the file as the most recently used.
+        """
+        path = self.path(checksum)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def open(self, checksum):
+        """Open the cached file with ``checksum`` for binary reading, or None.
+
+        Unlike opening the path :meth:`get` returns, this cannot fail because
+        another process evicted the file in between: once open, the file stays
+        readable until closed, whatever happens to its path. A hit marks the
+        file as the most recently used.
+        """
+        try:
+            fp = open(self.path(checksum), "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(fp.fileno())
+        except OSError:
+            pass
+        return fp
+
+    def open_partial(self, checksum):
+        """Open the partial download of the file with ``checksum``.
+
+        The partial file persists between attempts, so an interrupted download
+        can be resumed from where it stopped. It is locked while open, so only
+        one process at a time downloads a given file; another waiting on the
+        lock should check :meth:`get` once it has it.
+
+        Returns
+        -------
+        file object
+            The partial file, opened for binary reading and appending.
+        """
+        path = self.path(checksum)
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        fp = open(os.path.join(directory, f".{name}.part"), "ab+")
+        if fcntl is not None:
+            fcntl.flock(fp, fcntl.LOCK_EX)
+        return fp
+
+    def put(self, checksum, source):
+        """Move the complete file at ``source`` into the cache.
+
+        Then evicts the least recently used files, other than this one, until
+        the cache is back within :attr:`max_bytes`.
+
+        Returns
+        -------
+        str
+            The path of the cached file.
+        """
+        path = self.path(checksum)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Remove least recently used files until within :attr:`max_bytes`.
+
+        Parameters
+        ----------
+        keep : str, optional
+            Path of a file never to evict, e.g. one about to be read.
+        """
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+class SamplesCache:
+    """Columnar binary copies of parsed samples, keyed by the CSV's checksum.
+
+    Each entry is a directory with one ``.npy`` file per column and per index
+    level, and a ``meta.json`` recording the column names, labels and
+    samples class, so that :meth:`load` can rebuild the samples object by
+    memory-mapping the arrays rather than parsing text. The same CSV may
+    have several entries, one per variant, e.g. ``"float32"`` for samples
+    held at reduced precision. Entries are written to a temporary directory
+    and renamed into place, and the least recently loaded are evicted once
+    the cache exceeds its byte budget.
+
+    Parameters
+    ----------
+    directory : str
+        Directory holding the entries; created when first needed.
+    max_bytes : int, optional
+        Largest total size of the entries. Defaults to
+        :data:`SAMPLES_CACHE_SIZE`.
+    """
+
+    #: Layout of the entries; entries of any other version are ignored.
+    FORMAT = 1
+
+    def __init__(self, directory, max_bytes=SAMPLES_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, checksum, variant=None):
+        """Return the directory of the entry for the CSV with ``checksum``.
+
+        Parameters
+        ----------
+        checksum : str
+            Checksum of the CSV the samples were parsed from.
+        variant : str, optional
+            Name distinguishing samples derived from the CSV, e.g.
+            ``"float32"``. Defaults to the samples as parsed.
+        """
+        path = FileCache(self.directory).path(checksum)
+        if variant is not None:
+            path += "-" + re.sub(r"[^0-9A-Za-z_.-]", "_", variant)
+        return path
+
+    def load(self, checksum, columns=None, variant=None):
+        """Rebuild the samples cached for ``checksum``, or return None.
+
+        The arrays are memory-mapped copy-on-write, so they are read straight
+        from the page cache, and the samples may be modified without touching
+        the cached copy.
+
+        Parameters
+        ----------
+        checksum : str
+            Checksum of the CSV the samples were parsed from.
+        columns : collection of str, optional
+            Names of the columns to load, in any order; the others are never
+            read. Defaults to all of them. An entry holding only some of the
+            CSV's columns is a miss unless it holds every one of these.
+        variant : str, optional
+            Which entry of the CSV to load; see :meth:`path`.
+        """
+        path = self.path(checksum, variant)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("format") != self.FORMAT:
+                return None
+            index = [
+                _map(os.path.join(path, f"index{i}.npy"))
+                for i in range(len(meta["index_names"]))
+            ]
+            names = [c[0] if meta["labelled"] else c for c in meta["columns"]]
+            if "names" in meta:
+                held = set(meta["names"]) if columns is None else set(columns)
+                if not held & set(meta["names"]) <= set(names):
+                    return None
+            wanted = [
+                i for i, name in enumerate(names) if columns is None or name in columns
+            ]
+            columns = {i: _map(os.path.join(path, f"column{i}.npy")) for i in wanted}
+            os.utime(os.path.join(path, "meta.json"))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if len(index) == 1:
+            index = pd.Index(index[0], name=meta["index_names"][0])
+        else:
+            index = pd.MultiIndex.from_arrays(index, names=meta["index_names"])
+        frame = pd.DataFrame(columns, index=index, copy=False)
+        kept = [meta["columns"][i] for i in wanted]
+        if meta["labelled"]:
+            frame.columns = pd.MultiIndex.from_tuples(
+                [tuple(c) for c in kept], names=meta["column_names"]
+            )
+        else:
+            frame.columns = pd.Index(kept, name=meta["column_names"][0])
+        return _SAMPLES_TYPES[meta["type"]](frame, copy=False)
+
+    def save(self, checksum, samples, variant=None, names=None):
+        """Store ``samples``, parsed from the CSV with ``checksum``.
+
+        Samples of an unknown class, or with non-numeric columns, are not
+        stored. Failing to write the entry, e.g. for lack of space, is not an
+        error: the samples are simply parsed again next time. Each column is
+        stored in its own dtype, so reduced-precision samples take less space
+        on disk as well as in memory. An existing entry is kept, unless it
+        holds only some of the CSV's columns and ``samples`` hold more.
+
+        Parameters
+        ----------
+        checksum : str
+            Checksum of the CSV the samples were parsed from.
+        samples : :class:`anesthetic.samples.Samples`
+            The samples to store.
+        variant : str, optional
+            Name distinguishing samples derived from the CSV; see :meth:`path`.
+        names : list of str, optional
+            Names of all the columns of the CSV, when ``samples`` hold only
+            some of them. Defaults to the columns of ``samples``.
+        """
+        kind = type(samples).__name__
+        if kind not in _SAMPLES_TYPES or any(
+            dtype == object for dtype in samples.dtypes
+        ):
+            return
+        labelled = isinstance(samples.columns, pd.MultiIndex)
+        held = list(samples.columns.get_level_values(0))
+        path = self.path(checksum, variant)
+        partial = False
+        if os.path.exists(path):
+            try:
+                with open(os.path.join(path, "meta.json")) as f:
+                    meta = json.load(f)
+                kept = [c[0] if meta["labelled"] else c for c in meta["columns"]]
+                if "names" not in meta or set(held) <= set(kept):
+                    return
+            except (OSError, ValueError, KeyError):
+                return
+            partial = True
+
+        meta = {
+            "format": self.FORMAT,
+            "type": kind,
+            "labelled": labelled,
+            "columns": [list(c) if labelled else c for c in samples.columns],
+            "column_names": list(samples.columns.names),
+            "index_names": list(samples.index.names),
+        }
+        if names is not None and set(names) - set(held):
+            meta["names"] = list(names)
+        staging = aside = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            staging = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".")
+            for i in range(samples.index.nlevels):
+                values = samples.index.get_level_values(i).to_numpy()
+                np.save(os.path.join(staging, f"index{i}.npy"), values)
+            for i in range(samples.shape[1]):
+                values = samples.iloc[:, i].to_numpy()
+                np.save(os.path.join(staging, f"column{i}.npy"), values)
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            if partial:
+                # Move the partial entry aside first: a directory can only be
+                # renamed over an empty one. Its arrays stay readable by
+                # anyone who has them mapped.
+                aside = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".")
+                os.replace(path, os.path.join(aside, "entry"))
+            os.rename(staging, path)
+        except OSError:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+            return
+        finally:
+            if aside is not None:
+                shutil.rmtree(aside, ignore_errors=True)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Remove least recently loaded entries until within :attr:`max_bytes`.
+
+        Parameters
+        ----------
+        keep : str, optional
+            Directory of an entry never to evict.
+        """
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            if "meta.json" not in names or os.path.basename(root).startswith("."):
+                continue
+            try:
+                used = os.stat(os.path.join(root, "meta.json")).st_mtime
+                size = sum(os.stat(os.path.join(root, n)).st_size for n in names)
+            except OSError:
+                continue
+            entries.append((used, size, root))
+            total += size
+
+        for _, size, root in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if root == keep:
+                continue
+            shutil.rmtree(root, ignore_errors=True)
+            total -= size
+
+
+class StatsCache:
+    """Results of :meth:`anesthetic.samples.NestedSamples.stats`, by key.
+
+    Keys are tuples whose first item identifies the chain, e.g. a digest of
+    its contents, and whose others are the arguments the statistics were
+    computed with. Results are held in memory, the least recently used
+    dropped beyond ``maxsize`` of them, and optionally also in a
+    :class:`SamplesCache` on disk, so that they outlive the process and are
+    shared with others using the same directory.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Largest number of results held in memory. Defaults to
+        :data:`STATS_CACHE_SIZE`.
+    directory : str, optional
+        Directory of the on-disk tier. Defaults to keeping results in memory
+        only.
+    """
+
+    def __init__(self, maxsize=STATS_CACHE_SIZE, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self._disk = SamplesCache(directory) if directory else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the result stored under ``key``, or None.
+
+        A result found only on disk is brought back into memory.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self._disk is None:
+            return None
+        chain, variant = self._entry(key)
+        for series in (False, True):
+            stats = self._disk.load(chain, variant=variant + "-series" * series)
+            if stats is not None:
+                stats = stats.iloc[0] if series else stats
+                self._remember(key, stats)
+                return stats
+        return None
+
+    def put(self, key, stats):
+        """Store ``stats``, a Series or samples of statistics, under ``key``."""
+        self._remember(key, stats)
+        if self._disk is None:
+            return
+        chain, variant = self._entry(key)
+        if isinstance(stats, pd.Series):
+            stats, variant = Samples(stats.to_frame().T), variant + "-series"
+        self._disk.save(chain, stats, variant)
+
+    def clear(self):
+        """Forget the results held in memory; those on disk are kept."""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key, stats):
+        """Hold ``stats`` in memory, dropping the least recently used."""
+        with self._lock:
+            self._memory[key] = stats
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _entry(key):
+        """Return the checksum and variant under which ``key`` is on disk."""
+        chain, *arguments = key
+        digest = hashlib.sha1(repr(arguments).encode()).hexdigest()[:16]
+        return chain, f"stats-{digest}"
+
+
+def _map(path):
+    """Memory-map a ``.npy`` file copy-on-write, as a plain array."""
+    return np.asarray(np.load(path, mmap_mode="c"))
+
+
+_SAMPLES_TYPES = {cls.__name__: cls for cls in (NestedSamples, MCMCSamples, Samples)}
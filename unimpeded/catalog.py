@@ -0,0 +1,145 @@
+"""Indexed view of the (model, dataset) combinations published on Zenodo.
+
+Joint datasets are named by joining the names of their components with
+``+``, e.g. ``"bao.desi_dr2+planck_2018_CamSpec"``. :class:`Catalog` splits
+those names once and keeps inverted indexes over them, so that the queries
+made while planning tension calculations cost time proportional to their
+result rather than to the size of the grid.
+"""
+
+from collections import defaultdict
+
+#: Separator between the component datasets of a joint dataset name.
+JOINT_SEPARATOR = "+"
+
+
+def components(dataset):
+    """Split a dataset name into the datasets it combines.
+
+    Parameters
+    ----------
+    dataset : str
+        A dataset name, either separate (``"planck_2018_plik"``) or joint
+        (``"bao.desi_dr2+planck_2018_plik"``).
+
+    Returns
+    -------
+    tuple of str
+        The component names in the order they appear in ``dataset``; a
+        separate dataset is its own single component.
+    """
+    return tuple(dataset.split(JOINT_SEPARATOR))
+
+
+class Catalog:
+    """Inverted indexes over a set of (model, dataset) combinations.
+
+    Parameters
+    ----------
+    combinations : iterable of tuple
+        The (model, dataset) pairs available, e.g.
+        :attr:`unimpeded.database.Database.combinations`.
+    """
+
+    def __init__(self, combinations):
+        self.combinations = frozenset(combinations)
+
+        datasets = defaultdict(set)
+        models = defaultdict(set)
+        joints = defaultdict(set)
+        self._joint_names = {}
+        for model, dataset in self.combinations:
+            datasets[model].add(dataset)
+            models[dataset].add(model)
+            parts = components(dataset)
+            if len(parts) > 1:
+                self._joint_names[model, frozenset(parts)] = dataset
+                for part in parts:
+                    joints[model, part].add(dataset)
+
+        self._datasets = {model: sorted(d) for model, d in datasets.items()}
+        self._models = {dataset: sorted(m) for dataset, m in models.items()}
+        self._joints = {key: sorted(j) for key, j in joints.items()}
+
+        groups = defaultdict(list)
+        for model, parts in self._joint_names:
+            if parts <= datasets[model]:
+                groups[model, len(parts)].append(tuple(sorted(parts)))
+        self._groups = {key: sorted(g) for key, g in groups.items()}
+
+        self.models = sorted(self._datasets)
+        self.datasets = sorted(self._models)
+
+    def __contains__(self, combination):
+        """Check whether a (model, dataset) pair is available."""
+        return combination in self.combinations
+
+    def __len__(self):
+        """Count the (model, dataset) pairs available."""
+        return len(self.combinations)
+
+    def datasets_for(self, model):
+        """Return the sorted datasets available for ``model``."""
+        return list(self._datasets.get(model, ()))
+
+    def models_for(self, dataset):
+        """Return the sorted models available for ``dataset``."""
+        return list(self._models.get(dataset, ()))
+
+    def joints_containing(self, model, dataset):
+        """Return the sorted joint datasets of ``model`` that include ``dataset``.
+
+        Parameters
+        ----------
+        model : str
+            The cosmological model name.
+        dataset : str
+            A separate dataset name, e.g. ``"bao.desi_dr2"``.
+
+        Returns
+        -------
+        list of str
+            Every joint dataset available for ``model`` with ``dataset`` among
+            its components.
+        """
+        return list(self._joints.get((model, dataset), ()))
+
+    def joint_name(self, model, datasets):
+        """Return the name of the joint of ``datasets`` as published.
+
+        Parameters
+        ----------
+        model : str
+            The cosmological model name.
+        datasets : iterable of str
+            The separate datasets combined, in any order.
+
+        Returns
+        -------
+        str or None
+            The joint dataset name available for ``model``, or None if that
+            combination of datasets has not been published.
+        """
+        return self._joint_names.get((model, frozenset(datasets)))
+
+    def complete_groups(self, model, size=2):
+        """Return the groups of datasets ready for a tension calculation.
+
+        A group is complete when the joint dataset and every one of its
+        separate datasets are all available for ``model``.
+
+        Parameters
+        ----------
+        model : str
+            The cosmological model name.
+        size : int, optional
+            Number of datasets per group: 2 for pairs, 3 for triplets, and so
+            on. Defaults to 2.
+
+        Returns
+        -------
+        list of tuple
+            Sorted tuples of the separate dataset names in each group, with
+            :meth:`joint_name` giving the matching joint dataset.
+        """
+        return list(self._groups.get((model, size), ()))
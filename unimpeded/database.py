@@ -5,13 +5,34 @@ Provides :class:`Database` with the naming scheme shared by both halves,
 :class:`DatabaseExplorer` for downloading it back without credentials.
 """
 
+import atexit
+import csv
 import datetime
+import hashlib
+import io
+import json
+import math
 import os
-from io import BytesIO
-
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
 import requests
 import yaml
 from anesthetic import read_chains, read_csv
+from anesthetic.samples import MCMCSamples, NestedSamples, Samples
+from anesthetic.weighted_labelled_pandas import WeightedLabelledDataFrame
+
+from unimpeded._pool import process_pool
+from unimpeded.cache import FileCache, SamplesCache
+from unimpeded.catalog import Catalog
+from unimpeded.http import default_session
 
 #: Base directory holding the chain grid that ``DatabaseCreator`` uploads from.
 #: Defaults to the DiRAC allocation the public grid was produced on; override
@@ -22,6 +43,70 @@ DEFAULT_GRID_ROOT = os.environ.get(
     "/home/dlo26/rds/rds-dirac-dp192-63QXlf5HuFo/dlo26",
 )
 
+#: Directory for unimpeded's on-disk caches, such as the catalog of deposits.
+#: Follows the XDG convention (``$XDG_CACHE_HOME/unimpeded``, normally
+#: ``~/.cache/unimpeded``); override with the ``UNIMPEDED_CACHE_DIR`` environment
+#: variable, e.g. to share one cache between the nodes of a cluster.
+DEFAULT_CACHE_DIR = os.environ.get(
+    "UNIMPEDED_CACHE_DIR",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "unimpeded"
+    ),
+)
+
+#: Age in seconds after which a cached catalog is refreshed in the background.
+#: Override with the ``UNIMPEDED_CATALOG_TTL`` environment variable.
+CATALOG_TTL = float(os.environ.get("UNIMPEDED_CATALOG_TTL", 24 * 60 * 60))
+
+#: Maximum number of catalog pages fetched concurrently once the first page has
+#: reported how many there are.
+CATALOG_WORKERS = 8
+
+#: Size in bytes of the chunks files are streamed from Zenodo in.
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+#: Number of times in a row a download may be interrupted without receiving
+#: any data before giving up on resuming it.
+DOWNLOAD_RESUMES = 5
+
+#: Number of byte ranges a large file is split into and downloaded over
+#: concurrently. Override with the ``UNIMPEDED_DOWNLOAD_SEGMENTS`` environment
+#: variable, or per instance with ``download_segments``; 1 downloads every
+#: file as a single stream.
+DOWNLOAD_SEGMENTS = int(os.environ.get("UNIMPEDED_DOWNLOAD_SEGMENTS", 4))
+
+#: Smallest file, in bytes, worth splitting into segments.
+SEGMENT_MIN_SIZE = 64 << 20
+
+#: Columns kept whatever ``columns`` asks for, and at full precision whatever
+#: ``dtype`` asks for, as the samples classes compute weights, evidences and
+#: tension statistics from them. The sample weights are the index, and are
+#: always kept at full precision too.
+REQUIRED_COLUMNS = ("logL", "logL_birth", "nlive", "chain")
+
+#: Number of rows in each block :meth:`DatabaseExplorer.iter_samples` yields.
+ITER_CHUNKSIZE = 100_000
+
+#: Number of files :meth:`DatabaseExplorer.download_batch` downloads at once.
+DOWNLOAD_WORKERS = 8
+
+#: Number of processes :meth:`DatabaseExplorer.download_batch` parses chains
+#: in while further files download. Override with the
+#: ``UNIMPEDED_PARSE_WORKERS`` environment variable; 0 parses in the download
+#: threads instead.
+PARSE_WORKERS = int(
+    os.environ.get("UNIMPEDED_PARSE_WORKERS", min(4, os.cpu_count() or 1))
+)
+
+#: Number of bytes from the start of a chain :meth:`DatabaseExplorer.preview`
+#: first requests; it asks for four times as many each time that proves too
+#: few for the rows wanted.
+PREVIEW_BYTES = 16 << 10
+
+
+class ChecksumError(ValueError):
+    """A downloaded file does not match the size or checksum Zenodo published."""
+
 
 class Database:
     """Shared filename conventions for the Zenodo deposit classes.
@@ -29,32 +114,91 @@ class Database:
     This class in inherited by class DatabaseCreator and DatabaseExplorer.
     """
 
-    def __init__(self, sandbox=False):
-        """Initialise the instance and fetch what is available from Zenodo.
+    def __init__(self, sandbox=False, refresh=False, session=None):
+        """Initialise the instance without contacting Zenodo.
+
+        What is available on Zenodo is discovered on first use of
+        :attr:`combinations` or any query built on it, and only once per instance.
+        The catalog of deposits is then served from the on-disk cache in
+        :data:`DEFAULT_CACHE_DIR` when one exists. A copy older than
+        :data:`CATALOG_TTL` is still used, and refreshed in the background.
 
         Parameters
         ----------
         sandbox : bool, optional
             Whether to use the Zenodo sandbox environment. Defaults to False.
+        refresh : bool, optional
+            Ignore any cached catalog and fetch it from Zenodo. Defaults to False.
+        session : :class:`requests.Session`, optional
+            Session through which every request to Zenodo is made. Defaults to
+            the connection-pooled :func:`unimpeded.http.default_session` shared
+            by all instances.
         """
         self.sandbox = sandbox
+        self.session = default_session() if session is None else session
         if sandbox:
             self.records_url = "https://sandbox.zenodo.org/api/records"
         else:
             self.records_url = "https://zenodo.org/api/records"
 
-        # Fetch available combinations from Zenodo
-        self.combinations = self._fetch_combinations()
+        self._refresh = refresh
+        self._refresh_thread = None
+        self._manifest = None
+        self._combinations = None
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+
+    @property
+    def manifest(self):
+        """Index of every deposit on Zenodo, keyed by (model, dataset).
+
+        Each value records the deposit's Zenodo record ``id``, its ``version``
+        index, the link to a zip ``archive`` of all its files, and ``files``,
+        which maps every file key in the deposit to its download ``url``,
+        ``size`` in bytes and published ``checksum``. Discovered on first
+        access, by at most one thread, and kept thereafter. If Zenodo cannot be
+        crawled, the :class:`requests.RequestException` is raised and nothing
+        is kept, so the next access crawls again.
+        """
+        if self._manifest is None:
+            with self._catalog_lock:
+                if self._manifest is None:
+                    self._set_manifest(self._load_manifest(self._refresh))
+        return self._manifest
+
+    @property
+    def combinations(self):
+        """Set of every (model, dataset) tuple available on Zenodo."""
+        if self._combinations is None:
+            self.manifest
+        return self._combinations
+
+    @property
+    def catalog(self):
+        """:class:`~unimpeded.catalog.Catalog` indexing :attr:`combinations`.
+
+        Answers queries over joint datasets, such as which joints contain a
+        given dataset or which pairs are ready for a tension calculation.
+        """
+        if self._catalog is None:
+            self.manifest
+        return self._catalog
+
+    def _set_manifest(self, manifest):
+        """Install a manifest together with the indexes derived from it."""
+        self._combinations = set(manifest)
+        self._catalog = Catalog(self._combinations)
+        self._manifest = manifest
 
     @property
     def models(self):
         """Sorted list of all unique model names available on Zenodo."""
-        return sorted({model for model, _ in self.combinations})
+        return list(self.catalog.models)
 
     @property
     def datasets(self):
         """Sorted list of all unique dataset names available on Zenodo."""
-        return sorted({dataset for _, dataset in self.combinations})
+        return list(self.catalog.datasets)
 
     def datasets_for(self, model):
         """Return a sorted list of datasets available for a given model.
@@ -69,7 +213,7 @@ class Database:
         list
             A sorted list of dataset names available for the model.
         """
-        return sorted({dataset for m, dataset in self.combinations if m == model})
+        return self.catalog.datasets_for(model)
 
     def models_for(self, dataset):
         """Return a sorted list of models available for a given dataset.
@@ -84,7 +228,7 @@ class Database:
         list
             A sorted list of model names available for the dataset.
         """
-        return sorted({model for model, d in self.combinations if d == dataset})
+        return self.catalog.models_for(dataset)
 
     def is_available(self, model, dataset):
         """Check whether a specific model-dataset combination exists on Zenodo.
@@ -103,54 +247,222 @@ class Database:
         """
         return (model, dataset) in self.combinations
 
-    def _fetch_combinations(self):
-        """Extract every (model, dataset) pair from the Zenodo deposits.
+    def _catalog_path(self):
+        """Path of the on-disk catalog cache for this Zenodo environment."""
+        name = "catalog-sandbox.json" if self.sandbox else "catalog.json"
+        return os.path.join(DEFAULT_CACHE_DIR, name)
+
+    def _read_catalog(self):
+        """Read the cached catalog, if there is a usable one.
 
         Returns
         -------
-        set
-            A set of (model, dataset) tuples representing available combinations.
+        tuple or None
+            ``(created, manifest)``, with ``created`` the Unix time the catalog was
+            fetched, or None if there is no cache or it cannot be parsed.
         """
-        combinations = set()
-        page = 1
-        size = 25  # Maximum results per page allowed by Zenodo API
+        try:
+            with open(self._catalog_path()) as f:
+                catalog = json.load(f)
+            created = float(catalog["created"])
+            manifest = {
+                (d.pop("model"), d.pop("dataset")): d for d in catalog["deposits"]
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+        return created, manifest
+
+    def _write_catalog(self, manifest):
+        """Atomically replace the cached catalog with ``manifest``.
 
+        The cache is only an optimisation, so failing to write it (e.g. on a
+        read-only file system) is not an error.
+        """
+        catalog = {
+            "created": time.time(),
+            "records_url": self.records_url,
+            "deposits": [
+                {"model": model, "dataset": dataset, **entry}
+                for (model, dataset), entry in sorted(manifest.items())
+            ],
+        }
+        path = self._catalog_path()
         try:
-            while True:
-                params = {
-                    "q": 'title:"unimpeded:"',
-                    "size": size,
-                    "page": page,
-                }
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(catalog, f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
 
-                response = requests.get(self.records_url, params=params)
-                response.raise_for_status()
-                data = response.json()
+    def _load_manifest(self, refresh=False):
+        """Return the manifest from the cache, fetching it from Zenodo if needed.
 
-                hits = data.get("hits", {}).get("hits", [])
-                if not hits:
-                    break
+        Without a cached copy, or with ``refresh=True``, the catalog is fetched
+        before returning. A cached copy older than :data:`CATALOG_TTL` is returned
+        straight away while a daemon thread fetches a fresh one.
 
-                for hit in hits:
-                    title = hit.get("metadata", {}).get("title", "")
-                    # Expected format: "unimpeded: model dataset"
-                    if title.startswith("unimpeded: "):
-                        parts = (
-                            title.replace("unimpeded: ", "").strip().split(maxsplit=1)
-                        )
-                        if len(parts) == 2:
-                            combinations.add((parts[0], parts[1]))
+        Parameters
+        ----------
+        refresh : bool, optional
+            Ignore any cached catalog. Defaults to False.
 
-                # Check if there are more pages
-                total = data.get("hits", {}).get("total", 0)
-                if page * size >= total:
-                    break
-                page += 1
+        Returns
+        -------
+        dict
+            The deposit manifest, as described in :attr:`manifest`.
+        """
+        cached = None if refresh else self._read_catalog()
+        if cached is None:
+            return self._fetch_manifest()
+
+        created, manifest = cached
+        if time.time() - created > CATALOG_TTL:
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_manifest, daemon=True
+            )
+            self._refresh_thread.start()
+        return manifest
 
+    def _refresh_manifest(self):
+        """Replace a stale catalog with a fresh one, keeping it if the fetch fails."""
+        manifest = {}
+        try:
+            self._crawl_records(manifest)
         except requests.RequestException as e:
-            print(f"Error fetching deposits: {e}")
+            print(f"Error refreshing deposits, keeping the cached catalog: {e}")
+            return
+        self._write_catalog(manifest)
+        # Readers take the lock, so they never see the new manifest alongside
+        # the old combinations or catalog.
+        with self._catalog_lock:
+            self._set_manifest(manifest)
+
+    def _fetch_manifest(self):
+        """Index every unimpeded deposit on Zenodo by (model, dataset).
+
+        The complete catalog is written to the on-disk cache.
+
+        Returns
+        -------
+        dict
+            The deposit manifest, as described in :attr:`manifest`.
+
+        Raises
+        ------
+        requests.RequestException
+            If any page cannot be fetched, once the session's retries are spent.
+            The deposits found so far are discarded rather than passed off as
+            the whole catalog.
+        """
+        manifest = {}
+        self._crawl_records(manifest)
+        self._write_catalog(manifest)
+        return manifest
+
+    def _crawl_records(self, manifest):
+        """Page through the Zenodo records search, indexing each deposit found.
 
-        return combinations
+        The first page reports the total number of hits, after which the remaining
+        pages are independent and are fetched concurrently by up to
+        :data:`CATALOG_WORKERS` threads. Pages are merged in page order whatever
+        order they arrive in.
+
+        Parameters
+        ----------
+        manifest : dict
+            Mapping that deposits are added to as they are found.
+
+        Raises
+        ------
+        requests.RequestException
+            If any page cannot be fetched.
+        """
+        size = 25  # Maximum results per page allowed by Zenodo API
+
+        data = self._fetch_records_page(1, size)
+        hits = data.get("hits", {}).get("hits", [])
+        for hit in hits:
+            self._add_to_manifest(manifest, hit)
+
+        total = data.get("hits", {}).get("total", 0)
+        if not hits or len(hits) >= total:
+            return
+        pages = range(2, math.ceil(total / size) + 1)
+        if not pages:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(CATALOG_WORKERS, len(pages))) as pool:
+            futures = [pool.submit(self._fetch_records_page, p, size) for p in pages]
+            for future in futures:
+                for hit in future.result().get("hits", {}).get("hits", []):
+                    self._add_to_manifest(manifest, hit)
+
+    def _fetch_records_page(self, page, size):
+        """Fetch one page of the unimpeded records search.
+
+        Returns
+        -------
+        dict
+            The decoded JSON response.
+        """
+        params = {
+            "q": 'title:"unimpeded:"',
+            "size": size,
+            "page": page,
+        }
+        response = self.session.get(self.records_url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _parse_title(title):
+        """Split a deposit title of the form "unimpeded: model dataset".
+
+        Returns
+        -------
+        tuple or None
+            ``(model, dataset)``, or None if the title is not an unimpeded deposit.
+        """
+        if title.startswith("unimpeded: "):
+            parts = title.replace("unimpeded: ", "").strip().split(maxsplit=1)
+            if len(parts) == 2:
+                return parts[0], parts[1]
+        return None
+
+    @staticmethod
+    def _manifest_entry(hit):
+        """Extract the record id, version and links from a records search hit."""
+        files = {}
+        for file in hit.get("files", []):
+            url = file.get("links", {}).get("self")
+            if "key" in file and url:
+                files[file["key"]] = {
+                    "url": url,
+                    "size": file.get("size"),
+                    "checksum": file.get("checksum"),
+                }
+        versions = hit.get("metadata", {}).get("relations", {}).get("version", [{}])
+        return {
+            "id": hit.get("id"),
+            "version": versions[0].get("index"),
+            "archive": hit.get("links", {}).get("archive"),
+            "files": files,
+        }
+
+    def _add_to_manifest(self, manifest, hit):
+        """Index one search hit, keeping the newest record if a title repeats."""
+        key = self._parse_title(hit.get("metadata", {}).get("title", ""))
+        if key is None:
+            return
+        entry = self._manifest_entry(hit)
+        current = manifest.get(key)
+        if current is None or (entry["version"] or 0, entry["id"] or 0) > (
+            current["version"] or 0,
+            current["id"] or 0,
+        ):
+            manifest[key] = entry
 
     def get_filename(self, method, model, dataset, filestype):
         """Generate a filename from the method, model, dataset and file type.
@@ -199,7 +511,13 @@ class DatabaseCreator(Database):
     """
 
     def __init__(
-        self, sandbox=True, ACCESS_TOKEN=None, base_url=None, records_url=None
+        self,
+        sandbox=True,
+        ACCESS_TOKEN=None,
+        base_url=None,
+        records_url=None,
+        refresh=False,
+        session=None,
     ):
         """Initialise the DatabaseCreator instance.
 
@@ -213,13 +531,18 @@ class DatabaseCreator(Database):
             The base URL for deposit endpoints.
         records_url : str, optional
             The URL for records endpoints.
+        refresh : bool, optional
+            Ignore any cached catalog and fetch it from Zenodo. Defaults to False.
+        session : :class:`requests.Session`, optional
+            Session through which every request to Zenodo is made. Defaults to
+            the shared :func:`unimpeded.http.default_session`.
         """
         self.ACCESS_TOKEN = ACCESS_TOKEN
         if sandbox:
             self.base_url = "https://sandbox.zenodo.org/api/deposit/depositions"
         else:
             self.base_url = "https://zenodo.org/api/deposit/depositions"
-        super().__init__(sandbox)
+        super().__init__(sandbox, refresh=refresh, session=session)
 
     def create_deposit(self):
         """Create a new empty deposit on Zenodo.
@@ -229,7 +552,7 @@ class DatabaseCreator(Database):
         int
             The deposit_id of the new deposit on Zenodo.
         """
-        r = requests.post(
+        r = self.session.post(
             self.base_url, params={"access_token": self.ACCESS_TOKEN}, json={}
         )
         r.raise_for_status()
@@ -304,7 +627,7 @@ class DatabaseCreator(Database):
         Response
             The requests response object.
         """
-        r = requests.put(
+        r = self.session.put(
             f"{self.base_url}/{deposit_id}",
             params={"access_token": self.ACCESS_TOKEN},
             json=metadata,
@@ -408,7 +731,7 @@ class DatabaseCreator(Database):
             The requests response object after uploading.
         """
         deposit_url = f"{self.base_url}/{deposit_id}?access_token={self.ACCESS_TOKEN}"
-        r = requests.get(deposit_url)
+        r = self.session.get(deposit_url)
         r.raise_for_status()
         bucket_url = r.json().get("links", {}).get("bucket")
         params = {"access_token": self.ACCESS_TOKEN}
@@ -420,7 +743,7 @@ class DatabaseCreator(Database):
         path = f"./{filename}"
         headers = {"Content-Type": "application/octet-stream"}
         with open(path, "rb") as fp:
-            r = requests.put(
+            r = self.session.put(
                 f"{bucket_url}/{filename}", data=fp, params=params, headers=headers
             )
             r.raise_for_status()
@@ -493,7 +816,7 @@ class DatabaseCreator(Database):
             The requests response object after uploading.
         """
         deposit_url = f"{self.base_url}/{deposit_id}?access_token={self.ACCESS_TOKEN}"
-        r = requests.get(deposit_url)
+        r = self.session.get(deposit_url)
         r.raise_for_status()
         bucket_url = r.json().get("links", {}).get("bucket")
         params = {"access_token": self.ACCESS_TOKEN}
@@ -503,7 +826,7 @@ class DatabaseCreator(Database):
             method, model, dataset, loc, grid=grid, root=root
         )
         with open(yaml_file_path, "rb") as fp:
-            r = requests.put(f"{bucket_url}/{filename}", data=fp, params=params)
+            r = self.session.put(f"{bucket_url}/{filename}", data=fp, params=params)
             r.raise_for_status()
             if r.status_code == 201:
                 print(
@@ -574,7 +897,7 @@ class DatabaseCreator(Database):
             The requests response object after uploading.
         """
         deposit_url = f"{self.base_url}/{deposit_id}?access_token={self.ACCESS_TOKEN}"
-        r = requests.get(deposit_url)
+        r = self.session.get(deposit_url)
         r.raise_for_status()
         bucket_url = r.json().get("links", {}).get("bucket")
         params = {"access_token": self.ACCESS_TOKEN}
@@ -584,7 +907,7 @@ class DatabaseCreator(Database):
             method, model, dataset, loc, grid=grid, root=root
         )
         with open(prior_info_file_path, "rb") as fp:
-            r = requests.put(f"{bucket_url}/{filename}", data=fp, params=params)
+            r = self.session.put(f"{bucket_url}/{filename}", data=fp, params=params)
             r.raise_for_status()
             if r.status_code == 201:
                 print(
@@ -629,7 +952,7 @@ class DatabaseCreator(Database):
                     "size": size,
                     "page": page,
                 }
-                r = requests.get(self.base_url, params=params)
+                r = self.session.get(self.base_url, params=params)
                 r.raise_for_status()
                 response_data = r.json()
 
@@ -696,7 +1019,7 @@ class DatabaseCreator(Database):
             try:
                 # Check if the deposit exists
                 check_url = f"{self.base_url}/{deposit_id}"
-                check_response = requests.get(
+                check_response = self.session.get(
                     check_url, params={"access_token": self.ACCESS_TOKEN}
                 )
 
@@ -714,7 +1037,7 @@ class DatabaseCreator(Database):
 
                 # Attempt to delete the deposit
                 delete_url = f"{self.base_url}/{deposit_id}"
-                delete_response = requests.delete(
+                delete_response = self.session.delete(
                     delete_url, params={"access_token": self.ACCESS_TOKEN}
                 )
 
@@ -749,7 +1072,7 @@ class DatabaseCreator(Database):
         """
         metadata_url = f"{self.base_url}/{deposit_id}"
         try:
-            response = requests.get(
+            response = self.session.get(
                 metadata_url, params={"access_token": self.ACCESS_TOKEN}
             )
             response.raise_for_status()
@@ -780,7 +1103,7 @@ class DatabaseCreator(Database):
         publish_url = f"{self.base_url}/{deposit_id}/actions/publish"
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 publish_url, params={"access_token": self.ACCESS_TOKEN}, json=metadata
             )
             response.raise_for_status()
@@ -828,7 +1151,7 @@ class DatabaseCreator(Database):
             deposit_url = (
                 f"{self.base_url}/{deposit_id}?access_token={self.ACCESS_TOKEN}"
             )
-            r = requests.get(deposit_url)
+            r = self.session.get(deposit_url)
             r.raise_for_status()
             deposit_data = r.json()
 
@@ -836,7 +1159,7 @@ class DatabaseCreator(Database):
                 print("Deposit is published. Proceeding to create a new version.")
 
                 # Create a new version
-                new_version_response = requests.post(
+                new_version_response = self.session.post(
                     f"{self.base_url}/{deposit_id}/actions/newversion",
                     params={"access_token": self.ACCESS_TOKEN},
                 )
@@ -871,7 +1194,7 @@ class DatabaseCreator(Database):
         str or None: The concept DOI if available; otherwise, None.
         """
         deposit_url = f"{self.base_url}/{deposit_id}?access_token={self.ACCESS_TOKEN}"
-        response = requests.get(deposit_url)
+        response = self.session.get(deposit_url)
         response.raise_for_status()
 
         deposit = response.json()
@@ -891,7 +1214,21 @@ class DatabaseExplorer(Database):
     Inherits from Database to utilise filename generation.
     """
 
-    def __init__(self, sandbox=False, base_url=None, records_url=None):
+    #: Whether downloads are checked against the size and checksum published
+    #: by Zenodo, raising :class:`ChecksumError` if they do not match.
+    verify_checksums = True
+
+    def __init__(
+        self,
+        sandbox=False,
+        base_url=None,
+        records_url=None,
+        refresh=False,
+        session=None,
+        file_cache=None,
+        download_segments=DOWNLOAD_SEGMENTS,
+        samples_cache=None,
+    ):
         """Initialise the DatabaseExplorer instance.
 
         Parameters
@@ -902,14 +1239,41 @@ class DatabaseExplorer(Database):
             The base URL for deposit endpoints.
         records_url : str, optional
             The URL for records endpoints.
+        refresh : bool, optional
+            Ignore any cached catalog and fetch it from Zenodo. Defaults to False.
+        session : :class:`requests.Session`, optional
+            Session through which every request to Zenodo is made. Defaults to
+            the shared :func:`unimpeded.http.default_session`.
+        file_cache : :class:`~unimpeded.cache.FileCache` or False, optional
+            Cache of downloaded files, keyed by their published checksum.
+            Defaults to one in the ``files`` directory of
+            :data:`DEFAULT_CACHE_DIR`, shared by every instance; False
+            downloads every file afresh.
+        download_segments : int, optional
+            Number of byte ranges files of at least :data:`SEGMENT_MIN_SIZE`
+            are split into and downloaded over concurrently. Defaults to
+            :data:`DOWNLOAD_SEGMENTS`; 1 downloads each file as one stream.
+        samples_cache : :class:`~unimpeded.cache.SamplesCache` or False, optional
+            Binary columnar copies of parsed chains, keyed by the checksum of
+            their CSV, from which they reload without parsing. Defaults to one
+            in the ``samples`` directory of :data:`DEFAULT_CACHE_DIR`; False
+            parses every chain from its CSV.
         """
         if sandbox:
             self.base_url = "https://sandbox.zenodo.org/api/deposit/depositions"
         else:
             self.base_url = "https://zenodo.org/api/deposit/depositions"
-        super().__init__(sandbox)
-
-    def download(self, deposit_id, filename):
+        super().__init__(sandbox, refresh=refresh, session=session)
+        if file_cache is None:
+            file_cache = FileCache(os.path.join(DEFAULT_CACHE_DIR, "files"))
+        self.file_cache = file_cache
+        self.download_segments = download_segments
+        if samples_cache is None:
+            samples_cache = SamplesCache(os.path.join(DEFAULT_CACHE_DIR, "samples"))
+        self.samples_cache = samples_cache
+        self._searched = {}
+
+    def download(self, deposit_id, filename, columns=None, dtype=None, compress=None):
         """Download a specific file from a deposit, given the deposit ID and filename.
 
         Parameters
@@ -918,61 +1282,752 @@ class DatabaseExplorer(Database):
             The deposit ID of the deposit.
         filename : str
             The name of the file to download.
+        columns : list of str, optional
+            For a chain, the names of the parameters to parse and keep; see
+            :meth:`download_samples`. Defaults to all of them.
+        dtype : data-type, optional
+            For a chain, the type to hold its parameters in; see
+            :meth:`download_samples`.
+        compress : bool, int or str, optional
+            For a chain, how far to compress its posterior; see
+            :meth:`download_samples`.
 
         Returns
         -------
         DataFrame, dict, or None: The downloaded data depending on the file type; a
         DataFrame for NS and MCMC chains, a dict for info and prior_info.
+
+        Raises
+        ------
+        requests.RequestException
+            If the deposit's record cannot be fetched from Zenodo.
+        LookupError
+            If the deposit has no file called ``filename``.
         """
         deposit_url = f"{self.records_url}/{deposit_id}"
-        r = requests.get(deposit_url)
+        r = self.session.get(deposit_url)
         r.raise_for_status()
 
-        if r.status_code == 200:
-            deposit_info = r.json()
-            files = deposit_info["files"]
-
-            for file in files:
-                if file["key"] == filename:
-                    download_url = file["links"]["self"]
-                    file_r = requests.get(download_url)
-                    file_r.raise_for_status()
-
-                    if file_r.status_code == 200:
-                        if filename.endswith(".csv"):
-                            data = read_csv(BytesIO(file_r.content))
-                            print(f"{filename} file loaded successfully.")
-                        elif filename.endswith((".yaml", ".yml")):
-                            data = yaml.safe_load(file_r.content.decode("utf-8"))
-                            print(f"{filename} file loaded successfully.")
-                        elif filename.endswith(".prior_info"):
-                            try:
-                                raw_data = file_r.content.decode("utf-8-sig").strip()
-                                if raw_data:
-                                    data = {}
-                                    for line in raw_data.splitlines():
-                                        key, value = line.split("=")
-                                        data[key.strip()] = int(value.strip())
-                                    print(f"{filename} file loaded successfully.")
-                                else:
-                                    print(
-                                        f"Warning: {filename} PRIOR_INFO file is empty."
-                                    )
-                                    data = {}
-                            except (UnicodeDecodeError, ValueError) as e:
-                                print(f"Error processing {filename}: {e}")
-                                data = None
-                        else:
-                            print(f"Unsupported file type: {filename}")
-                            data = None
-                    else:
-                        print(f"Error downloading {filename}:", file_r.status_code)
-                        data = None
-                    return data
+        for file in r.json()["files"]:
+            if file["key"] == filename:
+                return self._download_file(
+                    filename,
+                    file["links"]["self"],
+                    file.get("checksum"),
+                    file.get("size"),
+                    columns,
+                    dtype,
+                    compress,
+                )
+        raise LookupError(f"Deposit {deposit_id} has no file {filename}.")
+
+    def _download_file(
+        self,
+        filename,
+        url,
+        checksum=None,
+        size=None,
+        columns=None,
+        dtype=None,
+        compress=None,
+    ):
+        """Fetch one file by its download URL and load it according to its type.
+
+        A chain whose CSV has a published ``checksum`` is reloaded from
+        :attr:`samples_cache` when it has been parsed before, by any instance,
+        without downloading or parsing the CSV, and then only the ``columns``
+        asked for are read. Otherwise only those ``columns`` are parsed, and
+        cached as an entry that serves later calls for any of them; a call
+        asking for others, or for all, parses the chain in full and replaces
+        it. A chain asked for in a reduced ``dtype``, or compressed, is parsed
+        in full and cached a second time in that form, so that it is also
+        reloaded, memory-mapped, at the reduced size. See :meth:`_fetch_file`
+        for everything else.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file, whose extension selects the loader.
+        url : str
+            The file's download link.
+        checksum : str, optional
+            The file's checksum as published by Zenodo, e.g. ``"md5:..."``.
+        size : int, optional
+            The file's size in bytes as published by Zenodo.
+        columns : list of str, optional
+            For a chain, the names of the parameters to keep, as for
+            :meth:`download_samples`.
+        dtype : data-type, optional
+            For a chain, the type to hold its parameters in, as for
+            :meth:`download_samples`.
+        compress : bool, int or str, optional
+            For a chain, how far to compress its posterior, as for
+            :meth:`download_samples`.
+
+        Returns
+        -------
+        DataFrame, dict, or None: As for :meth:`download`.
+        """
+        wanted = None if columns is None else {*columns, *REQUIRED_COLUMNS}
+        if dtype is not None and np.dtype(dtype) == np.float64:
+            dtype = None
+        if compress is False:
+            compress = None
+        variant = [] if dtype is None else [np.dtype(dtype).name]
+        if compress is not None:
+            variant.append(f"compress{compress}")
+        variant = "-".join(variant) or None
+        cache = (
+            self.samples_cache
+            if checksum and self.samples_cache and filename.endswith(".csv")
+            else None
+        )
+        if not cache:
+            data = self._fetch_file(filename, url, checksum, size, wanted, dtype)
+            if data is None or compress is None:
+                return data
+            return self._compress(filename, data, compress)
+
+        samples = cache.load(checksum, wanted, variant)
+        if samples is not None:
+            print(f"{filename} file loaded successfully.")
+            return samples
+        if wanted is not None and not variant:
+            with self._open_file(filename, url, checksum, size) as fp:
+                if fp is None:
+                    return None
+                header = self._read_header(fp)
+                fp.seek(0)
+                data = self._load_file(filename, fp, wanted)
+            if data is not None and header is not None:
+                cache.save(checksum, data, names=header[0][2:])
+            return data
+        data = cache.load(checksum) if variant else None
+        if data is None:
+            data = self._fetch_file(filename, url, checksum, size)
+            if data is None:
+                return None
+            cache.save(checksum, data)
+        if variant:
+            if dtype is not None:
+                data = self._reduce_precision(data, dtype)
+            if compress is not None:
+                data = self._compress(filename, data, compress)
+            cache.save(checksum, data, variant)
+        if wanted is None:
+            return data
+        return self._select_columns(data, wanted)
+
+    def _fetch_file(
+        self, filename, url, checksum=None, size=None, columns=None, dtype=None
+    ):
+        """Download one file, or find it in the file cache, and load it.
+
+        The file is streamed in chunks of :data:`DOWNLOAD_CHUNK_SIZE` bytes to
+        disk and parsed from there, so memory holds the parsed result but never
+        a copy of the raw download. A file with a published ``checksum`` is
+        kept in :attr:`file_cache`, and loaded from there instead of Zenodo
+        next time, by any instance; other files go to an anonymous temporary
+        file. See :meth:`_fetch` for how interrupted downloads are resumed and
+        completed ones verified.
+
+        Takes the same parameters, and returns the same, as
+        :meth:`_download_file`.
+        """
+        with self._open_file(filename, url, checksum, size) as fp:
+            if fp is None:
+                return None
+            return self._load_file(filename, fp, columns, dtype)
+
+    @contextmanager
+    def _open_file(self, filename, url, checksum=None, size=None):
+        """Download one file, or find it in the file cache, and open it.
+
+        Yields the complete file opened for binary reading, from
+        :attr:`file_cache` or an anonymous temporary file as described in
+        :meth:`_fetch_file`, or None if it could not be downloaded.
+        """
+        if not (checksum and self.file_cache):
+            with tempfile.TemporaryFile() as fp:
+                if not self._fetch(filename, url, fp, checksum, size):
+                    yield None
+                    return
+                fp.seek(0)
+                yield fp
+                return
+        # A file evicted by another process between being found or downloaded
+        # and being opened is simply downloaded again.
+        while True:
+            fp = self.file_cache.open(checksum)
+            if fp is not None:
+                break
+            if self._cached_path(filename, url, checksum, size) is None:
+                yield None
+                return
+        with fp:
+            yield fp
+
+    def _cached_path(self, filename, url, checksum, size=None):
+        """Return the path of a file in :attr:`file_cache`, downloading it first.
+
+        Returns None if the file is not cached and could not be downloaded.
+        Another process may evict the file at any time, so open it with
+        :meth:`~unimpeded.cache.FileCache.open` and treat a miss as a cue to
+        call this again.
+        """
+        cache = self.file_cache
+        path = cache.get(checksum)
+        if path is None:
+            with cache.open_partial(checksum) as fp:
+                # Another process may have finished it while we waited.
+                path = cache.get(checksum)
+                if path is None:
+                    if not self._fetch(filename, url, fp, checksum, size):
+                        return None
+                    path = cache.put(checksum, fp.name)
+        return path
+
+    def _fetch(self, filename, url, fp, checksum=None, size=None):
+        """Stream a file from Zenodo onto the end of ``fp``.
+
+        Whatever ``fp`` already holds is taken as the start of the file, and
+        only the rest is requested, with an HTTP ``Range``. If the connection
+        drops part way through, the download resumes the same way, until
+        :data:`DOWNLOAD_RESUMES` attempts in a row have brought no data. A
+        server that ignores ``Range`` sends the whole file, which replaces
+        what ``fp`` held.
+
+        When ``size`` is known and at least :data:`SEGMENT_MIN_SIZE` bytes are
+        missing, they are fetched as :attr:`download_segments` concurrent
+        ranges (see :meth:`_fetch_segments`), each written straight to its
+        place in ``fp``; if the server ignores ``Range`` the whole file is
+        streamed instead. The progress of each range is logged beside a named
+        ``fp``, so a segmented download that was interrupted, even by the
+        process ending, resumes every range from where it stopped.
+
+        While :attr:`verify_checksums` is set, the data is hashed as it arrives
+        and checked against ``size`` and ``checksum`` at the end; a segmented
+        download is hashed once complete, by reading it back.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file, for messages.
+        url : str
+            The file's download link.
+        fp : file-like
+            File opened for binary reading and appending.
+        checksum, size : optional
+            As published by Zenodo, see :meth:`_download_file`.
+
+        Returns
+        -------
+        bool
+            True once the whole file is in ``fp``, False if Zenodo answered
+            with something other than the file.
+
+        Raises
+        ------
+        ChecksumError
+            If the file does not match ``size`` or ``checksum``. ``fp`` is
+            emptied, so that the bad data is not resumed from.
+        """
+        verify = self.verify_checksums
+        log = _SegmentLog.load(fp, size)
+        digest, offset = None, 0
+        if log is None:
+            digest, offset = self._hash_file(fp, checksum if verify else None)
+
+        pending = None
+        if log is not None or (
+            size is not None
+            and self.download_segments > 1
+            and size - offset >= SEGMENT_MIN_SIZE
+        ):
+            pending = self._fetch_segments(url, fp, offset, size, log)
+            if pending is None:
+                digest, offset = self._hash_file(fp, checksum if verify else None)
+            elif log is not None:
+                # The server no longer honours Range, so the ranges already in
+                # place cannot be completed; the whole file replaces them.
+                fp.seek(0)
+                fp.truncate()
+                digest = self._new_digest(checksum) if verify else None
+
+        failures = 0
+        while size is None or offset < size:
+            if pending is not None:
+                file_r, pending = pending, None
+            else:
+                headers = {"Range": f"bytes={offset}-"} if offset else None
+                file_r = self.session.get(url, stream=True, headers=headers)
+            try:
+                file_r.raise_for_status()
+                if file_r.status_code not in (200, 206):
+                    print(f"Error downloading {filename}:", file_r.status_code)
+                    return False
+                if file_r.status_code == 200 and offset:
+                    fp.seek(0)
+                    fp.truncate()
+                    offset = 0
+                    digest = self._new_digest(checksum) if verify else None
+                for chunk in file_r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    fp.write(chunk)
+                    offset += len(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+                    failures = 0
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ):
+                failures += 1
+                if failures >= DOWNLOAD_RESUMES:
+                    raise
+                continue
+            finally:
+                file_r.close()
+            if size is None or offset >= size or not verify:
+                break
+            failures += 1
+            if failures >= DOWNLOAD_RESUMES:
+                break
+
+        if verify:
+            self._verify(filename, fp, offset, digest, checksum, size)
+        fp.flush()
+        return True
+
+    def _fetch_segments(self, url, fp, start, end, log=None):
+        """Download bytes ``start`` to ``end`` of a file as concurrent ranges.
+
+        The range is split into :attr:`download_segments` equal parts, each
+        fetched on the shared session and written at its own offset in
+        ``fp``, which is first extended to ``end`` bytes. Each part resumes
+        after interruptions as :meth:`_fetch` does, and its progress is kept
+        in a :class:`_SegmentLog` beside ``fp``, so that parts left
+        unfinished, by an error or by the process ending, are resumed by the
+        next call rather than fetched again.
+
+        Parameters
+        ----------
+        url : str
+            The file's download link.
+        fp : file-like
+            The file being downloaded.
+        start, end : int
+            The byte range to fetch, ``end`` exclusive.
+        log : :class:`_SegmentLog`, optional
+            The progress of an earlier, unfinished call, to resume; ``start``
+            and ``end`` are then ignored.
+
+        Returns
+        -------
+        :class:`requests.Response` or None
+            If the server ignored ``Range``, its response with the whole file,
+            to be streamed instead; otherwise None, once every part is in
+            place and the log removed.
+        """
+        if log is None:
+            n = self.download_segments
+            bounds = [start + (end - start) * i // n for i in range(n + 1)]
+            ranges = [[a, a, b] for a, b in zip(bounds[:-1], bounds[1:])]
+            log = _SegmentLog(fp, end, ranges)
+        remaining = [i for i, (_, done, stop) in enumerate(log.ranges) if done < stop]
+
+        if remaining:
+            _, done, stop = log.ranges[remaining[0]]
+            first = self.session.get(
+                url, stream=True, headers={"Range": f"bytes={done}-{stop - 1}"}
+            )
+            if first.status_code != 206:
+                log.remove()
+                return first
+
+            fd = log.open()
+            try:
+                with ThreadPoolExecutor(len(remaining)) as pool:
+                    futures = [
+                        pool.submit(self._fetch_segment, url, fd, log, i, first)
+                        for i in remaining[:1]
+                    ]
+                    futures += [
+                        pool.submit(self._fetch_segment, url, fd, log, i)
+                        for i in remaining[1:]
+                    ]
+                for future in futures:
+                    future.result()
+            finally:
+                log.close(fd)
+        log.remove()
+        return None
+
+    def _fetch_segment(self, url, fd, log, i, response=None):
+        """Download the ``i``-th range of ``log`` into the file open as ``fd``.
+
+        Parameters
+        ----------
+        url : str
+            The file's download link.
+        fd : int
+            Descriptor of the file, open for writing at any offset.
+        log : :class:`_SegmentLog`
+            The ranges of the download and how far each has got.
+        i : int
+            Which range to download.
+        response : :class:`requests.Response`, optional
+            An open response already carrying what remains of this range.
+        """
+        start, offset, end = log.ranges[i]
+        failures = 0
+        try:
+            while offset < end:
+                if response is None:
+                    response = self.session.get(
+                        url,
+                        stream=True,
+                        headers={"Range": f"bytes={offset}-{end - 1}"},
+                    )
+                try:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.HTTPError(
+                            f"Range request answered with {response.status_code}",
+                            response=response,
+                        )
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        data = memoryview(chunk)[: end - offset]
+                        log.write(fd, data, offset)
+                        offset += len(data)
+                        log.advance(i, offset)
+                        failures = 0
+                        if offset >= end:
+                            break
+                except (
+                    requests.ConnectionError,
+                    requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError,
+                ):
+                    failures += 1
+                    if failures >= DOWNLOAD_RESUMES:
+                        raise
+                    continue
+                finally:
+                    response.close()
+                    response = None
+                if offset < end:
+                    failures += 1
+                    if failures >= DOWNLOAD_RESUMES:
+                        raise ChecksumError(
+                            f"Segment {start}-{end - 1} of {url} ended at {offset}."
+                        )
+        finally:
+            log.save()
+
+    @staticmethod
+    def _hash_file(fp, checksum):
+        """Hash the whole of ``fp`` as ``checksum`` is, leaving it at the end.
+
+        Returns
+        -------
+        tuple
+            The hash, or None if ``checksum`` is None or its algorithm is not
+            supported, and the length of ``fp``.
+        """
+        digest = DatabaseExplorer._new_digest(checksum)
+        if digest is None:
+            return None, fp.seek(0, os.SEEK_END)
+        fp.seek(0)
+        for block in iter(lambda: fp.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(block)
+        return digest, fp.tell()
+
+    @staticmethod
+    def _new_digest(checksum):
+        """Start a hash of the algorithm ``checksum`` uses, if it is supported."""
+        if not checksum or ":" not in checksum:
+            return None
+        algorithm = checksum.split(":", 1)[0].lower()
+        if algorithm not in hashlib.algorithms_available:
+            return None
+        return hashlib.new(algorithm)
+
+    @staticmethod
+    def _load_file(filename, fp, columns=None, dtype=None):
+        """Parse a downloaded file, read from the binary file object ``fp``.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file, whose extension selects the loader.
+        fp : file-like
+            The file's contents, opened for binary reading.
+        columns : collection of str, optional
+            For a chain, the names of the only columns to parse.
+        dtype : data-type, optional
+            For a chain, the type to parse its parameters into.
+
+        Returns
+        -------
+        DataFrame, dict, or None: As for :meth:`download`.
+        """
+        if filename.endswith(".csv"):
+            data = DatabaseExplorer._read_samples(fp, columns, dtype)
+            print(f"{filename} file loaded successfully.")
+        elif filename.endswith((".yaml", ".yml")):
+            data = yaml.safe_load(fp)
+            print(f"{filename} file loaded successfully.")
+        elif filename.endswith(".prior_info"):
+            try:
+                raw_data = fp.read().decode("utf-8-sig").strip()
+                if raw_data:
+                    data = {}
+                    for line in raw_data.splitlines():
+                        key, value = line.split("=")
+                        data[key.strip()] = int(value.strip())
+                    print(f"{filename} file loaded successfully.")
+                else:
+                    print(f"Warning: {filename} PRIOR_INFO file is empty.")
+                    data = {}
+            except (UnicodeDecodeError, ValueError) as e:
+                print(f"Error processing {filename}: {e}")
+                data = None
         else:
-            print("Error retrieving deposit metadata:", r.status_code, r.json())
+            print(f"Unsupported file type: {filename}")
+            data = None
+        return data
+
+    @staticmethod
+    def _read_samples(fp, columns=None, dtype=None):
+        """Parse a chain CSV, as written by anesthetic, into a samples object.
+
+        With ``columns``, only those columns of the CSV are converted from
+        text, which for a chain with many nuisance and derived parameters is
+        most of the parsing time and memory saved; with ``dtype``, parameters
+        are converted straight into that type. The three header rows of the
+        CSV (names, labels and index names) are read first to find where the
+        wanted columns are; a CSV laid out any other way is parsed in full and
+        converted afterwards.
+
+        Parameters
+        ----------
+        fp : file-like
+            The CSV, opened for binary reading.
+        columns : collection of str, optional
+            Names of the columns to parse. Defaults to all of them.
+        dtype : data-type, optional
+            Type to parse the parameters into; the columns in
+            :data:`REQUIRED_COLUMNS` and the weights keep their own.
+
+        Returns
+        -------
+        :class:`anesthetic.samples.NestedSamples` or \
+        :class:`anesthetic.samples.MCMCSamples`
+            Nested samples if the chain has an ``nlive`` column, otherwise
+            MCMC samples, as for :func:`anesthetic.read_csv`.
+        """
+        if columns is None and dtype is None:
+            return read_csv(fp)
+        header = DatabaseExplorer._read_header(fp)
+        if header is None:
+            samples = read_csv(fp)
+            if columns is not None:
+                samples = DatabaseExplorer._select_columns(samples, columns)
+            if dtype is not None:
+                samples = DatabaseExplorer._reduce_precision(samples, dtype)
+            return samples
+
+        frame = next(DatabaseExplorer._read_rows(fp, *header, columns, dtype))
+        weights = frame.get_weights().astype(float)
+        if "nlive" in frame.columns.get_level_values(0):
+            frame.set_weights(weights, inplace=True)
+            return NestedSamples(frame)
+        if np.all(weights == np.floor(weights)):
+            weights = weights.astype(int)
+        frame.set_weights(weights, inplace=True)
+        return MCMCSamples(frame)
+
+    @staticmethod
+    def _read_header(fp):
+        """Read the header rows of a chain CSV, as written by anesthetic.
+
+        Returns
+        -------
+        tuple of list or None
+            The column names and labels, with ``fp`` left at the first row of
+            samples; or None, with ``fp`` rewound, if the CSV does not have
+            the three header rows (names, labels and index names) of
+            labelled, weighted samples.
+        """
+        header = [fp.readline().decode("utf-8-sig") for _ in range(3)]
+        names, labels, index_names = (next(csv.reader([line])) for line in header)
+        if labels[:1] != ["labels"] or index_names[:2] != ["", "weights"]:
+            fp.seek(0)
+            return None
+        return names, labels
+
+    @staticmethod
+    def _read_rows(fp, names, labels, columns=None, dtype=None, chunksize=None):
+        """Parse the samples of a chain CSV after its header rows.
+
+        Parameters
+        ----------
+        fp : file-like
+            The CSV, read up to its first row of samples by
+            :meth:`_read_header`.
+        names, labels : list of str
+            The column names and labels :meth:`_read_header` returned.
+        columns : collection of str, optional
+            Names of the only columns to parse. Defaults to all of them.
+        dtype : data-type, optional
+            Type to parse the parameters into, as for :meth:`_read_samples`.
+        chunksize : int, optional
+            Number of rows to parse at a time. Defaults to all of them.
+
+        Yields
+        ------
+        :class:`anesthetic.weighted_labelled_pandas.WeightedLabelledDataFrame`
+            The rows, labelled and weighted, in blocks of ``chunksize``.
+        """
+        usecols = [0, 1] + [
+            i
+            for i, name in enumerate(names[2:], 2)
+            if columns is None or name in columns
+        ]
+        dtypes = {
+            i: dtype
+            for i in usecols[2:]
+            if dtype is not None and names[i] not in REQUIRED_COLUMNS
+        }
+        reader = pd.read_csv(
+            fp, header=None, usecols=usecols, dtype=dtypes, chunksize=chunksize
+        )
+        for df in [reader] if chunksize is None else reader:
+            index = pd.MultiIndex.from_arrays(
+                [df.pop(0), df.pop(1)], names=[None, "weights"]
+            )
+            frame = WeightedLabelledDataFrame(
+                {i: df[i].to_numpy() for i in df.columns}, index=index
+            )
+            frame.columns = pd.MultiIndex.from_arrays(
+                [
+                    [names[i] for i in df.columns],
+                    [labels[i] or f"Unnamed: {i}_level_1" for i in df.columns],
+                ],
+                names=[None, "labels"],
+            )
+            yield frame
+
+    @staticmethod
+    def _reduce_precision(samples, dtype):
+        """Convert the floating-point parameters of ``samples`` to ``dtype``.
+
+        The columns in :data:`REQUIRED_COLUMNS` and the weights are kept as
+        they are, so evidences and tension statistics are unaffected.
+        """
+        names = samples.columns.get_level_values(0)
+        return samples.astype(
+            {
+                column: dtype
+                for column, name in zip(samples.columns, names)
+                if name not in REQUIRED_COLUMNS and samples[column].dtype.kind == "f"
+            }
+        )
+
+    @staticmethod
+    def _compress(filename, samples, compress):
+        """Compress the posterior of ``samples`` and report how far.
+
+        Low-weight samples are discarded and the rest given integer weights
+        by :meth:`anesthetic.samples.Samples.compress`, with ``compress`` as
+        its ``ncompress``. The result is plain weighted samples: the
+        ``logL_birth`` and ``nlive`` columns of a nested sampling chain are
+        dropped, as they describe the run, not the points that remain.
+        """
+        compressed = samples.compress(compress)
+        names = compressed.columns.get_level_values(0)
+        compressed = compressed.loc[:, ~names.isin(["logL_birth", "nlive"])]
+        print(
+            f"{filename} compressed from {len(samples)} to {len(compressed)} "
+            f"samples, with an effective sample size of {compressed.neff():.0f}."
+        )
+        return compressed
+
+    @staticmethod
+    def _select_columns(samples, columns):
+        """Return only the ``columns`` of ``samples``, in their original order."""
+        names = samples.columns.get_level_values(0)
+        return samples.loc[:, names.isin(list(columns))]
+
+    def _download_deposit_file(
+        self, model, dataset, filename, columns=None, dtype=None, compress=None
+    ):
+        """Download a file of a deposit straight from its link in the manifest.
+
+        Files missing from the manifest (e.g. published since it was fetched)
+        fall back to :meth:`download`, which looks the file up in the record.
+        Returns None if the deposit has no such file.
+        """
+        entry = self.find_deposit(model, dataset)
+        if entry is None or filename not in entry["files"]:
+            deposit_id = None if entry is None else entry["id"]
+            try:
+                return self.download(deposit_id, filename, columns, dtype, compress)
+            except LookupError as e:
+                print(e)
+                return None
+        file = entry["files"][filename]
+        return self._download_file(
+            filename,
+            file["url"],
+            file.get("checksum"),
+            file.get("size"),
+            columns,
+            dtype,
+            compress,
+        )
+
+    def find_deposit(self, model, dataset):
+        """Look up the manifest entry of a deposit with as few requests as possible.
+
+        An in-memory or on-disk catalog answers without any request. Otherwise a
+        single title search finds the deposit, rather than a crawl of the whole
+        catalog, and its result is kept for the lifetime of the instance.
+
+        Parameters
+        ----------
+        model : str
+            The cosmological model name.
+        dataset : str
+            The dataset name.
+
+        Returns
+        -------
+        dict or None: The deposit's entry, as described in :attr:`manifest`, or None
+        if no such deposit exists.
 
-    def download_samples(self, method, model, dataset):
+        Raises
+        ------
+        requests.RequestException
+            If the deposit is not in the catalog and Zenodo cannot be searched,
+            e.g. because the catalog itself could not be fetched.
+        """
+        if self._manifest is not None or os.path.exists(self._catalog_path()):
+            entry = self.manifest.get((model, dataset))
+            if entry is not None:
+                return entry
+        if (model, dataset) not in self._searched:
+            self._searched[model, dataset] = self._search_deposit(model, dataset)
+        return self._searched[model, dataset]
+
+    def download_samples(
+        self, method, model, dataset, columns=None, dtype=None, compress=None
+    ):
         """Download samples for a given method, model, and dataset.
 
         Parameters
@@ -984,14 +2039,457 @@ class DatabaseExplorer(Database):
             The cosmological model name.
         dataset : str
             The dataset name.
+        columns : list of str, optional
+            Names of the parameters to parse and keep, e.g. ``["H0", "omegam"]``,
+            or ``[]`` for just what tension statistics need. The columns in
+            :data:`REQUIRED_COLUMNS` that the chain has are always kept, so the
+            result is still valid nested or MCMC samples. Only these columns
+            are parsed, even the first time; asking for others later parses
+            the chain again. Defaults to every column.
+        dtype : data-type, optional
+            Type to hold the parameters in, e.g. ``"float32"`` to halve the
+            memory a chain takes for plotting and parameter estimation. The
+            columns in :data:`REQUIRED_COLUMNS` and the weights stay at full
+            precision, so evidences and tension statistics are unchanged.
+            Defaults to ``float64``.
+        compress : bool, int or str, optional
+            Return the posterior compressed, for parameter estimation and
+            plotting, rather than the full chain of dead points: an int gives
+            that many samples with integer weights, True as many as the
+            channel capacity of the weights, and a str the Huggins-Roy
+            effective sample size of that order, as for
+            :meth:`anesthetic.samples.Samples.compress`. The size and
+            effective sample size reached are printed. Compressed samples are
+            plain :class:`anesthetic.samples.Samples`, without the
+            ``logL_birth`` and ``nlive`` columns, so evidences and tension
+            statistics need the full chain; they are cached apart from it.
+            Defaults to no compression.
 
         Returns
         -------
         DataFrame or None: The downloaded sample data.
+
+        Raises
+        ------
+        requests.RequestException
+            If the deposit cannot be looked up on Zenodo; see
+            :meth:`find_deposit`.
         """
         filename = self.get_filename(method, model, dataset, "samples")
-        deposit_id = self.get_deposit_id_by_title_users(model, dataset)
-        return self.download(deposit_id, filename)
+        return self._download_deposit_file(
+            model, dataset, filename, columns, dtype, compress
+        )
+
+    def iter_samples(
+        self, method, model, dataset, chunksize=ITER_CHUNKSIZE, columns=None, dtype=None
+    ):
+        """Iterate over the samples of a chain in blocks of rows.
+
+        The CSV is downloaded to disk, or found in :attr:`file_cache`, and
+        parsed ``chunksize`` rows at a time, so only one block is ever held in
+        memory however long the chain. Combine the blocks with the reducers
+        in :mod:`unimpeded.streaming` to summarise a chain too large to load
+        with :meth:`download_samples`.
+
+        Parameters
+        ----------
+        method : str
+            The sampling method ('ns' for Nested Sampling or 'mcmc' for Metropolis-
+            Hastings).
+        model : str
+            The cosmological model name.
+        dataset : str
+            The dataset name.
+        chunksize : int, optional
+            Number of rows in each block. Defaults to :data:`ITER_CHUNKSIZE`.
+        columns : list of str, optional
+            Names of the parameters to parse, as for :meth:`download_samples`.
+        dtype : data-type, optional
+            Type to hold the parameters in, as for :meth:`download_samples`.
+
+        Yields
+        ------
+        :class:`anesthetic.samples.Samples`
+            Consecutive blocks of rows, weighted by the posterior weights
+            stored in the CSV. A block of a nested sampling chain is not a
+            nested sampling run in its own right, so the blocks are plain
+            samples whatever the method.
+        """
+        filename = self.get_filename(method, model, dataset, "samples")
+        entry = self.find_deposit(model, dataset)
+        if entry is None or filename not in entry["files"]:
+            print(f"No {filename} found for {model} and {dataset}.")
+            return
+        file = entry["files"][filename]
+        wanted = None if columns is None else {*columns, *REQUIRED_COLUMNS}
+        with self._open_file(
+            filename, file["url"], file.get("checksum"), file.get("size")
+        ) as fp:
+            if fp is None:
+                return
+            header = self._read_header(fp)
+            if header is None:
+                samples = self._read_samples(fp, wanted, dtype)
+                for start in range(0, len(samples), chunksize):
+                    yield Samples(samples.iloc[start : start + chunksize])
+                return
+            for frame in self._read_rows(fp, *header, wanted, dtype, chunksize):
+                yield Samples(frame)
+
+    def preview(self, method, model, dataset, nrows=5):
+        """Peek at the columns, labels and first rows of a chain.
+
+        Only the start of the CSV is requested, with an HTTP ``Range``, so a
+        planner can inspect hundreds of chains for the cost of a few
+        kilobytes each. A chain already in :attr:`file_cache` is read from
+        there instead.
+
+        Parameters
+        ----------
+        method : str
+            The sampling method ('ns' for Nested Sampling or 'mcmc' for Metropolis-
+            Hastings).
+        model : str
+            The cosmological model name.
+        dataset : str
+            The dataset name.
+        nrows : int, optional
+            Number of rows of samples to return. Defaults to 5.
+
+        Returns
+        -------
+        :class:`anesthetic.samples.Samples` or None
+            The first ``nrows`` samples (fewer if the chain is shorter), with
+            every column name and label and the weights stored in the CSV; or
+            None if the chain could not be found or read.
+        """
+        filename = self.get_filename(method, model, dataset, "samples")
+        entry = self.find_deposit(model, dataset)
+        if entry is None or filename not in entry["files"]:
+            print(f"No {filename} found for {model} and {dataset}.")
+            return None
+        file = entry["files"][filename]
+        checksum = file.get("checksum")
+        fp = self.file_cache.open(checksum) if checksum and self.file_cache else None
+        if fp is not None:
+            with fp:
+                return self._read_preview(fp, nrows)
+
+        size = file.get("size")
+        length = PREVIEW_BYTES
+        while True:
+            head = self._fetch_head(filename, file["url"], length)
+            if head is None:
+                return None
+            complete = len(head) < length or (size is not None and len(head) >= size)
+            if not complete:
+                head = head[: head.rfind(b"\n") + 1]
+            samples = self._read_preview(io.BytesIO(head), nrows)
+            if complete or (samples is not None and len(samples) >= nrows):
+                return samples
+            length *= 4
+
+    def _fetch_head(self, filename, url, length):
+        """Download at most the first ``length`` bytes of a file.
+
+        A server that ignores the ``Range`` and sends the whole file is cut
+        off once ``length`` bytes have arrived.
+
+        Returns
+        -------
+        bytes or None
+            The start of the file, or None if it could not be downloaded.
+        """
+        r = self.session.get(
+            url, stream=True, headers={"Range": f"bytes=0-{length - 1}"}
+        )
+        try:
+            r.raise_for_status()
+            if r.status_code not in (200, 206):
+                print(f"Error downloading {filename}:", r.status_code)
+                return None
+            head = b""
+            for chunk in r.iter_content(chunk_size=min(length, DOWNLOAD_CHUNK_SIZE)):
+                head += chunk
+                if len(head) >= length:
+                    break
+        finally:
+            r.close()
+        return head[:length]
+
+    @staticmethod
+    def _read_preview(fp, nrows):
+        """Parse the first ``nrows`` samples of a chain CSV, or return None."""
+        try:
+            header = DatabaseExplorer._read_header(fp)
+            if header is None:
+                samples = read_csv(fp)
+            else:
+                samples = next(DatabaseExplorer._read_rows(fp, *header))
+        except (ValueError, StopIteration, pd.errors.EmptyDataError):
+            return None
+        return Samples(samples.iloc[:nrows])
+
+    def download_batch(
+        self, files, download_workers=DOWNLOAD_WORKERS, parse_workers=PARSE_WORKERS
+    ):
+        """Download several files at once, parsing chains while others download.
+
+        Every deposit is looked up first, one after another, which costs no
+        request once the catalog is cached. The files are then downloaded by
+        a pool of ``download_workers`` threads, and each chain is handed to a
+        pool of ``parse_workers`` processes as soon as it is on disk, so that
+        parsing one chain overlaps downloading the next and a batch takes
+        about as long as its slowest download. Chains already in
+        :attr:`samples_cache` are loaded without either.
+
+        Parameters
+        ----------
+        files : iterable of tuple
+            ``(method, model, dataset, filestype)`` for each file, where
+            ``filestype`` is ``"samples"``, ``"info"`` or ``"prior_info"`` as
+            for :meth:`get_filename`.
+        download_workers : int, optional
+            Number of files downloaded at once. Defaults to
+            :data:`DOWNLOAD_WORKERS`.
+        parse_workers : int, optional
+            Number of processes chains are parsed in. Defaults to
+            :data:`PARSE_WORKERS`; 0 parses them in the download threads.
+
+        Returns
+        -------
+        list
+            The result for each file, in the order given, as
+            :meth:`download_samples`, :meth:`download_info` and
+            :meth:`download_prior_info` would return it.
+        """
+        found = []
+        for method, model, dataset, filestype in files:
+            filename = self.get_filename(method, model, dataset, filestype)
+            entry = self.find_deposit(model, dataset)
+            file = None if entry is None else entry["files"].get(filename)
+            found.append((model, dataset, filename, file))
+
+        results = [None] * len(found)
+        parsing = {}
+        parses = (
+            _parse_pool(parse_workers)
+            if parse_workers and any(f[2].endswith(".csv") for f in found)
+            else None
+        )
+        with ThreadPoolExecutor(max(1, download_workers)) as downloads:
+            try:
+                pending = {
+                    downloads.submit(self._batch_download, *file, parses is not None): i
+                    for i, file in enumerate(found)
+                }
+                for future in as_completed(pending):
+                    i = pending[future]
+                    results[i], path = future.result()
+                    if path is None:
+                        continue
+                    try:
+                        future = parses.submit(_parse_samples, path)
+                    except BrokenProcessPool:
+                        # A worker died, in this batch or an earlier one.
+                        parses = _parse_pool(parse_workers, broken=parses)
+                        future = parses.submit(_parse_samples, path)
+                    parsing[future] = i
+                for future in as_completed(parsing):
+                    i = parsing[future]
+                    filename, file = found[i][2], found[i][3]
+                    results[i] = future.result()
+                    if results[i] is None:
+                        # Evicted by another process before the worker opened
+                        # it, so download it again here.
+                        results[i] = self._download_file(
+                            filename, file["url"], file["checksum"], file.get("size")
+                        )
+                        continue
+                    print(f"{filename} file loaded successfully.")
+                    if self.samples_cache:
+                        self.samples_cache.save(file["checksum"], results[i])
+            finally:
+                for future in parsing:
+                    future.cancel()
+        return results
+
+    def _batch_download(self, model, dataset, filename, file, parse_elsewhere):
+        """Download one file of :meth:`download_batch`.
+
+        Returns
+        -------
+        tuple
+            The loaded file and None; or, for a chain to be parsed by a worker
+            because ``parse_elsewhere`` is set, None and the chain's path in
+            :attr:`file_cache`.
+        """
+        if file is None:
+            return self._download_deposit_file(model, dataset, filename), None
+        url, checksum, size = file["url"], file.get("checksum"), file.get("size")
+        if not (
+            parse_elsewhere
+            and checksum
+            and self.file_cache
+            and filename.endswith(".csv")
+        ):
+            return self._download_file(filename, url, checksum, size), None
+        if self.samples_cache:
+            samples = self.samples_cache.load(checksum)
+            if samples is not None:
+                print(f"{filename} file loaded successfully.")
+                return samples, None
+        path = self._cached_path(filename, url, checksum, size)
+        return None, path
+
+    def download_deposit(self, model, dataset, method="ns", archive=False):
+        """Download the samples, info and prior_info of a deposit together.
+
+        The deposit is looked up once, and only the files it holds are
+        requested, all at once through :meth:`download_batch`. With
+        ``archive=True``, the files missing from :attr:`file_cache` instead
+        arrive in a single request for the zip archive of the whole deposit,
+        and every file in it is added to the cache.
+
+        Parameters
+        ----------
+        model : str
+            The cosmological model name.
+        dataset : str
+            The dataset name.
+        method : str, optional
+            'ns' for Nested Sampling (the default) or 'mcmc' for Metropolis-
+            Hastings.
+        archive : bool, optional
+            Download the deposit's zip archive rather than its files one by
+            one. The archive holds every file of the deposit, chains of both
+            methods included, so this saves round trips at the cost of
+            transferring files that may not be needed. Requires a
+            :attr:`file_cache`. Defaults to False.
+
+        Returns
+        -------
+        dict or None
+            The ``"samples"``, ``"info"`` and ``"prior_info"`` of the deposit,
+            as :meth:`download_samples`, :meth:`download_info` and
+            :meth:`download_prior_info` would return them, with None for a
+            file the deposit does not hold; or None if there is no such
+            deposit.
+        """
+        entry = self.find_deposit(model, dataset)
+        if entry is None:
+            print(f"No deposit found for {model} and {dataset}.")
+            return None
+        filestypes = [
+            filestype
+            for filestype in ("samples", "info", "prior_info")
+            if self.get_filename(method, model, dataset, filestype) in entry["files"]
+        ]
+        if archive and entry.get("archive") and self.file_cache:
+            files = entry["files"].values()
+            if any(
+                file.get("checksum") and not self.file_cache.get(file["checksum"])
+                for file in files
+            ):
+                self._fetch_archive(f"{model} {dataset}", entry)
+        results = self.download_batch(
+            [(method, model, dataset, filestype) for filestype in filestypes]
+        )
+        deposit = dict.fromkeys(["samples", "info", "prior_info"])
+        deposit.update(zip(filestypes, results))
+        return deposit
+
+    def _fetch_archive(self, name, entry):
+        """Download a deposit's zip archive and add its files to the file cache.
+
+        Each file is checked against the checksum published for it, as
+        :meth:`_fetch` checks files downloaded on their own, when
+        :attr:`verify_checksums` is set.
+
+        Parameters
+        ----------
+        name : str
+            A name for the deposit in messages.
+        entry : dict
+            The deposit's entry, as described in :attr:`manifest`.
+
+        Returns
+        -------
+        bool
+            True if the archive was downloaded, False otherwise.
+
+        Raises
+        ------
+        ChecksumError
+            If a file in the archive does not match its published checksum.
+        """
+        with tempfile.TemporaryFile() as fp:
+            if not self._fetch(f"archive of {name}", entry["archive"], fp):
+                return False
+            fp.seek(0)
+            with zipfile.ZipFile(fp) as zf:
+                members = set(zf.namelist())
+                for key, file in entry["files"].items():
+                    checksum = file.get("checksum")
+                    if key not in members or not checksum:
+                        continue
+                    with self.file_cache.open_partial(checksum) as part:
+                        if self.file_cache.get(checksum):
+                            continue
+                        part.seek(0)
+                        part.truncate()
+                        digest = self._new_digest(checksum)
+                        length = 0
+                        with zf.open(key) as member:
+                            for block in iter(
+                                lambda: member.read(DOWNLOAD_CHUNK_SIZE), b""
+                            ):
+                                part.write(block)
+                                length += len(block)
+                                if digest is not None:
+                                    digest.update(block)
+                        part.flush()
+                        if self.verify_checksums:
+                            self._verify(
+                                key, part, length, digest, checksum, file.get("size")
+                            )
+                        self.file_cache.put(checksum, part.name)
+        return True
+
+    @staticmethod
+    def _verify(filename, fp, length, digest, checksum, size=None):
+        """Check a download against the size and checksum Zenodo published.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the file, for the error message.
+        fp : file-like
+            The downloaded file, emptied if it does not match.
+        length : int
+            The number of bytes downloaded.
+        digest : hash object or None
+            The hash of the bytes downloaded, from :meth:`_new_digest`.
+        checksum : str
+            The published checksum.
+        size : int, optional
+            The published size in bytes.
+
+        Raises
+        ------
+        ChecksumError
+            If the download does not match.
+        """
+        error = None
+        received = digest and f"{digest.name}:{digest.hexdigest()}"
+        if size is not None and length != size:
+            error = f"received {length} of {size} bytes"
+        elif received and received != checksum.lower():
+            error = f"checksum {received} does not match {checksum}"
+        if error is not None:
+            fp.seek(0)
+            fp.truncate()
+            raise ChecksumError(f"Download of {filename} is corrupt: {error}.")
 
     def download_info(self, method, model, dataset):
         """Download the YAML info file for a given method, model, and dataset.
@@ -1011,8 +2509,7 @@ class DatabaseExplorer(Database):
         dict or None: The contents of the info file.
         """
         filename = self.get_filename(method, model, dataset, "info")
-        deposit_id = self.get_deposit_id_by_title_users(model, dataset)
-        return self.download(deposit_id, filename)
+        return self._download_deposit_file(model, dataset, filename)
 
     def download_prior_info(self, model, dataset, method="ns"):
         """Download the PRIOR_INFO file for a given method, model, and dataset.
@@ -1031,8 +2528,7 @@ class DatabaseExplorer(Database):
         dict or None: A dictionary containing the value of 'nprior' and 'ndiscarded'.
         """
         filename = self.get_filename(method, model, dataset, "prior_info")
-        deposit_id = self.get_deposit_id_by_title_users(model, dataset)
-        return self.download(deposit_id, filename)
+        return self._download_deposit_file(model, dataset, filename)
 
     def get_deposit_id_by_title_users(self, model, dataset):
         """Search for a single deposit by title without requiring an access token.
@@ -1047,24 +2543,214 @@ class DatabaseExplorer(Database):
         Returns
         -------
         str or None: The deposit ID of the matching result, or None if not found.
+
+        Raises
+        ------
+        requests.RequestException
+            If Zenodo cannot be searched; see :meth:`_search_deposit`.
+        """
+        entry = self._search_deposit(model, dataset)
+        return None if entry is None else entry["id"]
+
+    def _search_deposit(self, model, dataset):
+        """Find one deposit with a title search and return its manifest entry.
+
+        Zenodo matches the title as a phrase, so a joint such as ``a+b`` would also
+        match a search for ``a``; only a hit whose title is exactly the one
+        requested is accepted.
+
+        Returns
+        -------
+        dict or None: The deposit's entry, as described in :attr:`manifest`, or None
+        if not found.
+
+        Raises
+        ------
+        requests.RequestException
+            If Zenodo cannot be searched, once the session's retries are spent.
+            Nothing is remembered, so a later lookup searches again.
         """
         params = {
             "q": f'title:"unimpeded: {model} {dataset}"',
-            "size": 1,
+            "size": 10,
         }
 
-        try:
-            response = requests.get(self.records_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        response = self.session.get(self.records_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+
+        for hit in data.get("hits", {}).get("hits", []):
+            title = hit.get("metadata", {}).get("title", "")
+            if self._parse_title(title) == (model, dataset):
+                return self._manifest_entry(hit)
+        print("No deposit found with the given title.")
+        return None
+
+
+class _SegmentLog:
+    """How far each range of a segmented download has got.
+
+    Kept as JSON in a hidden file beside the partial download, so that its
+    ranges can be resumed by another process; a download to an unnamed
+    temporary file keeps it in memory only. It is written at least every
+    :attr:`INTERVAL` bytes of each range, and whenever a range stops, so an
+    interrupted download loses at most that much of each.
+
+    Parameters
+    ----------
+    fp : file-like
+        The partial download.
+    size : int
+        The size of the complete file.
+    ranges : list of list
+        ``[start, done, end]`` for each range: its first byte, the first
+        byte not yet written, and its end, exclusive.
+    """
 
-            hits = data.get("hits", {}).get("hits", [])
-            if hits:
-                return hits[0].get("id")
-            else:
-                print("No deposit found with the given title.")
-                return None
+    #: Bytes a range may advance between writes of the log.
+    INTERVAL = 8 << 20
 
-        except requests.RequestException as e:
-            print(f"Error fetching deposit: {e}")
+    def __init__(self, fp, size, ranges):
+        self.fp = fp
+        self.size = size
+        self.ranges = ranges
+        name = getattr(fp, "name", None)
+        self.path = f"{name}.segments" if isinstance(name, str) else None
+        self._saved = [done for _, done, _ in ranges]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, fp, size):
+        """Return the log of an unfinished download into ``fp``, or None.
+
+        A log for a file of another size is discarded, together with the
+        ranges in ``fp``, which then start again from nothing.
+        """
+        log = cls(fp, size, [])
+        if log.path is None:
+            return None
+        try:
+            with open(log.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if size is None or saved.get("size") != size:
+            log.remove()
+            fp.seek(0)
+            fp.truncate()
             return None
+        return cls(fp, size, saved["ranges"])
+
+    def open(self):
+        """Extend the file to its full size and open it for writing anywhere.
+
+        Returns
+        -------
+        int
+            A descriptor of the file, to pass to :meth:`close`. The partial
+            files of the file cache are opened for appending, which would
+            ignore the offsets written at, so those are opened afresh.
+        """
+        if self.path is None:
+            fd = self.fp.fileno()
+        else:
+            fd = os.open(self.fp.name, os.O_WRONLY)
+        if os.fstat(fd).st_size < self.size:
+            os.ftruncate(fd, self.size)
+        self.save()
+        return fd
+
+    def close(self, fd):
+        """Close a descriptor returned by :meth:`open`."""
+        if self.path is not None:
+            os.close(fd)
+
+    def write(self, fd, data, offset):
+        """Write all of ``data`` at ``offset`` in the file open as ``fd``."""
+        while data:
+            if hasattr(os, "pwrite"):
+                written = os.pwrite(fd, data, offset)
+            else:  # pragma: no cover - not available on Windows
+                with self._lock:
+                    os.lseek(fd, offset, os.SEEK_SET)
+                    written = os.write(fd, data)
+            data = data[written:]
+            offset += written
+
+    def advance(self, i, done):
+        """Record that range ``i`` is written up to ``done``."""
+        with self._lock:
+            self.ranges[i][1] = done
+            if done - self._saved[i] >= self.INTERVAL:
+                self._save()
+
+    def save(self):
+        """Write the log, if it has a file."""
+        with self._lock:
+            self._save()
+
+    def remove(self):
+        """Delete the log, once the download is complete or abandoned."""
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _save(self):
+        """Write the log atomically; the caller holds the lock."""
+        self._saved = [done for _, done, _ in self.ranges]
+        if self.path is None:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"size": self.size, "ranges": self.ranges}, f)
+        os.replace(tmp, self.path)
+
+
+_parse_pools = {}
+_parse_pools_lock = threading.Lock()
+
+
+def _parse_pool(workers, broken=None):
+    """Return the pool of ``workers`` processes shared by every batch.
+
+    The pool is started by :func:`~unimpeded._pool.process_pool` on first use
+    and kept, so only the first batch waits for the processes to start. Only
+    one pool is kept: asking for another number of workers shuts the old one
+    down. Pass a pool that raised
+    :class:`~concurrent.futures.process.BrokenProcessPool` as ``broken`` to
+    have it replaced.
+    """
+    with _parse_pools_lock:
+        pool = _parse_pools.get(workers)
+        if pool is None or pool is broken:
+            _shutdown_parse_pools()
+            pool = _parse_pools[workers] = process_pool(workers)
+        return pool
+
+
+@atexit.register
+def _shutdown_parse_pools():
+    """Shut down the pools :func:`_parse_pool` started."""
+    for pool in _parse_pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _parse_pools.clear()
+
+
+def _parse_samples(path):
+    """Parse the chain CSV at ``path``, in a worker of ``download_batch``.
+
+    Returns None if the file has been evicted from the file cache since it
+    was downloaded.
+    """
+    try:
+        fp = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with fp:
+        samples = DatabaseExplorer._read_samples(fp)
+    # anesthetic records the file object it read from, which cannot be pickled
+    # back to the parent process.
+    samples.root = None
+    return samples
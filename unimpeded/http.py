@@ -0,0 +1,447 @@
+"""HTTP session shared by every request unimpeded makes to Zenodo.
+
+Metadata lookups, downloads and uploads all go to the same host, so they
+share one :class:`Session` whose pooled connections are kept alive between
+requests rather than paying for a new TCP and TLS handshake each time.
+
+The session also retries what Zenodo fails transiently: dropped connections,
+timeouts, rate limiting (429) and server errors (5xx) are retried with
+exponential backoff and jitter, honouring ``Retry-After``. Optionally, slow
+GETs are hedged with a duplicate request once they exceed a percentile of
+recent latencies, and whichever answers first is used.
+
+Every request first takes a token from a :class:`RateLimiter`, which learns
+Zenodo's per-IP limits from the ``X-RateLimit-*`` headers of its responses,
+so that parallel downloads and uploads stay just inside them.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+#: Maximum number of connections kept open to each host. Override with the
+#: ``UNIMPEDED_POOL_SIZE`` environment variable.
+POOL_SIZE = int(os.environ.get("UNIMPEDED_POOL_SIZE", 16))
+
+#: Default ``(connect, read)`` timeout in seconds for requests that do not set
+#: their own. Override with the ``UNIMPEDED_CONNECT_TIMEOUT`` and
+#: ``UNIMPEDED_READ_TIMEOUT`` environment variables.
+TIMEOUT = (
+    float(os.environ.get("UNIMPEDED_CONNECT_TIMEOUT", 10)),
+    float(os.environ.get("UNIMPEDED_READ_TIMEOUT", 60)),
+)
+
+#: Number of times a failed request is retried. Override with the
+#: ``UNIMPEDED_RETRIES`` environment variable.
+RETRIES = int(os.environ.get("UNIMPEDED_RETRIES", 4))
+
+#: Base delay in seconds before the first retry; it doubles with each retry.
+BACKOFF = 0.5
+
+#: Longest delay in seconds between retries, including ``Retry-After``.
+MAX_BACKOFF = 30.0
+
+#: Response statuses worth retrying: rate limiting and server errors.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+#: Methods that can be repeated without changing the result on the server.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+#: Latency percentile after which a GET is hedged with a duplicate request, or
+#: None not to hedge. Override with the ``UNIMPEDED_HEDGE_PERCENTILE``
+#: environment variable.
+HEDGE_PERCENTILE = (
+    float(os.environ["UNIMPEDED_HEDGE_PERCENTILE"])
+    if os.environ.get("UNIMPEDED_HEDGE_PERCENTILE")
+    else None
+)
+
+#: Number of recent GET latencies the hedging percentile is taken over, and
+#: the number needed before any request is hedged.
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+#: Seconds over which Zenodo's ``X-RateLimit-Limit`` requests are allowed; the
+#: token bucket refills at ``limit / RATE_LIMIT_WINDOW`` tokens per second.
+RATE_LIMIT_WINDOW = 60.0
+
+#: File holding rate-limit state shared by every process on the host, or None
+#: to share it only between the threads of one process. Override with the
+#: ``UNIMPEDED_RATE_LIMIT_FILE`` environment variable.
+RATE_LIMIT_FILE = os.environ.get("UNIMPEDED_RATE_LIMIT_FILE") or None
+
+
+class RateLimiter:
+    """Token bucket per host, sized by the server's rate-limit headers.
+
+    Until a host has reported its limit, requests to it are not held back.
+    After that each request takes a token; the bucket holds at most
+    ``X-RateLimit-Limit`` tokens, refills continuously over
+    :data:`RATE_LIMIT_WINDOW`, never holds more than the server's
+    ``X-RateLimit-Remaining``, and is full again at ``X-RateLimit-Reset``.
+
+    Parameters
+    ----------
+    path : str, optional
+        File in which to keep the state, locked while it is read and updated,
+        so that every process using the same file shares one budget. Defaults
+        to None, sharing the budget only between the threads of this process.
+    window : float, optional
+        Seconds over which the reported limit applies. Defaults to
+        :data:`RATE_LIMIT_WINDOW`.
+    """
+
+    def __init__(self, path=None, window=RATE_LIMIT_WINDOW):
+        self.path = path
+        self.window = window
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host):
+        """Take a token for a request to ``host``, waiting for one if needed."""
+        while True:
+            with self._transaction() as states:
+                state = states.get(host)
+                if state is None:
+                    return
+                now = time.time()
+                self._refill(state, now)
+                if state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    return
+                wait = (1 - state["tokens"]) * self.window / state["limit"]
+                if state["reset"] is not None:
+                    wait = min(wait, state["reset"] - now)
+            time.sleep(max(wait, 0.01))
+
+    def update(self, host, response):
+        """Learn the limit for ``host`` from the headers of ``response``."""
+        headers = response.headers
+        if not isinstance(headers, Mapping):
+            return
+        limit = _header_number(headers, "X-RateLimit-Limit")
+        remaining = _header_number(headers, "X-RateLimit-Remaining")
+        reset = _header_number(headers, "X-RateLimit-Reset")
+        if response.status_code == 429:
+            remaining = 0
+
+        with self._transaction() as states:
+            now = time.time()
+            if reset is not None and reset <= now:
+                # The window the count belongs to is already over.
+                remaining = reset = None
+            state = states.get(host)
+            if state is None:
+                if not limit:
+                    return
+                state = states[host] = {
+                    "limit": limit,
+                    "tokens": limit,
+                    "reset": None,
+                    "updated": now,
+                }
+            self._refill(state, now)
+            if limit:
+                state["limit"] = limit
+            if remaining is not None:
+                state["tokens"] = min(state["tokens"], remaining)
+            if reset is not None:
+                state["reset"] = reset
+
+    def _refill(self, state, now):
+        """Top up a bucket for the time elapsed since it was last updated."""
+        if state["reset"] is not None and now >= state["reset"]:
+            state["tokens"] = state["limit"]
+            state["reset"] = None
+        else:
+            elapsed = max(now - state["updated"], 0)
+            state["tokens"] = min(
+                state["limit"],
+                state["tokens"] + elapsed * state["limit"] / self.window,
+            )
+        state["updated"] = now
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the state exclusively while it is read and updated."""
+        with self._lock:
+            if self.path is None or fcntl is None:
+                yield self._states
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                try:
+                    states = json.loads(f.read() or "{}")
+                except ValueError:
+                    states = {}
+                yield states
+                f.seek(0)
+                f.truncate()
+                json.dump(states, f)
+
+
+_default_rate_limiter = None
+_default_rate_limiter_lock = threading.Lock()
+
+
+def default_rate_limiter():
+    """Return the :class:`RateLimiter` shared by default across the process.
+
+    Created on first use, backed by :data:`RATE_LIMIT_FILE` when that is set.
+    """
+    global _default_rate_limiter
+    if _default_rate_limiter is None:
+        with _default_rate_limiter_lock:
+            if _default_rate_limiter is None:
+                _default_rate_limiter = RateLimiter(RATE_LIMIT_FILE)
+    return _default_rate_limiter
+
+
+class Session(requests.Session):
+    """Connection-pooled :class:`requests.Session` with a default timeout.
+
+    The connection pool is safe to share between threads, which is how the
+    :class:`~unimpeded.database.Database` classes use it.
+
+    Parameters
+    ----------
+    pool_size : int, optional
+        Maximum number of connections kept open to each host. Defaults to
+        :data:`POOL_SIZE`.
+    keep_alive : bool, optional
+        Reuse connections between requests. Defaults to True; False closes
+        each connection once its response has been read.
+    timeout : float or tuple, optional
+        Default ``(connect, read)`` timeout in seconds, used by every request
+        that does not pass its own. Defaults to :data:`TIMEOUT`.
+    retries : int, optional
+        Number of times a failed request is retried. Defaults to
+        :data:`RETRIES`; 0 disables retrying.
+    backoff : float, optional
+        Base delay in seconds before the first retry. Defaults to
+        :data:`BACKOFF`.
+    max_backoff : float, optional
+        Longest delay in seconds between retries. Defaults to
+        :data:`MAX_BACKOFF`.
+    hedge_percentile : float, optional
+        Send a duplicate of a GET that has taken longer than this percentile
+        (0-100) of recent GET latencies, and use whichever response arrives
+        first. Defaults to :data:`HEDGE_PERCENTILE`; None disables hedging.
+    rate_limiter : :class:`RateLimiter`, optional
+        Limiter every request takes a token from. Defaults to the process-wide
+        :func:`default_rate_limiter`.
+
+    Notes
+    -----
+    Requests that are not idempotent, such as the POSTs that create deposits,
+    are only retried when the server cannot have acted on them: when the
+    connection could not be made, or the request was rate limited. File
+    bodies are rewound before being sent again.
+    """
+
+    def __init__(
+        self,
+        pool_size=POOL_SIZE,
+        keep_alive=True,
+        timeout=TIMEOUT,
+        retries=RETRIES,
+        backoff=BACKOFF,
+        max_backoff=MAX_BACKOFF,
+        hedge_percentile=HEDGE_PERCENTILE,
+        rate_limiter=None,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.rate_limiter = rate_limiter
+        self._latencies = deque(maxlen=HEDGE_WINDOW)
+        self._latencies_lock = threading.Lock()
+        self._hedge_pool = None
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
+    def request(self, method, url, **kwargs):
+        """Send a request, retrying transient failures.
+
+        The default timeout is applied if none is given. Once the retries are
+        exhausted the last response is returned, or the last exception raised,
+        exactly as :meth:`requests.Session.request` would.
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        body = kwargs.get("data")
+        position = body.tell() if hasattr(body, "seek") else None
+
+        for attempt in range(self.retries + 1):
+            if attempt and position is not None:
+                body.seek(position)
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries or not (idempotent or _never_sent(e)):
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                status = response.status_code
+                if (
+                    attempt == self.retries
+                    or status not in RETRY_STATUSES
+                    or not (idempotent or status == 429)
+                ):
+                    return response
+                delay = self._backoff(attempt, _retry_after(response))
+                response.close()
+            time.sleep(delay)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry number ``attempt + 1``.
+
+        Honours the server's ``Retry-After`` when given, and otherwise draws
+        uniformly up to an exponentially growing cap ("full jitter") so that
+        clients failing together do not retry together.
+        """
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def _send(self, method, url, **kwargs):
+        """Make a single attempt at a request, hedging it when enabled."""
+        if (
+            self.hedge_percentile is None
+            or method.upper() != "GET"
+            or kwargs.get("stream")
+        ):
+            return self._limited(method, url, **kwargs)
+
+        send = self._limited
+        threshold = self._hedge_threshold()
+        if threshold is None:
+            return self._timed(send, method, url, **kwargs)
+
+        if self._hedge_pool is None:
+            with self._latencies_lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(
+                        thread_name_prefix="unimpeded-hedge"
+                    )
+        pending = {self._hedge_pool.submit(self._timed, send, method, url, **kwargs)}
+        done, _ = wait(pending, timeout=threshold)
+        if not done:
+            pending.add(
+                self._hedge_pool.submit(self._timed, send, method, url, **kwargs)
+            )
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.add_done_callback(_close_response)
+                    return future.result()
+        raise future.exception()
+
+    def _limited(self, method, url, **kwargs):
+        """Send a request within the rate limit, learning it from the response."""
+        host = urlsplit(url).netloc
+        limiter = self.rate_limiter or default_rate_limiter()
+        limiter.acquire(host)
+        response = super().request(method, url, **kwargs)
+        limiter.update(host, response)
+        return response
+
+    def _timed(self, send, method, url, **kwargs):
+        """Send a request, recording its latency for the hedging percentile."""
+        start = time.monotonic()
+        response = send(method, url, **kwargs)
+        with self._latencies_lock:
+            self._latencies.append(time.monotonic() - start)
+        return response
+
+    def _hedge_threshold(self):
+        """Latency in seconds after which a GET is hedged, once known."""
+        with self._latencies_lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            latencies = sorted(self._latencies)
+        index = round(self.hedge_percentile / 100 * (len(latencies) - 1))
+        return latencies[index]
+
+
+def _never_sent(exception):
+    """Whether a failed request cannot have reached the server."""
+    if isinstance(exception, requests.ConnectTimeout):
+        return True
+    reason = getattr(exception.args[0], "reason", None) if exception.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _retry_after(response):
+    """Seconds the server asked us to wait, from its ``Retry-After`` header."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _header_number(headers, name):
+    """Value of a numeric header, or None if it is missing or malformed."""
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _close_response(future):
+    """Release the connection of a hedged request that lost the race."""
+    if future.exception() is None:
+        future.result().close()
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def default_session():
+    """Return the :class:`Session` shared by default across the process.
+
+    Created on first use with the module defaults.
+    """
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = Session()
+    return _default_session
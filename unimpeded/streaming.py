@@ -0,0 +1,177 @@
+"""Posterior summaries accumulated over blocks of samples.
+
+Each reducer is fed the blocks that
+:meth:`unimpeded.database.DatabaseExplorer.iter_samples` yields, one at a
+time, and holds a fixed amount of state however many samples pass through
+it, so a chain too large to load can still be summarised::
+
+    moments = WeightedMoments()
+    quantiles = QuantileSketch()
+    for block in dbe.iter_samples("mcmc", "lcdm", "planck_2018_plik"):
+        moments.update(block)
+        quantiles.update(block)
+    moments.mean, moments.cov, quantiles.quantile([0.025, 0.5, 0.975])
+
+Blocks may be :class:`anesthetic.samples.Samples` or any weighted
+DataFrame; unweighted blocks count each row once. Every block must have the
+same columns as the first.
+"""
+
+import numpy as np
+import pandas as pd
+
+#: Number of centroids a :class:`QuantileSketch` keeps per column.
+SKETCH_SIZE = 1000
+
+
+def _weights(block):
+    """Return the weights of ``block``, or ones if it is unweighted."""
+    if hasattr(block, "isweighted") and block.isweighted():
+        return np.asarray(block.get_weights())
+    return np.ones(len(block), dtype=int)
+
+
+class WeightedMoments:
+    """Weighted mean and covariance of the columns of a stream of blocks.
+
+    Blocks are combined with the pairwise update of Chan, Golub and LeVeque,
+    which is as accurate as a single pass over all the samples at once. The
+    covariance is unbiased in the same way as
+    :meth:`anesthetic.samples.Samples.cov`: integer weights are taken as
+    frequencies, and any other weights as reliabilities.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.weight = 0
+        self._weight2 = 0
+        self._frequency = True
+        self._mean = None
+        self._scatter = None
+
+    def update(self, block):
+        """Add the samples in ``block``, and return the reducer."""
+        weights = _weights(block)
+        values = np.asarray(block, dtype=float)
+        if self.columns is None:
+            self.columns = block.columns
+            self._mean = np.zeros(values.shape[1])
+            self._scatter = np.zeros((values.shape[1], values.shape[1]))
+        weight = weights.sum()
+        if weight == 0:
+            return self
+
+        mean = weights @ values / weight
+        deviations = values - mean
+        scatter = deviations.T @ (weights[:, None] * deviations)
+        total = self.weight + weight
+        delta = mean - self._mean
+        self._mean = self._mean + delta * weight / total
+        self._scatter = (
+            self._scatter
+            + scatter
+            + np.outer(delta, delta) * self.weight * weight / total
+        )
+        self.weight = total
+        self._weight2 = self._weight2 + (weights.astype(float) ** 2).sum()
+        self._frequency = self._frequency and np.issubdtype(weights.dtype, np.integer)
+        return self
+
+    @property
+    def mean(self):
+        """:class:`pandas.Series`: The weighted mean of each column."""
+        return pd.Series(self._mean, index=self.columns)
+
+    @property
+    def cov(self):
+        """:class:`pandas.DataFrame`: The weighted covariance of the columns."""
+        weight2 = self.weight if self._frequency else self._weight2
+        norm = self.weight - weight2 / self.weight if self.weight else 0
+        cov = self._scatter / norm if norm > 0 else np.full_like(self._scatter, np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+
+class QuantileSketch:
+    """Approximate weighted quantiles of the columns of a stream of blocks.
+
+    Each column is summarised by at most ``size`` centroids, the weighted
+    means of runs of neighbouring samples holding equal shares of the total
+    weight, so a quantile is off by at most about ``1 / size`` in
+    probability. Until more than ``size`` samples have been seen the samples
+    are kept as they are, and the quantiles are exactly those of
+    :meth:`anesthetic.samples.Samples.quantile`.
+
+    Parameters
+    ----------
+    size : int, optional
+        Number of centroids kept per column. Defaults to :data:`SKETCH_SIZE`.
+    """
+
+    def __init__(self, size=SKETCH_SIZE):
+        self.size = size
+        self.columns = None
+        self._values = None
+        self._weights = None
+
+    def update(self, block):
+        """Add the samples in ``block``, and return the reducer."""
+        weights = _weights(block).astype(float)
+        values = np.asarray(block, dtype=float)
+        if self.columns is None:
+            self.columns = block.columns
+            self._values = [np.empty(0)] * values.shape[1]
+            self._weights = [np.empty(0)] * values.shape[1]
+        for i in range(values.shape[1]):
+            self._values[i], self._weights[i] = self._compress(
+                np.concatenate([self._values[i], values[:, i]]),
+                np.concatenate([self._weights[i], weights]),
+            )
+        return self
+
+    def _compress(self, values, weights):
+        """Sort ``values`` and merge them into at most :attr:`size` centroids."""
+        keep = weights > 0
+        values, weights = values[keep], weights[keep]
+        order = np.argsort(values, kind="stable")
+        values, weights = values[order], weights[order]
+        if len(values) <= self.size:
+            return values, weights
+        cumulative = np.cumsum(weights) - weights / 2
+        bins = np.minimum(
+            (cumulative / weights.sum() * self.size).astype(int), self.size - 1
+        )
+        total = np.bincount(bins, weights, minlength=self.size)
+        moment = np.bincount(bins, weights * values, minlength=self.size)
+        used = total > 0
+        return moment[used] / total[used], total[used]
+
+    def quantile(self, q=0.5):
+        """Return the weighted quantiles ``q`` of each column.
+
+        Interpolates between centroids as
+        :func:`anesthetic.utils.quantile` does between samples.
+
+        Parameters
+        ----------
+        q : float or array-like, optional
+            Probabilities, between 0 and 1. Defaults to the median.
+
+        Returns
+        -------
+        :class:`pandas.Series` or :class:`pandas.DataFrame`
+            A Series indexed by column for a scalar ``q``; otherwise a
+            DataFrame with a row per probability.
+        """
+        result = []
+        for values, weights in zip(self._values, self._weights):
+            if len(values) == 0:
+                result.append(np.full(np.shape(q), np.nan))
+                continue
+            if len(values) == 1:
+                result.append(np.full(np.shape(q), values[0]))
+                continue
+            c = np.concatenate([[0.0], np.cumsum(weights[1:] + weights[:-1])])
+            result.append(np.interp(q, c / c[-1], values))
+        if np.ndim(q) == 0:
+            return pd.Series([float(r) for r in result], index=self.columns)
+        return pd.DataFrame(np.transpose(result), index=q, columns=self.columns)
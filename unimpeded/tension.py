@@ -3,21 +3,272 @@
 Wraps :func:`anesthetic.tension.tension_stats` with the correction for
 prior volume discarded during nested sampling, and adds helpers that pull
 the required chains straight from the public Zenodo grid.
+
+The statistics of each chain are memoized, so a chain shared by many
+combinations of datasets has them computed once, not once per combination.
 """
 
+import hashlib
+import os
+from concurrent.futures import as_completed
+from contextlib import contextmanager
 from functools import cache
 
 import numpy as np
-from anesthetic.samples import NestedSamples
+import pandas as pd
+from anesthetic.samples import NestedSamples, Samples
 from anesthetic.tension import tension_stats as anesthetic_tension_stats
 from scipy.special import erfcinv
 from scipy.stats import chi2
 
+from unimpeded._pool import process_pool
+from unimpeded.cache import StatsCache
 from unimpeded.database import DatabaseExplorer
 
+#: Statistics cache used when none is passed; held in memory only.
+default_stats_cache = StatsCache()
+
+#: Largest size in bytes of each (points, draws) matrix made while drawing
+#: the statistics of a chain; see :func:`chain_stats`. Override with the
+#: ``UNIMPEDED_STATS_CHUNK_BYTES`` environment variable.
+STATS_CHUNK_BYTES = int(os.environ.get("UNIMPEDED_STATS_CHUNK_BYTES", 256 << 20))
+
+#: Number of processes :func:`tension_sweep` computes statistics in.
+#: Override with the ``UNIMPEDED_SWEEP_WORKERS`` environment variable.
+SWEEP_WORKERS = int(os.environ.get("UNIMPEDED_SWEEP_WORKERS", os.cpu_count() or 1))
+
+#: Statistics of a single chain, in the order :func:`batch_tension_stats`
+#: takes them.
+STATS_COLUMNS = ("logZ", "D_KL", "logL_P", "d_G")
+
+#: Tension statistics, in the order :func:`batch_tension_stats` returns them.
+TENSION_STATISTICS = ("logR", "I", "logS", "d_G", "p", "sigma")
+
+
+def chain_digest(samples):
+    """Return a digest of the parts of ``samples`` its statistics depend on.
+
+    Two chains with the same log-likelihoods and live points have the same
+    digest, wherever they were loaded from.
+
+    Parameters
+    ----------
+    samples : :class:`anesthetic.samples.NestedSamples`
+        The nested sampling chain.
+
+    Returns
+    -------
+    str
+        The digest, e.g. ``"sha1:2fd4e1c6..."``.
+    """
+    digest = hashlib.sha1()
+    for column in ("logL", "nlive"):
+        digest.update(np.ascontiguousarray(samples[column], dtype=float).data)
+    return f"sha1:{digest.hexdigest()}"
+
+
+def chain_stats(
+    samples, nsamples=None, beta=None, seed=None, stats_cache=None, chunksize=None
+):
+    """Return ``samples.stats(nsamples=nsamples, beta=beta)``, memoized.
+
+    The result is looked up by the digest of the chain (see
+    :func:`chain_digest`), ``nsamples``, ``beta`` (``samples.beta`` if not
+    given) and ``seed``, and computed only when it is not found. Draws made
+    without a ``seed`` come from numpy's global generator, as anesthetic's
+    own do, so :func:`numpy.random.seed` makes them reproducible; they are
+    computed afresh every time and never cached.
+
+    When all ``nsamples`` draws fit in one block of ``chunksize``, they are
+    made by :meth:`anesthetic.samples.NestedSamples.stats` itself, so the
+    result is exactly anesthetic's for the same state of numpy's global
+    generator, and the same as earlier releases for the same ``seed``.
+
+    Otherwise the draws of the prior volumes are made here, ``chunksize`` at
+    a time, and each block is reduced to its statistics by
+    :meth:`anesthetic.samples.NestedSamples.stats` before the next is drawn,
+    so memory is bounded however large ``nsamples`` is. These draws come
+    from their own stream per chain and seed, taken in the same order
+    whatever the size of the blocks, so they do not depend on ``chunksize``
+    but do differ, though they have the same distribution, from the draws
+    of a single block.
+
+    Parameters
+    ----------
+    samples : :class:`anesthetic.samples.NestedSamples`
+        The nested sampling chain.
+    nsamples : int, optional
+        Number of draws; see :meth:`anesthetic.samples.NestedSamples.stats`.
+        Defaults to the mean values.
+    beta : float or array-like, optional
+        Inverse temperature(s); see
+        :meth:`anesthetic.samples.NestedSamples.stats`.
+    seed : int, optional
+        Seed for the draws, making them reproducible and so cacheable.
+    stats_cache : :class:`~unimpeded.cache.StatsCache` or False, optional
+        Where to look up and store the result. Defaults to
+        :data:`default_stats_cache`; False disables caching.
+    chunksize : int, optional
+        Number of draws per block. Defaults to as many as keep each
+        (points, draws) matrix within :data:`STATS_CHUNK_BYTES`.
+
+    Returns
+    -------
+    :class:`pandas.Series` or :class:`anesthetic.samples.Samples`
+        The statistics, as returned by
+        :meth:`anesthetic.samples.NestedSamples.stats`. A cached result is
+        shared between callers, so should not be modified.
+    """
+    if stats_cache is None:
+        stats_cache = default_stats_cache
+    if nsamples is not None and seed is None:
+        stats_cache = False
+
+    chain = chain_digest(samples)
+    if beta is not None:
+        beta = float(beta) if np.ndim(beta) == 0 else tuple(map(float, beta))
+    # The chain's own inverse temperature is used when none is given, so it
+    # belongs in the key; beta is still passed on as given, since anesthetic
+    # returns the mean values as a Series only for beta=None.
+    key = (chain, nsamples, float(samples.beta) if beta is None else beta, seed)
+    if stats_cache:
+        stats = stats_cache.get(key)
+        if stats is not None:
+            return stats
+
+    if isinstance(beta, tuple):
+        beta = list(beta)
+    if nsamples is None:
+        stats = samples.stats(beta=beta)
+    else:
+        if chunksize is None:
+            nbetas = 1 if beta is None or np.ndim(beta) == 0 else len(beta)
+            chunksize = STATS_CHUNK_BYTES // (8 * max(len(samples), 1) * nbetas)
+        chunksize = max(int(chunksize), 1)
+        if chunksize >= nsamples:
+            with _seeded(seed, chain):
+                stats = samples.stats(nsamples=nsamples, beta=beta)
+        else:
+            if seed is None:
+                rng = np.random
+            else:
+                # Mixing the digest of the chain into the seed gives each
+                # chain its own stream, so chains drawn with the same seed
+                # are independent.
+                rng = np.random.default_rng([seed, int(chain[5:21], 16)])
+            stats = _draw_stats(samples, nsamples, beta, rng, chunksize)
+    if stats_cache:
+        stats_cache.put(key, stats)
+    return stats
+
+
+@contextmanager
+def _seeded(seed, chain):
+    """Seed numpy's global generator for ``chain``, restoring it afterwards.
+
+    Mixing the digest of the chain into the seed gives each chain its own
+    stream, so chains drawn with the same seed are drawn independently.
+    """
+    if seed is None:
+        yield
+        return
+    state = np.random.get_state()
+    entropy = [seed, int(chain.partition(":")[2][:16], 16)]
+    np.random.seed(np.random.SeedSequence(entropy).generate_state(4))
+    try:
+        yield
+    finally:
+        np.random.set_state(state)
+
+
+def _draw_stats(samples, nsamples, beta, rng, chunksize):
+    """Draw ``nsamples`` statistics of ``samples`` in blocks of ``chunksize``.
+
+    ``rng`` is a :class:`numpy.random.Generator`, or :mod:`numpy.random`
+    itself for numpy's global generator.
+    """
+    betas = None if beta is None or np.ndim(beta) == 0 else np.asarray(beta)
+    nbetas = 1 if betas is None else len(betas)
+
+    blocks = []
+    for start in range(0, nsamples, chunksize):
+        stop = min(start + chunksize, nsamples)
+        logw = _logw(samples, rng.random((stop - start, len(samples))), beta)
+        block = samples.stats(nsamples=logw, beta=beta)
+        blocks.append(np.asarray(block).reshape(nbetas, stop - start, -1))
+        del logw
+
+    if betas is None:
+        index = pd.RangeIndex(nsamples, name="samples")
+    else:
+        index = pd.MultiIndex.from_product(
+            [betas, range(nsamples)], names=["beta", "samples"]
+        )
+    values = np.concatenate(blocks, axis=1).reshape(len(index), -1)
+    stats = Samples(values, index=index, columns=block.columns)
+    stats.label = samples.label
+    return stats
+
+
+def _logw(samples, random, beta):
+    """Return the log-weights of ``samples`` for a block of draws.
+
+    Follows :meth:`anesthetic.samples.NestedSamples.logw`, but from the
+    uniform variates ``random``, of shape (draws, points), rather than ones
+    it draws itself, and reusing one matrix for the prior volumes and then
+    their widths.
+    """
+    logX = np.log(random.T)
+    logX /= samples.nlive.to_numpy(dtype=float)[:, None]
+    np.cumsum(logX, axis=0, out=logX)
+
+    # dX[i] = (X[i-1] - X[i+1]) / 2, with X = 1 before the first point and
+    # X = 0 after the last.
+    logdX = np.empty_like(logX)
+    log2 = np.log(2)
+    if len(logX) == 1:
+        logdX.fill(-log2)
+    else:
+        logdX[0] = np.log1p(-np.exp(logX[1])) - log2
+        logdX[-1] = logX[-2] - log2
+    if len(logX) > 2:
+        inner = logdX[1:-1]
+        np.subtract(logX[2:], logX[:-2], out=inner)
+        np.exp(inner, out=inner)
+        np.negative(inner, out=inner)
+        np.log1p(inner, out=inner)
+        inner += logX[:-2]
+        inner -= log2
+    del logX
+
+    logL = samples.logL.to_numpy(dtype=float)
+    draws = pd.RangeIndex(logdX.shape[1], name="samples")
+    if beta is None or np.ndim(beta) == 0:
+        beta = samples.beta if beta is None else beta
+        if beta != 0:
+            logdX += beta * logL[:, None]
+        return pd.DataFrame(logdX, index=samples.index, columns=draws, copy=False)
+
+    betas = np.asarray(beta, dtype=float)
+    with np.errstate(invalid="ignore"):
+        betalogL = np.where(betas == 0, 0.0, np.outer(logL, betas))
+    logw = np.add(logdX[:, None, :], betalogL[:, :, None])
+    columns = pd.MultiIndex.from_product([betas, draws], names=["beta", "samples"])
+    return pd.DataFrame(
+        logw.reshape(len(logL), -1), index=samples.index, columns=columns, copy=False
+    )
+
 
 def tension_stats(
-    joint, *separate, joint_f=1.0, separate_fs=None, nsamples=None, beta=None
+    joint,
+    *separate,
+    joint_f=1.0,
+    separate_fs=None,
+    nsamples=None,
+    beta=None,
+    seed=None,
+    stats_cache=None,
+    chunksize=None,
 ):
     r"""Compute tension statistics between two or more samples.
 
@@ -87,20 +338,42 @@ def tension_stats(
 
     beta : float, array-like, default=1
         Inverse temperature(s) `beta=1/kT`. This is only used if the inputs
-        are :class:`anesthetic.samples.NestedSamples` objects.
-
+        are :class:`anesthetic.samples.NestedSamples` objects. For an array,
+        the statistics at every temperature are computed in one pass over
+        each chain, sharing its draws of the prior volumes, so a ladder of
+        temperatures costs little more than one.
+
+    seed : int, optional
+        Seed for the draws of ``nsamples``, making them reproducible. Only
+        seeded draws, or mean values, are cached. Without one the draws come
+        from numpy's global generator, as anesthetic's do.
+
+    stats_cache : :class:`~unimpeded.cache.StatsCache` or False, optional
+        Cache of the statistics of each
+        :class:`anesthetic.samples.NestedSamples` input; see
+        :func:`chain_stats`. Defaults to :data:`default_stats_cache`; False
+        disables caching.
+
+    chunksize : int, optional
+        Number of ``nsamples`` draws made and reduced at a time, bounding the
+        memory used whatever ``nsamples`` is; see :func:`chain_stats`. Draws
+        that fit in one block are made by anesthetic itself, exactly as
+        without it; draws split into blocks come from a stream of their own, which
+        does not depend on the size of the blocks.
 
     Returns
     -------
     samples : :class:`anesthetic.samples.Samples`
         DataFrame containing the following tension statistics in columns:
-        ['logR', 'I', 'logS', 'd_G', 'p', 'sigma']
+        ['logR', 'I', 'logS', 'd_G', 'p', 'sigma']. For an array of
+        ``beta``, indexed by ``beta``, and by ``samples`` within each
+        temperature when ``nsamples`` is given.
     """
     columns = ["logZ", "D_KL", "logL_P", "d_G"]
 
     def get_stats(data):
         if isinstance(data, NestedSamples) and not set(columns).issubset(data.columns):
-            return data.stats(nsamples=nsamples, beta=beta)
+            return chain_stats(data, nsamples, beta, seed, stats_cache, chunksize)
         return data
 
     joint_stats = get_stats(joint)
@@ -136,6 +409,60 @@ def tension_stats(
     return samples
 
 
+def batch_tension_stats(joint, separate, joint_f=1.0, separate_fs=1.0):
+    """Compute tension statistics for many groups of datasets at once.
+
+    The arithmetic of :func:`tension_stats`, done in a single pass over
+    arrays holding the statistics of every group, rather than one call per
+    group. Groups of fewer datasets than others can be padded with separate
+    statistics of zero and correction factors of one, which leave the result
+    unchanged.
+
+    Parameters
+    ----------
+    joint : array-like, shape (..., 4)
+        Statistics of the joint chain of each group, with the last axis
+        ordered as :data:`STATS_COLUMNS`. The other axes are free, e.g.
+        (groups, draws).
+    separate : array-like, shape (k, ..., 4)
+        Statistics of the ``k`` separate chains of each group, stacked along
+        the first axis.
+    joint_f : float or array-like, optional
+        Correction factor ``F`` of each joint chain, broadcast against the
+        shape of ``joint`` without its last axis. Defaults to 1.
+    separate_fs : float or array-like, optional
+        Correction factors of the separate chains, broadcast against the
+        shape of ``separate`` without its last axis. Defaults to 1.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`, shape (..., 6)
+        The tension statistics of each group, with the last axis ordered as
+        :data:`TENSION_STATISTICS`.
+    """
+    joint = np.asarray(joint, dtype=float)
+    separate = np.asarray(separate, dtype=float)
+    if separate.shape[1:] != joint.shape or joint.shape[-1] != len(STATS_COLUMNS):
+        raise ValueError(
+            f"Expected 'joint' of shape (..., {len(STATS_COLUMNS)}) and "
+            f"'separate' of shape (k, ...) matching it, not {joint.shape} and "
+            f"{separate.shape}."
+        )
+    shape = joint.shape[:-1]
+    log_f = np.log(np.broadcast_to(joint_f, shape)) - np.log(
+        np.broadcast_to(separate_fs, separate.shape[:-1])
+    ).sum(axis=0)
+
+    logZ, D_KL, logL_P, d_G = np.moveaxis(joint - separate.sum(axis=0), -1, 0)
+    logR = logZ + log_f
+    I = log_f - D_KL  # noqa: E741
+    logS = logL_P
+    d_G = -d_G
+    p = chi2.sf(d_G - 2 * logS, df=d_G)
+    sigma = erfcinv(p) * np.sqrt(2)
+    return np.stack([logR, I, logS, d_G, p, sigma], axis=-1)
+
+
 @cache
 def download_tension_inputs(method, model, *datasets):
     """Download and prepare the inputs that ``tension_stats`` needs.
@@ -145,6 +472,14 @@ def download_tension_inputs(method, model, *datasets):
     This function is cached. The download process will only run once for
     each unique combination of method, model, and datasets. Subsequent
     calls with the same arguments will return the stored result instantly.
+
+    Raises
+    ------
+    LookupError
+        If any of the files cannot be downloaded, e.g. because a deposit is
+        not published.
+    requests.RequestException
+        If Zenodo cannot be reached to look the deposits up.
     """
     dbe = DatabaseExplorer()
     # The joint dataset name is a '+' separated string of the sorted dataset names.
@@ -155,13 +490,22 @@ def download_tension_inputs(method, model, *datasets):
     print("This should only appear ONCE for each set of inputs.")
     print("Downloading required files...")
 
-    # Download samples and prior info for each individual dataset
-    separate_samples = [dbe.download_samples(method, model, ds) for ds in datasets]
-    separate_prior_info = [dbe.download_prior_info(model, ds) for ds in datasets]
+    # Download samples and prior info for each individual dataset and for the
+    # joint dataset together, parsing each chain while the others download
+    names = [*datasets, joint_dataset_name]
+    files = [(method, model, ds, "samples") for ds in names] + [
+        ("ns", model, ds, "prior_info") for ds in names
+    ]
+    results = dbe.download_batch(files)
+    missing = [f"{f[2]} {f[3]}" for f, r in zip(files, results) if r is None]
+    if missing:
+        raise LookupError(
+            f"Could not download the {', '.join(missing)} for ({method}, {model}); "
+            "see the errors printed above."
+        )
 
-    # Download for the joint dataset
-    samples_joint = dbe.download_samples(method, model, joint_dataset_name)
-    prior_info_joint = dbe.download_prior_info(model, joint_dataset_name)
+    *separate_samples, samples_joint = results[: len(names)]
+    *separate_prior_info, prior_info_joint = results[len(names) :]
 
     print("Downloads complete. Caching results.")
     print("---")
@@ -179,10 +523,24 @@ def download_tension_inputs(method, model, *datasets):
     }
 
 
-def tension_calculator(method, model, *datasets, nsamples=None, beta=None):
+def tension_calculator(
+    method,
+    model,
+    *datasets,
+    nsamples=None,
+    beta=None,
+    seed=None,
+    stats_cache=None,
+    chunksize=None,
+):
     """Compute tension statistics directly from dataset names.
 
-    Accepts any number of datasets (2 or more).
+    Accepts any number of datasets (2 or more). The statistics of each chain
+    are memoized as described in :func:`tension_stats`, so chains shared
+    between calls, e.g. one dataset paired with each of the others in turn,
+    have them computed once. ``beta`` may be an array of temperatures, as
+    for :func:`tension_stats`, to compute them all in one pass, and
+    ``chunksize`` bounds the memory used by large ``nsamples``.
     """
     print(f"Starting tension calculation with nsamples={nsamples}...")
 
@@ -204,5 +562,196 @@ def tension_calculator(method, model, *datasets, nsamples=None, beta=None):
         *separate_arg_list,  # Unpacks the list of separate samples
         nsamples=nsamples,
         beta=beta,
+        seed=seed,
+        stats_cache=stats_cache,
+        chunksize=chunksize,
         **args_for_this_run,  # Passes remaining args like joint_f, separate_fs
     )
+
+
+def tension_sweep(
+    method,
+    models=None,
+    dataset_groups=None,
+    nsamples=1000,
+    beta=None,
+    seed=0,
+    workers=SWEEP_WORKERS,
+    chunksize=None,
+):
+    """Compute tension statistics for many combinations of datasets at once.
+
+    Each chain the combinations need is downloaded, loaded and reduced to its
+    statistics exactly once, however many combinations it appears in, by a
+    pool of ``workers`` processes. The tension statistics of every
+    combination are then computed from those of its chains in one pass of
+    :func:`batch_tension_stats`, and summarised by the mean and standard
+    deviation of their draws. A chain that fails to download or load is
+    reported, and the combinations needing it are skipped, so one bad chain
+    does not cost the rest of the sweep.
+
+    Parameters
+    ----------
+    method : str
+        The sampling method, e.g. ``"ns"``.
+    models : str or iterable of str, optional
+        The models to sweep. Defaults to every model in the catalog.
+    dataset_groups : int or iterable of tuple, optional
+        The groups of separate datasets to compute the tension between: a
+        number, for every complete group of that size in the catalog (see
+        :meth:`unimpeded.catalog.Catalog.complete_groups`), or the groups
+        themselves, of which those not published for a model are skipped.
+        Defaults to every complete pair.
+    nsamples : int, optional
+        Number of draws of each chain's statistics. Defaults to 1000; None
+        uses their mean values instead, with no ``std``.
+    beta : float or array-like, optional
+        Inverse temperature(s); see :func:`tension_stats`. The statistics
+        for every temperature are drawn in one pass over each chain.
+    seed : int or None, optional
+        Seed for the draws, making the sweep reproducible however the work is
+        divided between processes. Defaults to 0; None draws from each
+        process's global generator, so the table differs on every run.
+    workers : int, optional
+        Number of processes. Defaults to :data:`SWEEP_WORKERS`; 0 computes
+        everything in this process.
+    chunksize : int, optional
+        Number of draws made and reduced at a time in each process; see
+        :func:`chain_stats`.
+
+    Returns
+    -------
+    :class:`pandas.DataFrame`
+        One row per model, group and statistic in :data:`TENSION_STATISTICS`,
+        with columns ``model``, ``datasets`` (the joint dataset name),
+        ``statistic``, ``mean`` and ``std``; and, for an array of ``beta``,
+        one row per temperature too, identified by a ``beta`` column.
+
+    Raises
+    ------
+    requests.RequestException
+        If the catalog cannot be fetched in full, rather than sweeping only
+        the part of it found.
+    """
+    dbe = DatabaseExplorer()
+    catalog = dbe.catalog
+    if models is None:
+        models = catalog.models
+    elif isinstance(models, str):
+        models = [models]
+
+    combinations = []
+    for model in models:
+        if dataset_groups is None or isinstance(dataset_groups, int):
+            groups = catalog.complete_groups(model, dataset_groups or 2)
+        else:
+            groups = [tuple(sorted(group)) for group in dataset_groups]
+        for group in groups:
+            joint = catalog.joint_name(model, group)
+            if joint is None or not all((model, d) in catalog for d in group):
+                print(f"Skipping {model} {'+'.join(group)}: not published.")
+                continue
+            combinations.append((model, group, joint))
+
+    chains = sorted(
+        {(model, d) for model, group, joint in combinations for d in (*group, joint)}
+    )
+    print(
+        f"Sweeping {len(combinations)} combinations of {len(chains)} chains "
+        f"with {workers} workers..."
+    )
+    arguments = (method, nsamples, beta, seed, chunksize)
+    results = {}
+    if workers:
+        with process_pool(workers) as pool:
+            pending = {
+                pool.submit(_sweep_chain, model, dataset, *arguments): (model, dataset)
+                for model, dataset in chains
+            }
+            for future in as_completed(pending):
+                results[pending[future]] = _sweep_result(
+                    *pending[future], future.result
+                )
+    else:
+        for model, dataset in chains:
+            results[model, dataset] = _sweep_result(
+                model, dataset, _sweep_chain, model, dataset, *arguments, dbe
+            )
+
+    downloaded = []
+    for model, group, joint in combinations:
+        if any(results[model, d] is None for d in (joint, *group)):
+            print(f"Skipping {model} {joint}: a chain could not be loaded.")
+            continue
+        downloaded.append((model, group, joint))
+    combinations = downloaded
+
+    size = max((len(group) for _, group, _ in combinations), default=0)
+    betas = None if beta is None or np.ndim(beta) == 0 else np.asarray(beta, float)
+    nbetas = 1 if betas is None else len(betas)
+    ndraws = nsamples or 1
+    joint = np.zeros((len(combinations), nbetas, ndraws, len(STATS_COLUMNS)))
+    separate = np.zeros((size, *joint.shape))
+    joint_f = np.ones(len(combinations))
+    separate_fs = np.ones((size, len(combinations)))
+    for i, (model, group, name) in enumerate(combinations):
+        joint[i], joint_f[i] = results[model, name]
+        for j, dataset in enumerate(group):
+            separate[j, i], separate_fs[j, i] = results[model, dataset]
+    statistics = batch_tension_stats(
+        joint, separate, joint_f[:, None, None], separate_fs[:, :, None, None]
+    )
+
+    rows = len(TENSION_STATISTICS) * nbetas
+    table = {
+        "model": np.repeat([m for m, _, _ in combinations], rows),
+        "datasets": np.repeat([n for _, _, n in combinations], rows),
+    }
+    if betas is not None:
+        table["beta"] = np.tile(
+            np.repeat(betas, len(TENSION_STATISTICS)), len(combinations)
+        )
+    table["statistic"] = np.tile(TENSION_STATISTICS, len(combinations) * nbetas)
+    table["mean"] = statistics.mean(axis=2).ravel()
+    table["std"] = statistics.std(axis=2, ddof=1).ravel() if ndraws > 1 else np.nan
+    return pd.DataFrame(table)
+
+
+def _sweep_result(model, dataset, function, *args):
+    """Return ``function(*args)`` for one chain of a sweep, or None if it fails.
+
+    Any error is printed rather than raised, so that it loses only the
+    combinations that need this chain.
+    """
+    try:
+        return function(*args)
+    except Exception as e:
+        print(f"Error loading {model} {dataset}: {type(e).__name__}: {e}")
+        return None
+
+
+@cache
+def _sweep_explorer():
+    """Return the explorer each worker of :func:`tension_sweep` downloads with."""
+    return DatabaseExplorer()
+
+
+def _sweep_chain(model, dataset, method, nsamples, beta, seed, chunksize, dbe=None):
+    """Load one chain of a :func:`tension_sweep` and reduce it to statistics.
+
+    Returns
+    -------
+    tuple or None
+        The chain's statistics, as an array of shape (betas, draws, 4) with
+        the last axis ordered as :data:`STATS_COLUMNS`, and its correction
+        factor ``F``; or None if either of its files could not be downloaded.
+    """
+    dbe = _sweep_explorer() if dbe is None else dbe
+    samples = dbe.download_samples(method, model, dataset)
+    info = dbe.download_prior_info(model, dataset)
+    if samples is None or info is None:
+        return None
+    stats = chain_stats(samples, nsamples, beta, seed, chunksize=chunksize)
+    stats = np.asarray(stats.drop_labels()[list(STATS_COLUMNS)], dtype=float)
+    stats = stats.reshape(-1, nsamples or 1, len(STATS_COLUMNS))
+    return stats, info["nprior"] / info["ndiscarded"]